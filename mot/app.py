@@ -1,10 +1,23 @@
+import itertools
+import os
+import shutil
 import sys
+import tempfile
 from argparse import Namespace
+from datetime import datetime
+from typing import Dict, List, Optional
 
-from mot.diff_over_time import get_diff_over_time, print_differences
-from mot.money_over_time import get_money_over_time, show_graph
+from mot.balance_over_time import get_balance_index, print_balance_queries
+from mot.diff_over_time import get_diff_over_time, get_row_diff_over_time, print_differences, \
+    print_row_differences
+from mot.money_over_time import create_graph, get_money_over_time_by_group, get_money_over_time_of_files, \
+    show_graph, watch_money_over_time_of_files
+from mot.reader.memory_cache import MemoryCache
+from mot.reader.movements_cache import MovementsCache, DEFAULT_CACHE_DIRECTORY
 from mot.types.cell import Cell
 from mot.types.date_cell import DateCell, DEFAULT_DATE_LABEL, DEFAULT_DATE_FORMAT
+from mot.types.movement_series import MovementSeries
+from mot.types.records_file import RecordsFile
 from mot.program_arguments import parse_program_arguments
 
 
@@ -15,6 +28,12 @@ def run() -> None:
         result = __run_money_over_time(args)
     elif args.command == "diff":
         result = __run_diff_over_time(args)
+    elif args.command == "query":
+        result = __run_query(args)
+    elif args.command == "serve":
+        result = __run_server(args)
+    elif args.command == "convert":
+        result = __run_convert(args)
 
     if result:
         sys.exit(0)
@@ -23,11 +42,6 @@ def run() -> None:
 
 
 def __run_money_over_time(args: Namespace) -> bool:
-    date_cell = DateCell(
-        DEFAULT_DATE_LABEL if args.date_label is None else args.date_label,
-        DEFAULT_DATE_FORMAT if args.date_format is None else args.date_format
-    )
-
     if args.filter_label is None or args.filter_value is None:
         filtering_cell = None
     else:
@@ -36,17 +50,53 @@ def __run_money_over_time(args: Namespace) -> bool:
             args.filter_value
         )
 
+    if args.batch and (args.output is None or "{name}" not in args.output):
+        print("The --batch argument requires --output, containing \"{name}\", use --help for more.")
+        return False
+    if args.batch and args.watch:
+        print("The --batch and --watch arguments can't be used together, use --help for more.")
+        return False
+    if args.group_by is not None and (args.batch or args.watch or args.separate_traces):
+        print("The --group-by argument can't be used with --batch, --watch or --separate-traces,"
+              " use --help for more.")
+        return False
+    if args.watch:
+        return __watch_money_over_time(args, filtering_cell)
+
+    traces: Optional[Dict[str, MovementSeries]] = None
     try:
-        movements = get_money_over_time(
-            args.file,
-            args.delimiter,
-            date_cell,
-            args.amount_label,
-            filtering_cell,
-            args.filter_mode
-        )
-    except FileNotFoundError:
-        print("File not found!")
+        records_files = __get_records_files(args)
+        if args.group_by is None:
+            movements, movements_of_files = get_money_over_time_of_files(
+                records_files,
+                filtering_cell,
+                args.filter_mode,
+                args.engine,
+                __get_cache(args),
+                args.incremental,
+                args.workers,
+                args.amount_mode,
+                args.filter,
+                args.concurrency,
+                args.max_memory
+            )
+            traces = __get_traces(args, records_files, movements_of_files)
+        else:
+            movements, traces = get_money_over_time_by_group(
+                records_files,
+                args.group_by,
+                filtering_cell,
+                args.filter_mode,
+                args.amount_mode,
+                args.filter,
+                args.concurrency
+            )
+    except FileNotFoundError as e:
+        message = "File not found!"
+        if args.verbose:
+            print(message, e)
+        else:
+            print(message)
         return False
     except ValueError as e:
         message = "Error reading the file, check if arguments are correct, use --help for more."
@@ -56,7 +106,95 @@ def __run_money_over_time(args: Namespace) -> bool:
             print(message)
         return False
 
-    show_graph(movements, date_cell.date_format)
+    if args.batch:
+        return __write_graphs_of_files(args, records_files, movements_of_files)
+
+    stacked = args.group_mode == "stack"
+    if args.output is None:
+        show_graph(movements, traces, args.downsampling, args.max_points, args.period, stacked)
+        return True
+
+    from mot.graph.export import write_graph
+
+    try:
+        write_graph(
+            create_graph(movements, traces, args.downsampling, args.max_points, args.period, stacked),
+            args.output
+        )
+    except (OSError, ValueError) as e:
+        print("Error writing the graph!", e)
+        return False
+    return True
+
+
+def __watch_money_over_time(args: Namespace, filtering_cell: Optional[Cell]) -> bool:
+    """
+    The graph is shown in a page which is updated in place each time the records files
+    change, or written again to --output if specified.
+    """
+    import pathlib
+    import webbrowser
+
+    from mot.graph.export import write_graph
+    from mot.graph.live_graph import update_live_graph, write_live_graph_page
+
+    try:
+        records_files = __get_records_files(args)
+    except ValueError as e:
+        print("Error reading the file, check if arguments are correct, use --help for more.", e)
+        return False
+
+    versions = itertools.count(1)
+
+    def on_change(movements: MovementSeries, movements_of_files: List[MovementSeries]) -> None:
+        plot_graph = create_graph(
+            movements,
+            __get_traces(args, records_files, movements_of_files),
+            args.downsampling,
+            args.max_points,
+            args.period
+        )
+        if args.output is None:
+            update_live_graph(plot_graph, directory, next(versions))
+        else:
+            write_graph(plot_graph, args.output)
+        print(f"{datetime.now():%H:%M:%S} Graph updated.")
+
+    def on_error(e: Exception) -> None:
+        message = f"{datetime.now():%H:%M:%S} Error reading the file, the graph will be updated when it's fixed."
+        if args.verbose:
+            print(message, e)
+        else:
+            print(message)
+
+    directory = tempfile.mkdtemp(prefix="mot-watch-")
+    try:
+        if args.output is None:
+            webbrowser.open(pathlib.Path(write_live_graph_page(directory)).as_uri())
+        print("Watching the records files, press Ctrl+C to stop.")
+
+        watch_money_over_time_of_files(
+            records_files,
+            on_change,
+            filtering_cell,
+            args.filter_mode,
+            args.engine,
+            __get_cache(args),
+            args.workers,
+            args.amount_mode,
+            args.filter,
+            args.concurrency,
+            args.watch_interval,
+            on_error=on_error,
+            max_memory=args.max_memory
+        )
+    except OSError as e:
+        print("Error writing the graph!", e)
+        return False
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
     return True
 
 
@@ -78,6 +216,12 @@ def __run_diff_over_time(args: Namespace) -> bool:
             args.filter_value
         )
 
+    if args.granularity == "row":
+        if args.period != "day":
+            print("The --period argument requires --granularity 'day', use --help for more.")
+            return False
+        return __run_row_diff_over_time(args, source_date_cell, reference_date_cell, filtering_cell)
+
     try:
         differences_over_time = get_diff_over_time(
             args.source_file,
@@ -89,7 +233,17 @@ def __run_diff_over_time(args: Namespace) -> bool:
             args.source_amount_label,
             args.reference_delimiter,
             reference_date_cell,
-            args.reference_amount_label
+            args.reference_amount_label,
+            args.engine,
+            __get_cache(args),
+            args.incremental,
+            args.workers,
+            args.concurrency,
+            args.amount_mode,
+            args.tolerance,
+            args.filter,
+            args.period,
+            args.max_memory
         )
     except FileNotFoundError as e:
         message = "File not found!"
@@ -109,5 +263,264 @@ def __run_diff_over_time(args: Namespace) -> bool:
     if len(differences_over_time) == 0:
         print("No differences found!")
     else:
-        print_differences(differences_over_time, source_date_cell.date_format)
+        print_differences(differences_over_time, source_date_cell.date_format, args.period)
+    return True
+
+
+def __run_row_diff_over_time(
+        args: Namespace,
+        source_date_cell: DateCell,
+        reference_date_cell: DateCell,
+        filtering_cell: Optional[Cell]
+) -> bool:
+    try:
+        row_differences = get_row_diff_over_time(
+            args.source_file,
+            args.reference_file,
+            args.source_delimiter,
+            filtering_cell,
+            args.filter_mode,
+            source_date_cell,
+            args.source_amount_label,
+            args.reference_delimiter,
+            reference_date_cell,
+            args.reference_amount_label,
+            args.concurrency,
+            args.date_window,
+            args.filter
+        )
+    except FileNotFoundError as e:
+        message = "File not found!"
+        if args.verbose:
+            print(message, e)
+        else:
+            print(message)
+        return False
+    except ValueError as e:
+        message = "Error reading the files, check if arguments are correct, use --help for more."
+        if args.verbose:
+            print(message, e)
+        else:
+            print(message)
+        return False
+
+    if len(row_differences.source) == 0 and len(row_differences.reference) == 0:
+        print("No differences found!")
+    else:
+        print_row_differences(row_differences, source_date_cell.date_format)
+    return True
+
+
+def __run_query(args: Namespace) -> bool:
+    if args.filter_label is None or args.filter_value is None:
+        filtering_cell = None
+    else:
+        filtering_cell = Cell(
+            args.filter_label,
+            args.filter_value
+        )
+
+    if args.start is not None and args.end is not None and args.end < args.start:
+        print("The --to date must not be before the --from date.")
+        return False
+
+    try:
+        balance_index = get_balance_index(
+            __get_records_files(args),
+            filtering_cell,
+            args.filter_mode,
+            args.engine,
+            __get_cache(args),
+            args.incremental,
+            args.workers,
+            args.amount_mode,
+            args.filter,
+            args.concurrency,
+            args.max_memory
+        )
+    except FileNotFoundError as e:
+        message = "File not found!"
+        if args.verbose:
+            print(message, e)
+        else:
+            print(message)
+        return False
+    except ValueError as e:
+        message = "Error reading the file, check if arguments are correct, use --help for more."
+        if args.verbose:
+            print(message, e)
+        else:
+            print(message)
+        return False
+
+    print_balance_queries(balance_index, args.at, args.start, args.end, "%Y-%m-%d")
     return True
+
+
+def __run_server(args: Namespace) -> bool:
+    # Asyncio is only imported when the server is started.
+    from mot.server import serve
+
+    try:
+        serve(args.host, args.port, args.socket, __get_cache(args), MemoryCache(args.max_entries))
+    except OSError as e:
+        print("Error starting the server!", e)
+        return False
+    except KeyboardInterrupt:
+        pass
+    return True
+
+
+def __run_convert(args: Namespace) -> bool:
+    # NumPy is only imported when a records file is converted.
+    from mot.reader.columnar_ledger import convert_records_file
+
+    records_file = RecordsFile(
+        args.file,
+        args.delimiter,
+        DateCell(
+            DEFAULT_DATE_LABEL if args.date_label is None else args.date_label,
+            DEFAULT_DATE_FORMAT if args.date_format is None else args.date_format
+        ),
+        args.amount_label
+    )
+    output = os.path.splitext(args.file)[0] + ".mot" if args.output is None else args.output
+
+    try:
+        rows = convert_records_file(
+            records_file.file_path,
+            records_file.delimiter,
+            output,
+            records_file.date_cell,
+            records_file.amount_label,
+            args.column
+        )
+    except FileNotFoundError as e:
+        message = "File not found!"
+        if args.verbose:
+            print(message, e)
+        else:
+            print(message)
+        return False
+    except ValueError as e:
+        message = "Error reading the file, check if arguments are correct, use --help for more."
+        if args.verbose:
+            print(message, e)
+        else:
+            print(message)
+        return False
+    except OSError as e:
+        print("Error writing the columnar ledger!", e)
+        return False
+
+    print(f"Converted {rows} rows to \"{output}\".")
+    return True
+
+
+def __write_graphs_of_files(
+        args: Namespace,
+        records_files: List[RecordsFile],
+        movements_of_files: List[MovementSeries]
+) -> bool:
+    """
+    All the graphs are written by the same process, so that imports and the setup of
+    Plotly are only paid once.
+    """
+    from mot.graph.export import write_graph
+
+    names = __get_names_of_files(records_files, "-", False)
+    for name, movements_of_file in zip(names, movements_of_files):
+        try:
+            write_graph(
+                create_graph(movements_of_file, None, args.downsampling, args.max_points, args.period),
+                args.output.replace("{name}", name)
+            )
+        except (OSError, ValueError) as e:
+            print("Error writing the graph!", e)
+            return False
+
+    return True
+
+
+def __get_traces(
+        args: Namespace,
+        records_files: List[RecordsFile],
+        movements_of_files: List[MovementSeries]
+) -> Optional[Dict[str, MovementSeries]]:
+    if not args.separate_traces:
+        return None
+
+    return dict(zip(__get_names_of_files(records_files, "/", True), movements_of_files))
+
+
+def __get_names_of_files(records_files: List[RecordsFile], separator: str, extension: bool) -> List[str]:
+    """
+    Records files are named after their file name, e.g. "bank.csv", and files with the
+    same name after as many of their parent directories as needed to tell them apart,
+    e.g. "checking/bank.csv" and "savings/bank.csv". The same file specified more than
+    once is numbered, e.g. "bank.csv (2)".
+    :param separator: Joins the parent directories and the file name.
+    :param extension: Whether the extension of the file is kept.
+    """
+    components = []
+    for records_file in records_files:
+        components_of_file = os.path.abspath(records_file.file_path).split(os.sep)[1:]
+        if not extension:
+            components_of_file[-1] = os.path.splitext(components_of_file[-1])[0]
+        components.append(components_of_file)
+
+    depths = [1] * len(records_files)
+    while True:
+        names = [separator.join(components_of_file[-depth:]) for components_of_file, depth in zip(components, depths)]
+        deeper = False
+        for index, name in enumerate(names):
+            same_name = [other for other, other_name in enumerate(names) if other_name == name]
+            if any(components[other] != components[index] for other in same_name) \
+                    and depths[index] < len(components[index]):
+                depths[index] += 1
+                deeper = True
+        if not deeper:
+            break
+
+    return [
+        name if names[:index].count(name) == 0 else f"{name} ({names[:index].count(name) + 1})"
+        for index, name in enumerate(names)
+    ]
+
+
+def __get_records_files(args: Namespace) -> List[RecordsFile]:
+    """
+    The delimiter, the date format, the date label and the amount label can be specified
+    once, for all the records files, or once for each of them, in the same order.
+    """
+    arguments_of_files = []
+    for name in ["delimiter", "date_format", "date_label", "amount_label"]:
+        values = getattr(args, name)
+        if values is None:
+            values = [None]
+        if len(values) == 1:
+            values = values * len(args.file)
+        elif len(values) != len(args.file):
+            raise ValueError(f"The --{name.replace('_', '-')} argument must be specified once,"
+                             " or once for each records file.")
+        arguments_of_files.append(values)
+
+    return [
+        RecordsFile(
+            file_path,
+            delimiter,
+            DateCell(
+                DEFAULT_DATE_LABEL if date_label is None else date_label,
+                DEFAULT_DATE_FORMAT if date_format is None else date_format
+            ),
+            amount_label
+        )
+        for file_path, delimiter, date_format, date_label, amount_label in zip(args.file, *arguments_of_files)
+    ]
+
+
+def __get_cache(args: Namespace) -> Optional[MovementsCache]:
+    if args.no_cache:
+        return None
+
+    return MovementsCache(DEFAULT_CACHE_DIRECTORY if args.cache_dir is None else args.cache_dir)
@@ -0,0 +1,96 @@
+from datetime import date
+from typing import Literal, Optional, Sequence
+
+from mot.money_over_time import get_money_over_time_of_files
+from mot.reader.movements_cache import MovementsCache
+from mot.reader.movements_manager import Concurrency, Engine, exclude_all_except, include_all_except
+from mot.reader.movements_parser import is_columnar_ledger
+from mot.types.balance_index import BalanceIndex
+from mot.types.cell import Cell
+from mot.types.filter_expression import FilterExpression
+from mot.types.movements import AmountMode
+from mot.types.records_file import RecordsFile
+
+
+def get_balance_index(
+        records_files: Sequence[RecordsFile],
+        filtering_cell: Optional[Cell] = None,
+        filter_mode: Literal["in", "out"] = "in",
+        engine: Engine = "python",
+        cache: Optional[MovementsCache] = None,
+        incremental: bool = False,
+        workers: int = 1,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = (),
+        concurrency: Concurrency = "thread",
+        max_memory: Optional[int] = None
+) -> BalanceIndex:
+    """
+    Indexes the money over time of one or more records files, see "BalanceIndex" for
+    the queries it answers. See "get_money_over_time_of_files" for the arguments.
+    :param cache: When specified, the index is stored along with the parsed movements,
+           keyed by the content of the records files and by the arguments, so that it's
+           found without parsing them. Columnar ledgers are never cached.
+    """
+    key = None
+    if cache is not None and not any(is_columnar_ledger(records_file.file_path) for records_file in records_files):
+        filter_callback = exclude_all_except if filter_mode == "in" else include_all_except
+        key = cache.get_balance_index_key(records_files, filtering_cell, filter_callback, amount_mode, filters)
+        balance_index = cache.load_balance_index(key)
+        if balance_index is not None:
+            return balance_index
+
+    money_over_time, _ = get_money_over_time_of_files(
+        records_files,
+        filtering_cell,
+        filter_mode,
+        engine,
+        cache,
+        incremental,
+        workers,
+        amount_mode,
+        filters,
+        concurrency,
+        max_memory
+    )
+    balance_index = BalanceIndex.from_money_over_time(money_over_time)
+    if cache is not None and key is not None:
+        cache.store_balance_index(key, balance_index)
+
+    return balance_index
+
+
+def print_balance_queries(
+        balance_index: BalanceIndex,
+        dates: Sequence[date],
+        start: Optional[date],
+        end: Optional[date],
+        date_format: str
+) -> None:
+    """
+    Prints the balance at each of the dates, then the net flow and the lowest and highest
+    balances between the start and the end.
+    The range is not printed if only dates are specified.
+    :param start: The first day of the range, the first day with movements if not specified.
+    :param end: The last day of the range, the last day with movements if not specified.
+    """
+    for balance_date in dates:
+        print(f"Balance on {balance_date.strftime(date_format)}: {balance_index.balance_at(balance_date):+.2f}")
+
+    if len(dates) > 0:
+        if start is None and end is None:
+            return
+        print()
+
+    start = balance_index.first_day() if start is None else start
+    end = balance_index.last_day() if end is None else end
+    if start is None or end is None:
+        print("No movements found!")
+        return
+
+    lowest_date, lowest_balance = balance_index.lowest_balance(start, end)
+    highest_date, highest_balance = balance_index.highest_balance(start, end)
+    print(f"From {start.strftime(date_format)} to {end.strftime(date_format)}:")
+    print(f"   Net flow: {balance_index.net_flow(start, end):+.2f}")
+    print(f"   Lowest balance: {lowest_balance:+.2f} on {lowest_date.strftime(date_format)}")
+    print(f"   Highest balance: {highest_balance:+.2f} on {highest_date.strftime(date_format)}")
@@ -0,0 +1,55 @@
+"""
+Compares "datetime.strptime" with the memoized date parsers, on the dates of a synthetic records file.
+
+Usage: python -m mot.benchmarks.date_parsing_benchmark --rows 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, List
+
+from mot.benchmarks.ledger_generator import write_synthetic_ledger
+from mot.reader.date_parser import compile_fast_date_parser, get_date_parser
+from mot.reader.movements_parser import read_rows_of_text_file
+
+DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%Y/%m/%d"]
+
+
+def measure(dates: List[str], parse_date: Callable[[str], object]) -> float:
+    start = time.perf_counter()
+    for date_str in dates:
+        parse_date(date_str)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of movements, default 1000000")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for date_format in DATE_FORMATS:
+            file_path = os.path.join(directory, "ledger.csv")
+            write_synthetic_ledger(file_path, args.rows, date_format=date_format)
+            rows = read_rows_of_text_file(file_path, ",")
+            next(rows)
+            dates = [row[1] for row in rows]
+
+            fast_parser = compile_fast_date_parser(date_format)
+            assert fast_parser is not None
+            parsers = {
+                "strptime": lambda date_str: datetime.strptime(date_str, date_format),
+                "fast path": fast_parser,
+                "memoized": get_date_parser(date_format),
+            }
+
+            print(f"{date_format}:")
+            for name, parse_date in parsers.items():
+                elapsed = measure(dates, parse_date)
+                print(f"  {name:>10}: {elapsed:8.3f} s  {len(dates) / elapsed:14,.0f} dates/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Compares the row based engine with the vectorized one on a synthetic records file.
+
+Usage: python -m mot.benchmarks.engine_benchmark --rows 5000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from mot.benchmarks.ledger_generator import write_synthetic_ledger
+from mot.reader.movements_manager import Engine, get_movements
+from mot.types.date_cell import DateCell
+from mot.types.movement_series import MovementSeries
+
+
+def run_engine(file_path: str, engine: Engine) -> tuple[MovementSeries, float]:
+    start = time.perf_counter()
+    movements = get_movements(file_path, ",", DateCell(), "amount", engine=engine)
+    return movements, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Number of movements, default 5000000")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "ledger.csv")
+        print(f"Generating {args.rows} movements...")
+        write_synthetic_ledger(file_path, args.rows)
+
+        results = {}
+        for engine in ("python", "vectorized"):
+            movements, elapsed = run_engine(file_path, engine)
+            results[engine] = movements
+            print(f"{engine:>10}: {elapsed:8.2f} s  {args.rows / elapsed:12,.0f} rows/s")
+
+        if results["python"] != results["vectorized"]:
+            raise SystemExit("The engines returned different movements!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import csv
+import random
+from datetime import date, timedelta
+from typing import Iterator, List
+
+ACCOUNTS = ["cash", "credit card", "debit card", "savings"]
+
+
+def write_synthetic_ledger(
+        file_path: str,
+        rows: int,
+        days: int = 3650,
+        delimiter: str = ",",
+        date_format: str = "%d/%m/%Y",
+        seed: int = 0,
+        accounts: int = len(ACCOUNTS)
+) -> None:
+    """
+    Writes a records file with random, but deterministic, movements, which is
+    useful to measure the performance of the program on large records files.
+    :param file_path: Where the records file is written, as an XLSX file if it ends with
+           ".xlsx", or as a CSV file otherwise.
+    :param rows: The number of movements.
+    :param days: The movements are spread over this many days, starting from 2000-01-01.
+    :param delimiter: Cells delimiter (usually "," or ";"), only used by CSV files.
+    :param date_format: The date format used for the date cells.
+    :param seed: The same seed always generates the same records file.
+    :param accounts: The number of distinct values of the "account" column, which
+           movements can be filtered or grouped by.
+    """
+    if file_path.endswith(".xlsx"):
+        __write_xlsx(file_path, __generate_rows(rows, days, date_format, seed, accounts))
+        return
+
+    with open(file_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, delimiter=delimiter)
+        writer.writerows(__generate_rows(rows, days, date_format, seed, accounts))
+
+
+def get_account_names(accounts: int) -> List[str]:
+    """
+    :return: The values of the "account" column of a synthetic records file.
+    """
+    return [ACCOUNTS[index] if index < len(ACCOUNTS) else f"account {index + 1}" for index in range(accounts)]
+
+
+def __generate_rows(rows: int, days: int, date_format: str, seed: int, accounts: int) -> Iterator[List[str]]:
+    generator = random.Random(seed)
+    first_day = date(2000, 1, 1)
+    dates = [(first_day + timedelta(days=day)).strftime(date_format) for day in range(days)]
+    account_names = get_account_names(accounts)
+
+    yield ["row_number", "date", "amount", "account"]
+    for row_number in range(1, rows + 1):
+        yield [
+            str(row_number),
+            dates[generator.randrange(days)],
+            f"{generator.uniform(-500, 500):.2f}",
+            account_names[generator.randrange(accounts)],
+        ]
+
+
+def __write_xlsx(file_path: str, rows: Iterator[List[str]]) -> None:
+    """
+    Rows are streamed with the write-only mode of openpyxl, and cells are stored as
+    text, like the ones of CSV files.
+    """
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(file_path)
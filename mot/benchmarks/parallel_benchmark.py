@@ -0,0 +1,56 @@
+"""
+Measures how parsing a synthetic records file scales with the number of worker processes.
+
+Usage: python -m mot.benchmarks.parallel_benchmark --rows 5000000 --max-workers 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from mot.benchmarks.ledger_generator import write_synthetic_ledger
+from mot.reader.movements_manager import get_movements
+from mot.types.date_cell import DateCell
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Number of movements, default 5000000")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="The benchmark doubles the workers up to this number, default is the number of CPUs"
+    )
+    args = parser.parse_args()
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= args.max_workers:
+        worker_counts.append(worker_counts[-1] * 2)
+    if worker_counts[-1] != args.max_workers:
+        worker_counts.append(args.max_workers)
+
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "ledger.csv")
+        print(f"Generating {args.rows} movements...")
+        write_synthetic_ledger(file_path, args.rows)
+
+        expected = None
+        serial_time = 0.0
+        for workers in worker_counts:
+            start = time.perf_counter()
+            movements = get_movements(file_path, ",", DateCell(), "amount", workers=workers)
+            elapsed = time.perf_counter() - start
+
+            if expected is None:
+                expected = movements
+                serial_time = elapsed
+            elif list(movements.items()) != list(expected.items()):
+                raise SystemExit(f"Parsing with {workers} workers returned different movements!")
+
+            print(f"{workers:>3} workers: {elapsed:8.2f} s  {args.rows / elapsed:12,.0f} rows/s"
+                  f"  speedup {serial_time / elapsed:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
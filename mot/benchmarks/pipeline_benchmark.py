@@ -0,0 +1,266 @@
+"""
+Measures the wall time, throughput and peak memory of each stage of the pipeline, on
+synthetic records files, and optionally writes them to a JSON file, which later runs
+can be compared with, e.g. to find the commit which made a stage slower.
+
+Usage: python -m mot.benchmarks.pipeline_benchmark --rows 1000000 --output results.json
+       python -m mot.benchmarks.pipeline_benchmark --rows 1000000 --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from mot import diff_over_time
+from mot.benchmarks.ledger_generator import write_synthetic_ledger
+from mot.money_over_time import create_graph, get_money_over_time
+from mot.reader.movements_manager import get_movements
+from mot.reader.movements_parser import parse_movements, read_rows_of_text_file, read_rows_of_xlsx
+from mot.types.date_cell import DateCell
+
+STAGES = [
+    "read_rows_of_text_file",
+    "parse_movements",
+    "parse_movements_vectorized",
+    "read_rows_of_xlsx",
+    "find_differences",
+    "create_graph",
+]
+"""
+The stages which can be measured, in the order they're run.
+"""
+
+RESULTS_VERSION = 1
+
+
+class StageResult(NamedTuple):
+    """
+    :param rows: The number of rows, or days, the stage processed.
+    :param seconds: The fastest wall time of the runs of the stage.
+    :param rows_per_second: The throughput of the fastest run.
+    :param peak_memory: The bytes allocated by the stage at its peak, measured in a
+           separate run, since tracing allocations slows it down.
+    """
+    rows: int
+    seconds: float
+    rows_per_second: float
+    peak_memory: int
+
+
+def measure_stage(run: Callable[[], Any], rows: int, repeat: int) -> StageResult:
+    """
+    :param run: Runs the stage once, reading inputs prepared beforehand.
+    :param repeat: How many times the wall time is measured, after a first run which
+           imports the modules used by the stage.
+    """
+    run()
+
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        run()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return StageResult(rows, seconds, rows / seconds if seconds > 0 else float("inf"), peak_memory)
+
+
+def run_benchmark(
+        directory: str,
+        stages: List[str],
+        rows: int,
+        xlsx_rows: int,
+        days: int,
+        delimiter: str,
+        date_format: str,
+        accounts: int,
+        seed: int,
+        repeat: int
+) -> Dict[str, StageResult]:
+    """
+    Generates the synthetic records files in the directory, then measures each stage.
+    Inputs of the stages, like the rows of the records file for "parse_movements", are
+    prepared before measuring them, so that each stage is measured on its own.
+    :param xlsx_rows: The number of rows of the XLSX records file, which is usually
+           smaller since XLSX files are much slower to write and read.
+    """
+    date_cell = DateCell("date", date_format)
+    csv_path = os.path.join(directory, "ledger.csv")
+    reference_path = os.path.join(directory, "reference.csv")
+    xlsx_path = os.path.join(directory, "ledger.xlsx")
+
+    write_ledger = partial(
+        write_synthetic_ledger,
+        days=days,
+        delimiter=delimiter,
+        date_format=date_format,
+        accounts=accounts
+    )
+    write_ledger(csv_path, rows, seed=seed)
+
+    results: Dict[str, StageResult] = {}
+    for stage in stages:
+        if stage == "read_rows_of_text_file":
+            results[stage] = measure_stage(lambda: __consume(read_rows_of_text_file(csv_path, delimiter)), rows, repeat)
+        elif stage == "parse_movements":
+            csv_rows = list(read_rows_of_text_file(csv_path, delimiter))[1:]
+            results[stage] = measure_stage(lambda: parse_movements(csv_rows, 1, date_format, 2), rows, repeat)
+            del csv_rows
+        elif stage == "parse_movements_vectorized":
+            results[stage] = measure_stage(
+                lambda: get_movements(csv_path, delimiter, date_cell, "amount", engine="vectorized"),
+                rows,
+                repeat
+            )
+        elif stage == "read_rows_of_xlsx":
+            if not os.path.exists(xlsx_path):
+                write_ledger(xlsx_path, xlsx_rows, seed=seed)
+            results[stage] = measure_stage(lambda: __consume(read_rows_of_xlsx(xlsx_path)), xlsx_rows, repeat)
+        elif stage == "find_differences":
+            write_ledger(reference_path, rows, seed=seed + 1)
+            source = get_movements(csv_path, delimiter, date_cell, "amount")
+            reference = get_movements(reference_path, delimiter, date_cell, "amount")
+            # The private function is measured directly, so that reading the files isn't.
+            find_differences = getattr(diff_over_time, "__find_differences")
+            results[stage] = measure_stage(
+                lambda: find_differences(source, reference, 0, 1),
+                len(source) + len(reference),
+                repeat
+            )
+        elif stage == "create_graph":
+            money_over_time = get_money_over_time(csv_path, delimiter, date_cell)
+            results[stage] = measure_stage(lambda: create_graph(money_over_time), len(money_over_time), repeat)
+        else:
+            raise ValueError(f"Unknown stage: {stage}")
+
+    return results
+
+
+def write_results(file_path: str, results: Dict[str, StageResult], arguments: Dict[str, Any]) -> None:
+    content = {
+        "version": RESULTS_VERSION,
+        "commit": __get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "arguments": arguments,
+        "stages": {stage: result._asdict() for stage, result in results.items()},
+    }
+    with open(file_path, "w", encoding="utf-8") as file:
+        json.dump(content, file, indent=2)
+
+
+def read_results(file_path: str) -> Dict[str, StageResult]:
+    """
+    :return: The results of a previous run, written by "write_results".
+    """
+    with open(file_path, encoding="utf-8") as file:
+        content = json.load(file)
+
+    if content.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported benchmark results: {file_path}")
+    return {stage: StageResult(**result) for stage, result in content["stages"].items()}
+
+
+def print_results(results: Dict[str, StageResult], baseline: Optional[Dict[str, StageResult]] = None) -> None:
+    """
+    :param baseline: The results of a previous run, the speedup of each stage over it
+           is printed too.
+    """
+    for stage, result in results.items():
+        line = (
+            f"{stage:>28}: {result.seconds:8.3f} s  {result.rows_per_second:14,.0f} rows/s"
+            f"  {result.peak_memory / 2 ** 20:8.1f} MiB"
+        )
+        if baseline is not None and stage in baseline:
+            line += f"  speedup {baseline[stage].seconds / result.seconds:5.2f}x"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of movements, default 1000000")
+    parser.add_argument(
+        "--xlsx-rows",
+        type=int,
+        default=100_000,
+        help="Number of movements of the XLSX records file, default 100000"
+    )
+    parser.add_argument("--days", type=int, default=3650, help="Days the movements are spread over, default 3650")
+    parser.add_argument("--delimiter", type=str, default=",", help="Cells delimiter, default ','")
+    parser.add_argument("--date-format", type=str, default="%d/%m/%Y", help="Date format, default '%%d/%%m/%%Y'")
+    parser.add_argument("--accounts", type=int, default=4, help="Distinct values of the account column, default 4")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic records files, default 0")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each stage, the fastest is kept, default 3")
+    parser.add_argument(
+        "--stage",
+        choices=STAGES,
+        action="append",
+        dest="stages",
+        help="Stage to measure, can be repeated, all of them by default"
+    )
+    parser.add_argument("--output", type=str, default=None, help="JSON file the results are written to")
+    parser.add_argument("--compare", type=str, default=None, help="JSON file of a previous run to compare with")
+    args = parser.parse_args()
+
+    stages = [stage for stage in STAGES if args.stages is None or stage in args.stages]
+    baseline = None if args.compare is None else read_results(args.compare)
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {args.rows} movements...")
+        results = run_benchmark(
+            directory,
+            stages,
+            args.rows,
+            args.xlsx_rows,
+            args.days,
+            args.delimiter,
+            args.date_format,
+            args.accounts,
+            args.seed,
+            args.repeat
+        )
+
+    print_results(results, baseline)
+    if args.output is not None:
+        arguments = {name: value for name, value in vars(args).items() if name not in ("output", "compare")}
+        write_results(args.output, results, arguments)
+
+
+def __consume(rows: Any) -> int:
+    count = 0
+    for _ in rows:
+        count += 1
+    return count
+
+
+def __get_commit() -> Optional[str]:
+    """
+    :return: The commit the program is run from, if it's run from a git repository.
+    """
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Measures the time spent importing the program before any records file is read, using
+"python -X importtime", and fails if any of the heavy dependencies is imported eagerly.
+
+Usage: python -m mot.benchmarks.startup_benchmark --runs 5 --max-milliseconds 300
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+HEAVY_MODULES = ["numpy", "pandas", "plotly", "openpyxl"]
+"""
+They're only needed by the vectorized engine, XLSX files, row reconciliation and graphs.
+"""
+
+
+def measure_imports(module: str) -> Dict[str, int]:
+    """
+    :return: The cumulative import time of each imported module, in microseconds.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    import_times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        _, cumulative, name = line[len("import time:"):].split("|")
+        import_times[name.strip()] = int(cumulative)
+
+    return import_times
+
+
+def get_slowest_imports(import_times: Dict[str, int], count: int) -> List[Tuple[str, int]]:
+    return sorted(import_times.items(), key=lambda x: x[1], reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", type=str, default="mot.app", help="Module to import, default mot.app")
+    parser.add_argument("--runs", type=int, default=5, help="Number of measurements, default 5")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show, default 10")
+    parser.add_argument(
+        "--max-milliseconds",
+        type=float,
+        default=None,
+        help="Fails if the median import time is greater, no limit by default"
+    )
+    args = parser.parse_args()
+
+    measurements = [measure_imports(args.module) for _ in range(args.runs)]
+    median = statistics.median(import_times[args.module] for import_times in measurements) / 1000
+
+    print(f"{args.module}: {median:8.1f} ms (median of {args.runs} runs)")
+    for name, cumulative in get_slowest_imports(measurements[-1], args.top):
+        print(f"  {name:>40}: {cumulative / 1000:8.1f} ms")
+
+    failed = False
+    eager_modules = [module for module in HEAVY_MODULES if module in measurements[-1]]
+    if len(eager_modules) > 0:
+        print(f"Heavy modules imported at startup: {', '.join(eager_modules)}")
+        failed = True
+    if args.max_milliseconds is not None and median > args.max_milliseconds:
+        print(f"Startup is slower than {args.max_milliseconds} ms")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,30 @@
-import pydoc
-from datetime import date
-from typing import Literal, Optional, Dict
+import heapq
+import math
+from functools import partial
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Sequence, Tuple
 
+from mot.reader.movements_cache import MovementsCache
 from mot.types.cell import Cell
 from mot.types.date_cell import DateCell
-from mot.types.movements import Movements
-from mot.reader.movements_manager import get_movements, exclude_all_except, \
-    include_all_except, sort_dictionary_by_keys
+from mot.types.difference_series import DifferenceSeries
+from mot.types.filter_expression import FilterExpression
+from mot.types.movement_rows import MovementRows, RowDifferences
+from mot.types.movement_series import MovementSeries
+from mot.types.movements import AmountMode
+from mot.types.period_series import Period, PeriodSeries, get_period_end
+from mot.reader.movements_manager import Concurrency, Engine, get_movements, exclude_all_except, \
+    include_all_except, get_movement_rows, load_concurrently
+
+# NumPy is only imported when rows are matched.
+if TYPE_CHECKING:
+    import numpy as np
+
+Granularity = Literal["day", "row"]
+"""
+    - day: the sums of the amounts of each day, or of each period, are compared.
+    - row: each movement of the source records file is matched to one of the reference
+      records file with the same amount, and the movements without a match are reported.
+"""
 
 
 def get_diff_over_time(
@@ -20,13 +38,37 @@ def get_diff_over_time(
         reference_delimiter: Optional[str] = None,
         reference_date_cell: Optional[DateCell] = None,
         reference_amount_label: Optional[str] = None,
-) -> Dict[date, Dict[str, float]]:
+        engine: Engine = "python",
+        cache: Optional[MovementsCache] = None,
+        incremental: bool = False,
+        workers: int = 1,
+        concurrency: Concurrency = "thread",
+        amount_mode: AmountMode = "float",
+        tolerance: float = 0,
+        source_filters: Sequence[FilterExpression] = (),
+        period: Period = "day",
+        max_memory: Optional[int] = None
+) -> DifferenceSeries:
     """
     Calculates the differences in financial entries over time
     between a source file and a reference one.
     This method is designed to help tracking differences in manually recorded
     financial movements against a reference dataset, allowing to identify potential
     accounting errors.
+    The source and reference files are loaded concurrently, see "Concurrency".
+    Using integer cents (see "AmountMode") avoids reporting differences caused only by
+    float rounding errors.
+    :param tolerance: Days whose source and reference amounts differ by up to this
+           amount are not considered different.
+    :param source_filters: Only the source movements matching all of them are compared.
+    :param period: The net amounts of each period are compared, instead of the ones of
+           each day, so that movements registered some days later by one of the files
+           are only reported when they fall in a different period. See "Period".
+    :return: The differences, by the first day of their period, sorted from the most
+             recent one.
+    :param max_memory: The approximate number of bytes the vectorized engine can use to
+           load the records files, which share it when they're loaded at the same time.
+           See "get_movements".
     """
     source_delimiter = "," if source_delimiter is None else source_delimiter
     source_date_cell = DateCell() if source_date_cell is None else source_date_cell
@@ -40,78 +82,371 @@ def get_diff_over_time(
     if source_filter_mode == "out":
         filter_callback = include_all_except
 
-    source_movements = get_movements(
+    if max_memory is not None and concurrency != "none":
+        max_memory //= 2
+
+    load_source_movements = partial(
+        get_movements,
         source_file_path,
         source_delimiter,
         source_date_cell,
         source_amount_label,
         source_filtering_cell,
-        filter_callback
+        filter_callback,
+        engine=engine,
+        cache=cache,
+        incremental=incremental,
+        workers=workers,
+        amount_mode=amount_mode,
+        filters=source_filters,
+        max_memory=max_memory
     )
 
-    reference_movements = get_movements(
+    load_reference_movements = partial(
+        get_movements,
+        reference_file_path,
+        reference_delimiter,
+        reference_date_cell,
+        reference_amount_label,
+        engine=engine,
+        cache=cache,
+        incremental=incremental,
+        workers=workers,
+        amount_mode=amount_mode,
+        max_memory=max_memory
+    )
+
+    source_movements, reference_movements = load_concurrently(
+        concurrency,
+        (source_file_path, load_source_movements),
+        (reference_file_path, load_reference_movements)
+    )
+    return get_differences(source_movements, reference_movements, amount_mode, tolerance, period)
+
+
+def get_differences(
+        source_movements: MovementSeries,
+        reference_movements: MovementSeries,
+        amount_mode: AmountMode = "float",
+        tolerance: float = 0,
+        period: Period = "day"
+) -> DifferenceSeries:
+    """
+    Like "get_diff_over_time", but the movements of the records files are already loaded,
+    e.g. kept in memory by a long-running process.
+    :param source_movements: The amount of each day, not the cumulative total. It is
+           not modified.
+    """
+    if period != "day":
+        source_movements = PeriodSeries.from_movements(source_movements, period).net_movements()
+        reference_movements = PeriodSeries.from_movements(reference_movements, period).net_movements()
+
+    if amount_mode == "cents":
+        return __find_differences(source_movements, reference_movements, round(tolerance * 100), 100)
+    return __find_differences(source_movements, reference_movements, tolerance, 1)
+
+
+def get_row_diff_over_time(
+        source_file_path: str,
+        reference_file_path: str,
+        source_delimiter: Optional[str] = None,
+        source_filtering_cell: Optional[Cell] = None,
+        source_filter_mode: Literal["in", "out"] = "in",
+        source_date_cell: Optional[DateCell] = None,
+        source_amount_label: Optional[str] = None,
+        reference_delimiter: Optional[str] = None,
+        reference_date_cell: Optional[DateCell] = None,
+        reference_amount_label: Optional[str] = None,
+        concurrency: Concurrency = "thread",
+        date_window: int = 0,
+        source_filters: Sequence[FilterExpression] = ()
+) -> RowDifferences:
+    """
+    Reconciles the single movements of a source file against the ones of a reference file,
+    see "Granularity".
+    Movements are matched by their date and amount, in integer cents. Movements without a
+    match on the same date are then matched to the nearest one with the same amount, which
+    is at most "date_window" days before or after them.
+    :param date_window: The maximum number of days between two matching movements,
+           useful when the reference movements are registered some days later.
+    :param source_filters: Only the source movements matching all of them are reconciled.
+    :return: The movements of each file without a match, in the same order of their file.
+    """
+    source_delimiter = "," if source_delimiter is None else source_delimiter
+    source_date_cell = DateCell() if source_date_cell is None else source_date_cell
+    source_amount_label = "amount" if source_amount_label is None else source_amount_label
+
+    reference_delimiter = "," if reference_delimiter is None else reference_delimiter
+    reference_date_cell = DateCell() if reference_date_cell is None else reference_date_cell
+    reference_amount_label = "amount" if reference_amount_label is None else reference_amount_label
+
+    filter_callback = exclude_all_except
+    if source_filter_mode == "out":
+        filter_callback = include_all_except
+
+    load_source_rows = partial(
+        get_movement_rows,
+        source_file_path,
+        source_delimiter,
+        source_date_cell,
+        source_amount_label,
+        source_filtering_cell,
+        filter_callback,
+        source_filters
+    )
+
+    load_reference_rows = partial(
+        get_movement_rows,
         reference_file_path,
         reference_delimiter,
         reference_date_cell,
         reference_amount_label
     )
 
-    differences_over_time = __find_differences(source_movements, reference_movements)
-    return sort_dictionary_by_keys(differences_over_time, reverse=True)
+    source_rows, reference_rows = load_concurrently(
+        concurrency,
+        (source_file_path, load_source_rows),
+        (reference_file_path, load_reference_rows)
+    )
+
+    return __match_rows(source_rows, reference_rows, date_window)
 
 
-def print_differences(differences_over_time: Dict[date, Dict[str, float]], date_format: str) -> None:
+def print_differences(differences_over_time: DifferenceSeries, date_format: str, period: Period = "day") -> None:
     """
     Uses output pagination, like the "less" Unix command.
     :param differences_over_time: The content to display.
     :param date_format: The date format to use when printing the date of each difference.
+    :param period: The period the differences were found by, which is printed from its
+           first to its last day.
     """
     content = ["Differences found:"]
-    for movement_date, values in differences_over_time.items():
-        source_value = values.get("source")
-        reference_value = values.get("reference")
+    for movement_date, source_value, reference_value, delta in differences_over_time.rows():
+        label = movement_date.strftime(date_format)
+        if period != "day":
+            label += f" - {get_period_end(movement_date, period).strftime(date_format)}"
 
         if source_value is None:
-            content.append(f"> {movement_date.strftime(date_format)}")
+            content.append(f"> {label}")
             content.append(f"   Source: Not available")
             content.append(f"   Reference: {reference_value:+.2f}")
         elif reference_value is None:
-            content.append(f"> {movement_date.strftime(date_format)}")
+            content.append(f"> {label}")
             content.append(f"   Source: {source_value:+.2f}")
             content.append(f"   Reference: Not available")
         else:
-            content.append(f"> {movement_date.strftime(date_format)}")
+            content.append(f"> {label}")
             content.append(f"   Source: {source_value:+.2f}")
             content.append(f"   Reference: {reference_value:+.2f}")
-            content.append(f"   Diff. (ref - src): {reference_value - source_value:+.2f}")
+            content.append(f"   Diff. (ref - src): {delta:+.2f}")
 
         content.append("")
 
+    import pydoc
+
     content_str = "\n".join(content)
     pydoc.pager(content_str)
 
 
 def __find_differences(
-        source_movements: Movements,
-        reference_movements: Movements
-) -> Dict[date, Dict[str, float]]:
-    discrepancies = {}
-
-    for movement_date in source_movements:
-        if movement_date not in reference_movements:
-            discrepancies[movement_date] = {
-                "source": source_movements[movement_date]
-            }
-        elif movement_date in reference_movements and source_movements[movement_date] != reference_movements[movement_date]:
-            discrepancies[movement_date] = {
-                "source": source_movements[movement_date],
-                "reference": reference_movements[movement_date]
-            }
-
-    for movement_date in reference_movements:
-        if movement_date not in source_movements:
-            discrepancies[movement_date] = {
-                "reference": reference_movements[movement_date]
-            }
-
-    return discrepancies
+        source_movements: MovementSeries,
+        reference_movements: MovementSeries,
+        tolerance: float,
+        scale: int
+) -> DifferenceSeries:
+    """
+    Both series are sorted by date, so they're walked once, backwards, merging them
+    like the merge step of merge sort, and the differences are found already sorted
+    from the most recent one.
+    :param tolerance: In the same unit of the amounts.
+    :param scale: The amounts are divided by it, to convert integer cents.
+    """
+    source_days, source_amounts = source_movements.days, source_movements.amounts
+    reference_days, reference_amounts = reference_movements.days, reference_movements.amounts
+    differences = DifferenceSeries()
+
+    source_index = len(source_days) - 1
+    reference_index = len(reference_days) - 1
+    while source_index >= 0 or reference_index >= 0:
+        source_day = source_days[source_index] if source_index >= 0 else -1
+        reference_day = reference_days[reference_index] if reference_index >= 0 else -1
+
+        if source_day > reference_day:
+            differences.append(source_day, source_amounts[source_index] / scale, math.nan, math.nan)
+            source_index -= 1
+        elif reference_day > source_day:
+            differences.append(reference_day, math.nan, reference_amounts[reference_index] / scale, math.nan)
+            reference_index -= 1
+        else:
+            source_amount = source_amounts[source_index]
+            reference_amount = reference_amounts[reference_index]
+            if abs(reference_amount - source_amount) > tolerance:
+                differences.append(
+                    source_day,
+                    source_amount / scale,
+                    reference_amount / scale,
+                    (reference_amount - source_amount) / scale
+                )
+            source_index -= 1
+            reference_index -= 1
+
+    return differences
+
+
+def print_row_differences(row_differences: RowDifferences, date_format: str) -> None:
+    """
+    Uses output pagination, like the "less" Unix command.
+    :param row_differences: The content to display.
+    :param date_format: The date format to use when printing the date of each movement.
+    """
+    content = []
+    for title, movement_rows in [("source", row_differences.source), ("reference", row_differences.reference)]:
+        content.append(f"Movements of the {title} file without a match: {len(movement_rows)}")
+        for number, movement_date, amount in movement_rows.rows():
+            content.append(f"> Row {number}: {movement_date.strftime(date_format)} {amount:+.2f}")
+
+        content.append("")
+
+    import pydoc
+
+    content_str = "\n".join(content)
+    pydoc.pager(content_str)
+
+
+def __match_rows(source_rows: MovementRows, reference_rows: MovementRows, date_window: int) -> RowDifferences:
+    """
+    Reference rows are indexed by date and amount, so that each source row is matched
+    with a single lookup, to the first reference row which is still available.
+    The rows left are then matched inside the date window, see "__match_rows_in_window".
+    """
+    source_keys = __get_row_keys(source_rows)
+    reference_keys = __get_row_keys(reference_rows)
+
+    # Rows with the same key are linked in a list, from the first one, so that
+    # each key only requires a single entry in the index.
+    first_references: Dict[int, int] = {}
+    next_references = [-1] * len(reference_keys)
+    for position in range(len(reference_keys) - 1, -1, -1):
+        key = reference_keys[position]
+        next_references[position] = first_references.get(key, -1)
+        first_references[key] = position
+
+    matched_references = bytearray(len(reference_keys))
+    unmatched_sources = []
+    for position, key in enumerate(source_keys):
+        reference_position = first_references.get(key, -1)
+        if reference_position < 0:
+            unmatched_sources.append(position)
+        else:
+            matched_references[reference_position] = 1
+            first_references[key] = next_references[reference_position]
+
+    unmatched_references = [position for position, matched in enumerate(matched_references) if not matched]
+
+    if date_window > 0 and len(unmatched_sources) > 0 and len(unmatched_references) > 0:
+        unmatched_sources, unmatched_references = __match_rows_in_window(
+            source_rows,
+            reference_rows,
+            unmatched_sources,
+            unmatched_references,
+            date_window
+        )
+
+    return RowDifferences(source_rows.take(unmatched_sources), reference_rows.take(unmatched_references))
+
+
+def __match_rows_in_window(
+        source_rows: MovementRows,
+        reference_rows: MovementRows,
+        unmatched_sources: List[int],
+        unmatched_references: List[int],
+        date_window: int
+) -> Tuple[List[int], List[int]]:
+    """
+    The rows of both files are sorted together by amount and then by date, so that each
+    row is next to the ones with the same amount and the nearest dates. A heap keeps the
+    neighbouring source and reference rows inside the date window, and the nearest ones
+    are matched first, the earliest ones on ties. Once two rows are matched, their
+    neighbours become next to each other, and they're pushed to the heap in turn.
+    :return: The positions of the source and reference rows still without a match, sorted.
+    """
+    import numpy as np
+
+    sources = __sort_by_amount_and_date(source_rows, unmatched_sources)
+    references = __sort_by_amount_and_date(reference_rows, unmatched_references)
+    all_references = np.concatenate((np.zeros(len(sources[0]), np.int8), np.ones(len(references[0]), np.int8)))
+    all_amounts = np.concatenate((sources[0], references[0]))
+    all_days = np.concatenate((sources[1], references[1])).astype(np.int64)
+    order = np.lexsort((all_references, all_days, all_amounts))
+    amounts, days = all_amounts[order].tolist(), all_days[order].tolist()
+    is_reference = all_references[order].tolist()
+
+    def get_pair(left: int, right: int) -> Optional[Tuple[int, int, int]]:
+        if left < 0 or right >= len(amounts) or is_reference[left] == is_reference[right]:
+            return None
+        distance = days[right] - days[left]
+        if amounts[left] != amounts[right] or distance > date_window:
+            return None
+        return distance, left, right
+
+    previous = list(range(-1, len(amounts) - 1))
+    following = list(range(1, len(amounts) + 1))
+    matched = bytearray(len(amounts))
+    heap = [pair for pair in (get_pair(index, index + 1) for index in range(len(amounts) - 1)) if pair is not None]
+    heapq.heapify(heap)
+    while len(heap) > 0:
+        _, left, right = heapq.heappop(heap)
+        if matched[left] or matched[right] or following[left] != right:
+            continue
+
+        matched[left] = matched[right] = 1
+        before, after = previous[left], following[right]
+        if before >= 0:
+            following[before] = after
+        if after < len(amounts):
+            previous[after] = before
+        pair = get_pair(before, after)
+        if pair is not None:
+            heapq.heappush(heap, pair)
+
+    unmatched = [
+        (reference, position)
+        for position, reference, is_matched in zip(
+            np.concatenate((sources[2], references[2]))[order].tolist(),
+            is_reference,
+            matched
+        )
+        if not is_matched
+    ]
+    return (
+        sorted(position for reference, position in unmatched if not reference),
+        sorted(position for reference, position in unmatched if reference)
+    )
+
+
+def __get_row_keys(movement_rows: MovementRows) -> List[int]:
+    """
+    The date and amount of each row are packed in a single integer, which is cheaper
+    to hash than a tuple. Day ordinals take less than 22 bits.
+    """
+    import numpy as np
+
+    days = np.frombuffer(movement_rows.days, dtype=np.int32).astype(np.int64)
+    amounts = np.frombuffer(movement_rows.amounts, dtype=np.int64)
+    return (amounts * (1 << 22) + days).tolist()
+
+
+def __sort_by_amount_and_date(
+        movement_rows: MovementRows,
+        positions: List[int]
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    :return: The amounts, days and positions of the rows at the given positions, sorted.
+    """
+    import numpy as np
+
+    selected_positions = np.array(positions, dtype=np.int64)
+    days = np.frombuffer(movement_rows.days, dtype=np.int32)[selected_positions]
+    amounts = np.frombuffer(movement_rows.amounts, dtype=np.int64)[selected_positions]
+    order = np.lexsort((selected_positions, days, amounts))
+    return amounts[order], days[order], selected_positions[order]
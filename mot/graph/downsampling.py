@@ -0,0 +1,76 @@
+import numpy as np
+
+from mot.types.graph_options import Downsampling
+from mot.types.period_series import Period, get_periods
+
+
+def resample(days: np.ndarray, period: Period) -> np.ndarray:
+    """
+    :param days: The sorted days of the series, as "datetime64[D]".
+    :return: The indexes of the last day of each period.
+    """
+    if period == "day" or len(days) == 0:
+        return np.arange(len(days))
+
+    periods = get_periods(days, period)
+    return np.append(np.flatnonzero(periods[1:] != periods[:-1]), len(days) - 1)
+
+
+def downsample(x: np.ndarray, y: np.ndarray, downsampling: Downsampling, max_points: int) -> np.ndarray:
+    """
+    :param x: The sorted x values, e.g. the days as "datetime64[D]".
+    :param y: The y values, e.g. the amounts.
+    :return: The sorted indexes of the points to plot, all of them if they're not more than "max_points".
+    """
+    if downsampling == "none" or len(x) <= max_points or max_points < 3:
+        return np.arange(len(x))
+
+    if downsampling == "minmax":
+        return downsample_min_max(y, max_points)
+    return downsample_lttb(x.astype(np.float64), y.astype(np.float64), max_points)
+
+
+def downsample_lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    The first and the last points are always kept, the other ones are split into
+    "max_points - 2" buckets, keeping one point for each bucket.
+    Each bucket is processed with array operations, so it only loops over the buckets.
+    """
+    bucket_edges = np.linspace(1, len(x) - 1, max_points - 1).astype(np.int64)
+    indexes = np.empty(max_points, dtype=np.int64)
+    indexes[0] = 0
+    indexes[-1] = len(x) - 1
+
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = bucket_edges[bucket], bucket_edges[bucket + 1]
+
+        # The average point of the next bucket, or the last point.
+        if bucket + 2 < len(bucket_edges):
+            next_start, next_end = end, bucket_edges[bucket + 2]
+        else:
+            next_start, next_end = len(x) - 1, len(x)
+        next_x = x[next_start:next_end].mean()
+        next_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        indexes[bucket + 1] = previous
+
+    return indexes
+
+
+def downsample_min_max(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Points are split into "(max_points - 2) / 2" buckets, keeping the lowest and the
+    highest point of each one, in their order. The first and the last points are always kept.
+    """
+    bucket_edges = np.linspace(0, len(y), (max_points - 2) // 2 + 1).astype(np.int64)
+    starts = bucket_edges[:-1]
+    lowest = np.array([start + np.argmin(y[start:end]) for start, end in zip(starts, bucket_edges[1:])])
+    highest = np.array([start + np.argmax(y[start:end]) for start, end in zip(starts, bucket_edges[1:])])
+
+    return np.unique(np.concatenate(([0, len(y) - 1], lowest, highest)))
@@ -0,0 +1,24 @@
+import os
+from pathlib import Path
+
+import plotly.graph_objects as go
+
+
+def write_graph(plot_graph: go.Figure, file_path: str) -> None:
+    """
+    Writes the graph to a file, without opening a browser, creating its directory if needed.
+    HTML files reference the plotly.js bundle, which is written only once in the same
+    directory, instead of inlining its few megabytes in each file.
+    :param file_path: E.g. /home/ciro23/Documents/money-over-time.html, or a ".json"
+           file to write the figure as Plotly JSON.
+    """
+    directory = os.path.dirname(file_path)
+    if directory != "":
+        os.makedirs(directory, exist_ok=True)
+
+    if file_path.endswith(".html"):
+        plot_graph.write_html(Path(file_path), include_plotlyjs="directory", auto_open=False)
+    elif file_path.endswith(".json"):
+        plot_graph.write_json(Path(file_path))
+    else:
+        raise ValueError(f"Unsupported graph file '{file_path}', use a \".html\" or \".json\" file.")
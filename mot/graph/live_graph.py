@@ -0,0 +1,92 @@
+import os
+
+import plotly.graph_objects as go
+from plotly.offline import get_plotlyjs
+
+from mot.reader.movements_cache import write_atomically
+
+LIVE_GRAPH_PAGE = "index.html"
+LIVE_GRAPH_VERSION = "version.js"
+LIVE_GRAPH_FIGURE = "figure.js"
+LIVE_GRAPH_POLLING_MILLISECONDS = 1000
+
+LIVE_GRAPH_PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>Money over time</title>
+    <script src="plotly.min.js"></script>
+</head>
+<body>
+<div id="graph" style="height: 95vh"></div>
+<script>
+    // Pages opened from the file system can't fetch files, but they can load scripts,
+    // so the graph is updated by loading again the scripts written by the program.
+    let shownVersion = null;
+
+    function loadScript(name, onDone) {
+        const script = document.createElement("script");
+        script.src = name + "?t=" + Date.now();
+        script.onload = script.onerror = () => {
+            script.remove();
+            onDone();
+        };
+        document.head.appendChild(script);
+    }
+
+    function poll() {
+        loadScript("%(version)s", () => setTimeout(poll, %(polling)d));
+    }
+
+    window.checkGraphVersion = (version) => {
+        if (version !== shownVersion) {
+            loadScript("%(figure)s", () => {});
+        }
+    };
+
+    window.updateGraph = (version, figure) => {
+        shownVersion = version;
+        Plotly.react("graph", figure.data, figure.layout);
+    };
+
+    poll();
+</script>
+</body>
+</html>
+"""
+
+
+def write_live_graph_page(directory: str) -> str:
+    """
+    Writes a page showing the graph of "update_live_graph", which is updated in place,
+    keeping the zoom, each time the graph changes.
+    :return: The path of the page, which can be opened in a browser.
+    """
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "plotly.min.js"), "w", encoding="utf-8") as file:
+        file.write(get_plotlyjs())
+
+    page = LIVE_GRAPH_PAGE_TEMPLATE % {
+        "version": LIVE_GRAPH_VERSION,
+        "figure": LIVE_GRAPH_FIGURE,
+        "polling": LIVE_GRAPH_POLLING_MILLISECONDS,
+    }
+    write_atomically(directory, LIVE_GRAPH_PAGE, page.encode("utf-8"))
+    return os.path.join(directory, LIVE_GRAPH_PAGE)
+
+
+def update_live_graph(plot_graph: go.Figure, directory: str, version: int) -> None:
+    """
+    The figure is written before its version, so that the page never loads an old figure
+    for a new version.
+    :param version: Must be different for each update, e.g. an increasing number.
+    """
+    # The zoom and the hidden traces are kept while the figure is replaced.
+    plot_graph.update_layout(uirevision="live")
+
+    write_atomically(
+        directory,
+        LIVE_GRAPH_FIGURE,
+        f"window.updateGraph({version}, {plot_graph.to_json()});".encode("utf-8")
+    )
+    write_atomically(directory, LIVE_GRAPH_VERSION, f"window.checkGraphVersion({version});".encode("utf-8"))
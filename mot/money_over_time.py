@@ -1,12 +1,29 @@
-from typing import Literal, Optional
-
-import pandas as pd
-import plotly.graph_objects as go
+import threading
+from array import array
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Dict, List, Literal, Mapping, Optional, Sequence, Tuple, Union
 
+from mot.reader.file_watcher import DEFAULT_WATCH_INTERVAL, get_optional_file_signatures, wait_for_changes
+from mot.reader.memory_cache import FileSignature
+from mot.reader.movements_cache import MovementsCache
 from mot.types.cell import Cell
 from mot.types.date_cell import DateCell
-from mot.types.movements import Movements
-from mot.reader.movements_manager import exclude_all_except, get_movements, include_all_except, round_and_sum_total
+from mot.types.filter_expression import FilterExpression
+from mot.types.graph_options import DEFAULT_MAX_POINTS, Downsampling
+from mot.types.movement_series import MovementSeries
+from mot.types.movements import AmountMode
+from mot.types.period_series import Period, PeriodSeries
+from mot.types.records_file import RecordsFile
+from mot.reader.movements_manager import Concurrency, Engine, cents_to_amounts, exclude_all_except, \
+    get_movements, get_movements_by_group, include_all_except, load_concurrently, merge_movements, \
+    round_amounts, round_and_sum_total, sum_total, update_total
+
+# Plotly is only imported when a graph is created.
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+MARKERS_MAX_POINTS = 500
+WEBGL_MIN_POINTS = 5000
 
 
 def get_money_over_time(
@@ -15,12 +32,20 @@ def get_money_over_time(
         date_cell: Optional[DateCell] = None,
         amount_label: Optional[str] = None,
         filtering_cell: Optional[Cell] = None,
-        filter_mode: Literal["in", "out"] = "in"
-) -> Movements:
+        filter_mode: Literal["in", "out"] = "in",
+        engine: Engine = "python",
+        cache: Optional[MovementsCache] = None,
+        incremental: bool = False,
+        workers: int = 1,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = (),
+        max_memory: Optional[int] = None
+) -> MovementSeries:
     """
-    Reads all the movements in the specified file and returns a dict
-    with the date of the movement as the key and the sum of the amount
-    of all movements, for that day, as the value.
+    Reads all the movements in the specified file and returns, for each day,
+    the total amount of all the movements up to that day, sorted by date.
+    The result can be used as a dict, with the days as the keys.
+    See "get_movements" for the arguments.
     """
     delimiter = "," if delimiter is None else delimiter
     date_cell = DateCell() if date_cell is None else date_cell
@@ -36,34 +61,401 @@ def get_money_over_time(
         date_cell,
         amount_label,
         filtering_cell,
-        filter_callback
+        filter_callback,
+        engine,
+        cache,
+        incremental,
+        workers,
+        amount_mode,
+        filters,
+        max_memory
+    )
+    money_over_time = round_and_sum_total(movements)
+
+    if amount_mode == "cents":
+        return cents_to_amounts(money_over_time)
+    return money_over_time
+
+
+def get_money_over_time_of_files(
+        records_files: Sequence[RecordsFile],
+        filtering_cell: Optional[Cell] = None,
+        filter_mode: Literal["in", "out"] = "in",
+        engine: Engine = "python",
+        cache: Optional[MovementsCache] = None,
+        incremental: bool = False,
+        workers: int = 1,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = (),
+        concurrency: Concurrency = "thread",
+        max_memory: Optional[int] = None
+) -> Tuple[MovementSeries, List[MovementSeries]]:
+    """
+    Like "get_money_over_time", but the movements of several records files, e.g. the
+    exports of different bank accounts, are added together.
+    The files are loaded concurrently (see "Concurrency"), then the movements of each
+    day, already sorted, are merged with a single pass, without combining their rows.
+    Filters are applied to all the files.
+    :param max_memory: The approximate number of bytes the vectorized engine can use to
+           load the records files, which share it when they're loaded at the same time.
+           See "get_movements".
+    :return: The total amount over time of all the files, and the one of each file,
+             in the same order.
+    """
+    movements_of_files = __load_movements_of_files(
+        records_files,
+        filtering_cell,
+        filter_mode,
+        engine,
+        cache,
+        incremental,
+        workers,
+        amount_mode,
+        filters,
+        concurrency,
+        max_memory
     )
-    return round_and_sum_total(movements)
 
+    money_over_time = round_and_sum_total(merge_movements(movements_of_files))
+    money_over_time_of_files = [round_and_sum_total(movements) for movements in movements_of_files]
+
+    if amount_mode == "cents":
+        return (
+            cents_to_amounts(money_over_time),
+            [cents_to_amounts(movements) for movements in money_over_time_of_files]
+        )
+    return money_over_time, money_over_time_of_files
+
+
+def get_money_over_time_by_group(
+        records_files: Sequence[RecordsFile],
+        group_label: str,
+        filtering_cell: Optional[Cell] = None,
+        filter_mode: Literal["in", "out"] = "in",
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = (),
+        concurrency: Concurrency = "thread"
+) -> Tuple[MovementSeries, Dict[str, MovementSeries]]:
+    """
+    Like "get_money_over_time_of_files", but the movements are also grouped by the value
+    of a column, e.g. the account or the category, parsing each file only once.
+    The groups with the same value in different files are added together.
+    :param group_label: The label of the column whose values the movements are grouped by.
+    :return: The total amount over time of all the groups, and the one of each group,
+             sorted by the value of the group.
+    """
+    filter_callback = exclude_all_except
+    if filter_mode == "out":
+        filter_callback = include_all_except
+
+    loaders = [
+        (
+            records_file.file_path,
+            partial(
+                get_movements_by_group,
+                records_file.file_path,
+                records_file.delimiter,
+                records_file.date_cell,
+                records_file.amount_label,
+                group_label,
+                filtering_cell,
+                filter_callback,
+                amount_mode,
+                filters
+            )
+        )
+        for records_file in records_files
+    ]
+    movements_of_groups: Dict[str, List[MovementSeries]] = {}
+    for movements_by_group in load_concurrently(concurrency, *loaders):
+        for group_value, movements in movements_by_group.items():
+            movements_of_groups.setdefault(group_value, []).append(movements)
+
+    money_over_time = round_and_sum_total(merge_movements([
+        movements for movements_of_group in movements_of_groups.values() for movements in movements_of_group
+    ]))
+    money_over_time_by_group = {
+        group_value: round_and_sum_total(merge_movements(movements_of_groups[group_value]))
+        for group_value in sorted(movements_of_groups)
+    }
 
-def show_graph(movements: Movements, date_format: str) -> None:
+    if amount_mode == "cents":
+        return (
+            cents_to_amounts(money_over_time),
+            {group_value: cents_to_amounts(movements) for group_value, movements in money_over_time_by_group.items()}
+        )
+    return money_over_time, money_over_time_by_group
+
+
+def watch_money_over_time_of_files(
+        records_files: Sequence[RecordsFile],
+        on_change: Callable[[MovementSeries, List[MovementSeries]], None],
+        filtering_cell: Optional[Cell] = None,
+        filter_mode: Literal["in", "out"] = "in",
+        engine: Engine = "python",
+        cache: Optional[MovementsCache] = None,
+        workers: int = 1,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = (),
+        concurrency: Concurrency = "thread",
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        stop: Optional[threading.Event] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        max_memory: Optional[int] = None
+) -> None:
+    """
+    Like "get_money_over_time_of_files", but the records files are watched, and the money
+    over time is calculated again each time any of them changes, until stopped.
+    With the cache, CSV files are parsed incrementally, so that only the appended rows
+    are parsed again, while edits to the existing rows cause the whole file to be parsed
+    again. The totals of the days before the first changed one are reused.
+    XLSX files are parsed again entirely.
+    :param on_change: Called with the total amount over time of all the files, and the
+           one of each file, once they're loaded and then after each change.
+    :param interval: Seconds between two checks of the files, see "wait_for_changes".
+    :param stop: When set, stops watching the files.
+    :param on_error: Called with the errors raised reading the records files, e.g. while
+           they're being edited, which are otherwise raised. The files are watched again
+           after an error.
+    """
+    file_paths = [records_file.file_path for records_file in records_files]
+    signatures: Optional[Tuple[Optional[FileSignature], ...]] = get_optional_file_signatures(file_paths)
+    previous: Optional[Tuple[List[MovementSeries], List[MovementSeries]]] = None
+    while signatures is not None:
+        try:
+            movements_of_files = list(__load_movements_of_files(
+                records_files,
+                filtering_cell,
+                filter_mode,
+                engine,
+                cache,
+                True,
+                workers,
+                amount_mode,
+                filters,
+                concurrency,
+                max_memory
+            ))
+        except (FileNotFoundError, ValueError) as e:
+            if on_error is None:
+                raise
+            on_error(e)
+        else:
+            movements_of_files.append(merge_movements(movements_of_files))
+            # The totals are kept without rounding, so that updating them many times gives
+            # the same result of summing the movements again.
+            if previous is None:
+                totals = [
+                    sum_total(MovementSeries(movements.days, movements.amounts[:]))
+                    for movements in movements_of_files
+                ]
+            else:
+                totals = [
+                    update_total(previous_movements, previous_total, movements)
+                    for previous_movements, previous_total, movements in zip(*previous, movements_of_files)
+                ]
+            previous = movements_of_files, totals
+
+            if amount_mode == "cents":
+                totals = [cents_to_amounts(total) for total in totals]
+            else:
+                totals = [round_amounts(MovementSeries(total.days, total.amounts[:])) for total in totals]
+            on_change(totals[-1], totals[:-1])
+
+        signatures = wait_for_changes(file_paths, signatures, interval, stop)
+
+
+def show_graph(
+        movements: MovementSeries,
+        traces: Optional[Mapping[str, MovementSeries]] = None,
+        downsampling: Downsampling = "lttb",
+        max_points: int = DEFAULT_MAX_POINTS,
+        resampling: Period = "day",
+        stacked: bool = False
+) -> None:
     """
     Plotly is used to display an interactive graph in the default installed browser.
+    See "create_graph" for the arguments.
+    """
+    create_graph(movements, traces, downsampling, max_points, resampling, stacked).show()
+
+
+def create_graph(
+        movements: MovementSeries,
+        traces: Optional[Mapping[str, MovementSeries]] = None,
+        downsampling: Downsampling = "lttb",
+        max_points: int = DEFAULT_MAX_POINTS,
+        resampling: Period = "day",
+        stacked: bool = False
+) -> "go.Figure":
+    """
+    Long histories are resampled and downsampled before being plotted, so that the
+    graph stays responsive regardless of how many days they contain.
+    :param traces: Additional series to plot, by their name, e.g. the money over time of
+           each records file, shown along with the total.
+    :param downsampling: How series are reduced to "max_points", see "Downsampling".
+    :param max_points: The maximum number of points plotted for each series.
+    :param resampling: The period of each point, see "Period". Each point is the balance
+           at the end of its period, whose net amount, and the sums of its net-positive and
+           net-negative days, are shown on hover.
+    :param stacked: The traces are stacked on each other, instead of being overlaid, e.g.
+           the money over time of each group, which add up to the total. Each trace
+           keeps its last total on the days of the total without its movements.
     """
-    data_frame = pd.DataFrame(list(movements.items()), columns=['date', 'value'])
-    data_frame['date'] = pd.to_datetime(data_frame['date'], format=date_format)
+    import plotly.graph_objects as go
 
-    data_frame = data_frame.sort_values(by='date')
     plot_graph = go.Figure()
     plot_graph.add_trace(
-        go.Scatter(
-            x=data_frame['date'],
-            y=data_frame['value'],
-            mode='lines+markers',
-            name='Value',
-            hovertemplate='<b>Date</b>: %{x}<br><b>Amount</b>: %{y}<extra></extra>',
-        )
+        __create_trace('Value' if traces is None else 'Total', movements, downsampling, max_points, resampling)
     )
+    for name, trace_movements in ({} if traces is None else traces).items():
+        if stacked:
+            plot_graph.add_trace(__create_trace(
+                name,
+                __align_totals(trace_movements, movements),
+                downsampling,
+                max_points,
+                resampling,
+                "traces",
+                movements
+            ))
+        else:
+            plot_graph.add_trace(__create_trace(name, trace_movements, downsampling, max_points, resampling))
+
     plot_graph.update_layout(
         title='Money over time',
         xaxis_title='Date',
         yaxis_title='Amount',
         hovermode='x unified',
     )
+    return plot_graph
+
+
+def __load_movements_of_files(
+        records_files: Sequence[RecordsFile],
+        filtering_cell: Optional[Cell],
+        filter_mode: Literal["in", "out"],
+        engine: Engine,
+        cache: Optional[MovementsCache],
+        incremental: bool,
+        workers: int,
+        amount_mode: AmountMode,
+        filters: Sequence[FilterExpression],
+        concurrency: Concurrency,
+        max_memory: Optional[int]
+) -> Tuple[MovementSeries, ...]:
+    filter_callback = exclude_all_except
+    if filter_mode == "out":
+        filter_callback = include_all_except
+
+    # Files loaded at the same time share the memory budget.
+    if max_memory is not None and concurrency != "none":
+        max_memory //= max(len(records_files), 1)
+
+    loaders = [
+        (
+            records_file.file_path,
+            partial(
+                get_movements,
+                records_file.file_path,
+                records_file.delimiter,
+                records_file.date_cell,
+                records_file.amount_label,
+                filtering_cell,
+                filter_callback,
+                engine,
+                cache,
+                incremental,
+                workers,
+                amount_mode,
+                filters,
+                max_memory
+            )
+        )
+        for records_file in records_files
+    ]
+    return load_concurrently(concurrency, *loaders)
+
+
+def __create_trace(
+        name: str,
+        movements: MovementSeries,
+        downsampling: Downsampling,
+        max_points: int,
+        resampling: Period,
+        stack_group: Optional[str] = None,
+        reference: Optional[MovementSeries] = None
+) -> Union["go.Scatter", "go.Scattergl"]:
+    """
+    Markers are only shown when there are few points, and large series are drawn with
+    WebGL, unless they're stacked.
+    :param stack_group: The traces with the same stack group are stacked on each other.
+    :param reference: A series with the same days, whose downsampled points are plotted
+           instead, so that stacked traces keep the same days.
+    """
+    import numpy as np
+    import plotly.graph_objects as go
+
+    from mot.graph.downsampling import downsample, resample
+
+    dates, values = movements.to_numpy()
+    indexes = resample(dates, resampling)
+    dates, values = dates[indexes], values[indexes]
+    hover_template = '<b>Date</b>: %{x}<br><b>Amount</b>: %{y}<extra></extra>'
+    custom_data = None
+    if resampling != "day":
+        # The net amount of each day is the difference between consecutive totals, which
+        # are rounded to cents, so the differences are exact once rounded. The movements
+        # of the same day, even of different records files, offset each other.
+        daily_amounts = np.round(np.diff(movements.to_numpy()[1], prepend=0), 2)
+        periods = PeriodSeries.from_movements(
+            MovementSeries(movements.days, array("d", daily_amounts.astype(np.float64).tobytes())),
+            resampling
+        )
+        custom_data = np.column_stack((periods.positive_nets, periods.negative_nets, periods.nets))
+        hover_template = ('<b>Date</b>: %{x}<br><b>Amount</b>: %{y}'
+                          '<br><b>Net-positive days</b>: %{customdata[0]}'
+                          '<br><b>Net-negative days</b>: %{customdata[1]}'
+                          '<br><b>Net</b>: %{customdata[2]}<extra></extra>')
+
+    if reference is None:
+        indexes = downsample(dates, values, downsampling, max_points)
+    else:
+        reference_dates, reference_values = reference.to_numpy()
+        indexes = downsample(
+            dates,
+            reference_values[resample(reference_dates, resampling)],
+            downsampling,
+            max_points
+        )
+    dates, values = dates[indexes], values[indexes]
+
+    arguments = {
+        "x": dates,
+        "y": values,
+        "customdata": None if custom_data is None else custom_data[indexes],
+        "mode": 'lines+markers' if len(dates) <= MARKERS_MAX_POINTS else 'lines',
+        "name": name,
+        "hovertemplate": hover_template,
+    }
+    # WebGL traces can't be stacked.
+    if stack_group is not None:
+        return go.Scatter(stackgroup=stack_group, **arguments)
+    if len(dates) > WEBGL_MIN_POINTS:
+        return go.Scattergl(**arguments)
+    return go.Scatter(**arguments)
+
+
+def __align_totals(movements: MovementSeries, reference: MovementSeries) -> MovementSeries:
+    """
+    :param movements: The total amount over time, whose days are a subset of the reference ones.
+    :return: The total amount on each day of the reference, 0 before the first day of the movements.
+    """
+    import numpy as np
+
+    if len(movements) == 0:
+        return MovementSeries(reference.days, array("d", bytes(8 * len(reference))))
 
-    plot_graph.show()
+    positions = np.searchsorted(np.frombuffer(movements.days, dtype=np.int32), reference.days, side="right") - 1
+    totals = np.where(positions >= 0, movements.to_numpy()[1].astype(np.float64)[np.maximum(positions, 0)], 0)
+    return MovementSeries(reference.days, array("d", totals.tobytes()))
@@ -1,4 +1,9 @@
 import argparse
+import math
+from datetime import datetime
+
+from mot.reader.movement_filters import parse_filter_expression
+from mot.types.filter_expression import FilterExpression
 
 
 def parse_program_arguments() -> argparse.Namespace:
@@ -18,42 +23,161 @@ def parse_program_arguments() -> argparse.Namespace:
              " Useful to look for accounting errors."
     )
 
+    query_parser = subparsers.add_parser(
+        "query",
+        help="Reads movements from one or more records files (CSV or XLSX) and prints the"
+             " balance at some dates, and the net flow and the lowest and highest balances"
+             " over a range of dates."
+    )
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Runs a local server which keeps the parsed records files in memory, and"
+             " answers repeated queries of the money over time and of the differences"
+             " over time as JSON."
+    )
+
+    convert_parser = subparsers.add_parser(
+        "convert",
+        help="Converts a records file (CSV or XLSX) to a columnar ledger, a directory which"
+             " the other commands accept instead of the records file, and read much faster"
+             " without parsing it again."
+    )
+
     __configure_plot_command(plot_parser)
     __configure_diff_command(diff_parser)
+    __configure_query_command(query_parser)
+    __configure_serve_command(serve_parser)
+    __configure_convert_command(convert_parser)
 
     return parser.parse_args()
 
 
 def __configure_plot_command(parser) -> None:
+    __configure_records_files_arguments(parser)
+    parser.add_argument(
+        "--period", "--resample",
+        type=str,
+        choices=["day", "week", "month", "quarter", "year"],
+        default="day",
+        dest="period",
+        help="Plots a point for each day, or only the total at the end of each week, month,"
+             " quarter or year, showing the net amount of the period, and the sums of its"
+             " net-positive and net-negative days, on hover. These are not the gross inflow"
+             " and outflow of the period, since movements of the same day offset each other."
+             " Default is 'day'"
+    )
+    parser.add_argument(
+        "--downsampling",
+        type=str,
+        choices=["lttb", "minmax", "none"],
+        default="lttb",
+        help="How long histories are reduced to --max-points before being plotted: 'lttb'"
+             " keeps their visual shape, 'minmax' keeps the lowest and highest totals of"
+             " each group of days, 'none' plots every point. Default is 'lttb'"
+    )
+    parser.add_argument(
+        "--max-points",
+        type=int,
+        default=2000,
+        help="Maximum number of points plotted for each series, default 2000"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        help="Writes the graph to a \".html\" or \".json\" file instead of opening it in the"
+             " browser. HTML files share the plotly.js bundle, written once in their directory"
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Writes a separate graph for each records file, instead of adding them together."
+             " Requires --output, containing \"{name}\" which is replaced by the name of each"
+             " records file (and its parent directories, if other records files have the same"
+             " name), e.g. \"charts/{name}.html\""
+    )
+    parser.add_argument(
+        "--separate-traces",
+        action="store_true",
+        help="With several records files, plots the money over time of each of them, along"
+             " with the total"
+    )
+    parser.add_argument(
+        "--group-by",
+        type=str,
+        metavar="LABEL",
+        help="Plots the money over time of each value of a column, e.g. \"account\" or"
+             " \"category\", along with the total, parsing the records files only once. The"
+             " engine, the cache and --workers are ignored"
+    )
+    parser.add_argument(
+        "--group-mode",
+        type=str,
+        choices=["overlay", "stack"],
+        default="overlay",
+        help="With --group-by, use 'overlay' to draw the traces of the groups over each other,"
+             " or 'stack' to stack them, so that they add up to the total. Default is 'overlay'"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keeps watching the records files, and updates the graph in the same browser"
+             " page each time they're saved, or writes --output again. With the cache, only"
+             " the rows appended to CSV files are parsed again. Stop it with Ctrl+C"
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=1.0,
+        help="With --watch, seconds between two checks of the records files, which are"
+             " read again once they stay unchanged for a whole interval, default 1"
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Prints a more detailed error if something goes wrong while reading the file"
+    )
+
+
+def __configure_records_files_arguments(parser) -> None:
+    """
+    The arguments of the commands reading the movements of one or more records files.
+    """
     parser.add_argument(
         "-f", "--file",
         type=str,
+        action="append",
         required=True,
-        help="Path of CSV or XLSX (records file) containing all transactions"
+        help="Path of CSV or XLSX (records file) containing all transactions, or of a"
+             " columnar ledger created by 'convert'. Can be repeated to add together the"
+             " movements of several records files"
     )
     parser.add_argument(
         "-d", "--delimiter",
         type=str,
-        nargs="?",
-        help="Delimiter used to distinguish a cell from another, default \",\""
+        action="append",
+        help="Delimiter used to distinguish a cell from another, default \",\". With"
+             " several records files, it can be repeated once for each of them"
     )
     parser.add_argument(
         "--date-format",
         type=str,
-        nargs="?",
-        help="Date format used in the records file, default \"%%d/%%m/%%Y\""
+        action="append",
+        help="Date format used in the records file, default \"%%d/%%m/%%Y\". With several"
+             " records files, it can be repeated once for each of them"
     )
     parser.add_argument(
         "--date-label",
         type=str,
-        nargs="?",
-        help="Date label used in the records file, default \"date\""
+        action="append",
+        help="Date label used in the records file, default \"date\". With several records"
+             " files, it can be repeated once for each of them"
     )
     parser.add_argument(
         "--amount-label",
         type=str,
-        nargs="?",
-        help="Amount label used in the records file, default \"amount\""
+        action="append",
+        help="Amount label used in the records file, default \"amount\". With several"
+             " records files, it can be repeated once for each of them"
     )
     parser.add_argument(
         "--filter-label",
@@ -80,9 +204,77 @@ def __configure_plot_command(parser) -> None:
              " 'in'"
     )
     parser.add_argument(
-        "-v", "--verbose",
+        "--filter",
+        type=__parse_filter_expression,
+        action="append",
+        default=[],
+        help="Only consider the rows matching an expression made of a column label, an"
+             " operator and a value, e.g. \"account=cash,debit card\", \"amount<0\","
+             " \"date>=01/01/2024\" or \"description~^rent\". Operators are = and != (one of"
+             " the comma separated values), <, <=, >, >= (numbers and dates) and ~ and !~"
+             " (regular expressions). Can be repeated, rows must match all the expressions"
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        choices=["python", "vectorized"],
+        default="python",
+        help="Use 'python' to parse the records file row by row using a constant amount"
+             " of memory, or 'vectorized' to parse it with array operations, which is"
+             " much faster on large records files. Default is 'python'"
+    )
+    parser.add_argument(
+        "--no-cache",
         action="store_true",
-        help="Prints a more detailed error if something goes wrong while reading the file"
+        help="Always parse the records file, instead of reusing the movements cached by"
+             " previous runs when it has not changed"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        nargs="?",
+        help="Directory where parsed movements are cached, default \"~/.cache/mot\""
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="The records file is expected to only grow by appending rows at its end, so only"
+             " the rows appended since the previous run are parsed. Edits to the existing"
+             " rows are detected and cause the whole file to be parsed again. Only supported"
+             " by CSV files, ignored with --no-cache"
+    )
+    parser.add_argument(
+        "--amount-mode",
+        type=str,
+        choices=["float", "cents"],
+        default="float",
+        help="Use 'cents' to parse amounts as integer cents, whose sums are exact,"
+             " or 'float' to parse them as floats. Default is 'float'"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse a large CSV records file with the 'python'"
+             " engine, default 1"
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=__parse_size,
+        metavar="SIZE",
+        help="Approximate memory the 'vectorized' engine can use to load the records files,"
+             " e.g. \"512M\" or \"2G\". Larger records files are read in chunks, keeping only"
+             " the sums of each day, and at least about 2M are needed for each records file"
+             " loaded at the same time. The whole files are loaded by default"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=str,
+        choices=["none", "thread", "process"],
+        default="thread",
+        help="Use 'thread' or 'process' to load several records files at the same time, in"
+             " multiple threads or processes, or 'none' to load them one after the other."
+             " Processes are faster with the 'python' engine, default is 'thread'"
     )
 
 
@@ -173,8 +365,269 @@ def __configure_diff_command(parser) -> None:
         help="Amount label used in the reference records file, default \"amount\""
     )
 
+    parser.add_argument(
+        "--filter",
+        type=__parse_filter_expression,
+        action="append",
+        default=[],
+        help="Only consider the rows of the source records file matching an expression made"
+             " of a column label, an operator and a value, see the same argument of the"
+             " 'plot' command. Can be repeated, rows must match all the expressions"
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        choices=["python", "vectorized"],
+        default="python",
+        help="Use 'python' to parse the records files row by row using a constant amount"
+             " of memory, or 'vectorized' to parse them with array operations, which is"
+             " much faster on large records files. Default is 'python'"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always parse the records files, instead of reusing the movements cached by"
+             " previous runs when they have not changed"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        nargs="?",
+        help="Directory where parsed movements are cached, default \"~/.cache/mot\""
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="The records files are expected to only grow by appending rows at their end, so only"
+             " the rows appended since the previous run are parsed. Edits to the existing"
+             " rows are detected and cause the whole file to be parsed again. Only supported"
+             " by CSV files, ignored with --no-cache"
+    )
+    parser.add_argument(
+        "--amount-mode",
+        type=str,
+        choices=["float", "cents"],
+        default="float",
+        help="Use 'cents' to parse amounts as integer cents, whose sums are exact and never"
+             " cause differences due to rounding errors,"
+             " or 'float' to parse them as floats. Default is 'float'"
+    )
+    parser.add_argument(
+        "--granularity",
+        type=str,
+        choices=["day", "row"],
+        default="day",
+        help="Use 'day' to compare the sum of the amounts of each day, or 'row' to match each"
+             " movement of the source records file to one of the reference records file, by"
+             " date and amount, and report the movements without a match. The engine, the"
+             " cache and the amount mode are ignored with 'row'. Default is 'day'"
+    )
+    parser.add_argument(
+        "--period",
+        type=str,
+        choices=["day", "week", "month", "quarter", "year"],
+        default="day",
+        help="With --granularity 'day', compares the net amounts of each week, month, quarter"
+             " or year instead of the ones of each day, so that movements registered a few"
+             " days later are only reported across the end of a period. Default is 'day'"
+    )
+    parser.add_argument(
+        "--date-window",
+        type=int,
+        default=0,
+        help="With --granularity 'row', movements are also matched to the ones with the same"
+             " amount up to this number of days before or after them, the nearest ones first,"
+             " default 0"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0,
+        help="Days whose source and reference amounts differ by up to this amount are not"
+             " reported as differences, default 0"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to parse large CSV records files with the 'python'"
+             " engine, default 1"
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=__parse_size,
+        metavar="SIZE",
+        help="Approximate memory the 'vectorized' engine can use to load the records files,"
+             " e.g. \"512M\" or \"2G\". Larger records files are read in chunks, keeping only"
+             " the sums of each day, and at least about 2M are needed for each records file"
+             " loaded at the same time. The whole files are loaded by default"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=str,
+        choices=["none", "thread", "process"],
+        default="thread",
+        help="Use 'thread' or 'process' to load the source and reference records files"
+             " at the same time, in two threads or processes, or 'none' to load them one"
+             " after the other. Processes are faster with the 'python' engine, default"
+             " is 'thread'"
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Prints a more detailed error if something goes wrong while reading the files"
+    )
+
+
+def __configure_query_command(parser) -> None:
+    __configure_records_files_arguments(parser)
+    parser.add_argument(
+        "--at",
+        type=__parse_iso_date,
+        metavar="DATE",
+        action="append",
+        default=[],
+        help="Prints the balance at the end of a day, in the \"YYYY-MM-DD\" format. Can be"
+             " repeated"
+    )
+    parser.add_argument(
+        "--from",
+        type=__parse_iso_date,
+        metavar="DATE",
+        dest="start",
+        help="First day of the range whose net flow and lowest and highest balances are"
+             " printed, in the \"YYYY-MM-DD\" format. Default is the first day with movements"
+    )
+    parser.add_argument(
+        "--to",
+        type=__parse_iso_date,
+        metavar="DATE",
+        dest="end",
+        help="Last day of the range, in the \"YYYY-MM-DD\" format. Default is the last day"
+             " with movements"
+    )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
         help="Prints a more detailed error if something goes wrong while reading the files"
     )
+
+
+def __configure_serve_command(parser) -> None:
+    parser.add_argument(
+        "--host",
+        type=str,
+        default="127.0.0.1",
+        help="Address the server listens on, default \"127.0.0.1\""
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8421,
+        help="Port the server listens on, default 8421"
+    )
+    parser.add_argument(
+        "--socket",
+        type=str,
+        help="Path of a Unix socket to listen on, instead of the host and port"
+    )
+    parser.add_argument(
+        "--max-entries",
+        type=int,
+        default=128,
+        help="Maximum number of parsed records files kept in memory, for each combination of"
+             " parsing arguments, the least recently used ones are discarded first, default 128"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always parse the records files which aren't in memory, instead of reusing"
+             " the movements cached on disk by previous runs when they have not changed"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        nargs="?",
+        help="Directory where parsed movements are cached, default \"~/.cache/mot\""
+    )
+
+
+def __configure_convert_command(parser) -> None:
+    parser.add_argument(
+        "-f", "--file",
+        type=str,
+        required=True,
+        help="Path of CSV or XLSX (records file) containing all transactions"
+    )
+    parser.add_argument(
+        "-o", "--output",
+        type=str,
+        help="Directory of the columnar ledger, which is replaced if it already contains"
+             " one. Default is the path of the records file, with the \".mot\" extension"
+    )
+    parser.add_argument(
+        "-d", "--delimiter",
+        type=str,
+        nargs="?",
+        help="Delimiter used to distinguish a cell from another, default \",\""
+    )
+    parser.add_argument(
+        "--date-format",
+        type=str,
+        nargs="?",
+        help="Date format used in the records file, default \"%%d/%%m/%%Y\""
+    )
+    parser.add_argument(
+        "--date-label",
+        type=str,
+        nargs="?",
+        help="Date label used in the records file, default \"date\""
+    )
+    parser.add_argument(
+        "--amount-label",
+        type=str,
+        nargs="?",
+        help="Amount label used in the records file, default \"amount\""
+    )
+    parser.add_argument(
+        "--column",
+        type=str,
+        action="append",
+        help="Label of another column to store, which the converted ledger can be filtered"
+             " on. Can be repeated, all the columns are stored by default"
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Prints a more detailed error if something goes wrong while reading the file"
+    )
+
+
+def __parse_filter_expression(expression: str) -> FilterExpression:
+    try:
+        return parse_filter_expression(expression)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def __parse_size(size: str) -> int:
+    """
+    :param size: A number of bytes, optionally followed by K, M or G, e.g. "512M".
+    """
+    multipliers = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+    try:
+        multiplier = multipliers.get(size[-1:].upper(), 1)
+        value = float(size[:-1] if size[-1:].upper() in multipliers else size) * multiplier
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid size '{size}', expected e.g. \"512M\" or \"2G\".")
+
+    if not math.isfinite(value) or value <= 0:
+        raise argparse.ArgumentTypeError(f"Invalid size '{size}', it must be a positive number.")
+    return int(value)
+
+
+def __parse_iso_date(date_str: str) -> datetime:
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date '{date_str}', expected the \"YYYY-MM-DD\" format.")
@@ -0,0 +1,388 @@
+import json
+import os
+import uuid
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence
+
+import numpy as np
+
+from mot.reader.date_parser import get_date_parser
+from mot.reader.movement_filters import COMPARISON_OPERATORS, compile_filters, get_comparison_bound
+from mot.reader.movements_cache import write_atomically
+from mot.reader.movements_parser import COLUMNAR_LEDGER_METADATA, get_index_of_cell, is_columnar_ledger, \
+    read_rows_of_text_file, read_rows_of_xlsx
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+from mot.types.filter_expression import FilterExpression
+from mot.types.movement_rows import MovementRows
+from mot.types.movement_series import MovementSeries
+from mot.types.movements import AmountMode
+
+COLUMNAR_LEDGER_FORMAT = "mot-columnar-ledger"
+COLUMNAR_LEDGER_VERSION = 2
+
+ColumnType = Literal["date", "amount", "dictionary"]
+"""
+How a column of a columnar ledger is stored:
+    - date: the day of each row, as int32 ordinals.
+    - amount: the amount of each row, as float64.
+    - dictionary: the distinct values of the column, as strings in a JSON file, and the
+      position of the value of each row, as int32 codes.
+"""
+
+
+def convert_records_file(
+        file_path: str,
+        delimiter: str,
+        directory: str,
+        date_cell: DateCell,
+        amount_label: str,
+        labels: Optional[Sequence[str]] = None
+) -> int:
+    """
+    Parses a records file once, and writes its columns to a directory, as NPY files which
+    are later loaded by memory mapping them, without parsing any text.
+    Each conversion writes its columns to new files, and the metadata pointing to them is
+    replaced last, so that a partially written ledger is never read, even when converting
+    into an existing ledger while it's being read. The files of the previous conversion
+    are deleted afterwards.
+    :param file_path: E.g. /home/ciro23/Documents/bank-movements.xlsx
+    :param delimiter: CSV cells delimiter (usually "," or ";").
+    :param directory: The directory of the columnar ledger, e.g. /home/ciro23/Documents/bank.mot
+    :param labels: The labels of the other columns to store, e.g. the ones used to filter
+           the movements. All the columns are stored by default.
+    :return: The number of converted rows.
+    """
+    if os.path.exists(directory) and not is_columnar_ledger(directory):
+        if not os.path.isdir(directory) or len(os.listdir(directory)) > 0:
+            raise ValueError(f"The path '{directory}' already exists, and it's not a columnar ledger.")
+
+    if file_path.endswith(".xlsx"):
+        rows: Iterator[List[Any]] = read_rows_of_xlsx(file_path, True)
+    else:
+        rows = read_rows_of_text_file(file_path, delimiter, numbered=True)
+
+    try:
+        # The last cell is the number of the line of the row.
+        column_headers = [str(cell) for cell in next(rows)[:-1]]
+    except StopIteration:
+        raise ValueError("The records file is empty.")
+
+    date_index = get_index_of_cell(date_cell.label, column_headers)
+    amount_index = get_index_of_cell(amount_label, column_headers)
+    if labels is None:
+        dictionary_indexes = [
+            index for index in range(len(column_headers)) if index not in (date_index, amount_index)
+        ]
+    else:
+        dictionary_indexes = [get_index_of_cell(label, column_headers) for label in labels]
+
+    parse_date = get_date_parser(date_cell.date_format)
+    lines = array("q")
+    days = array("i")
+    amounts = array("d")
+    codes: List["array[int]"] = [array("i") for _ in dictionary_indexes]
+    dictionaries: List[Dict[str, int]] = [{} for _ in dictionary_indexes]
+    for columns in rows:
+        try:
+            date_value = columns[date_index]
+            days.append((date_value if isinstance(date_value, datetime) else parse_date(date_value)).toordinal())
+            amounts.append(float(columns[amount_index]))
+            for column_codes, dictionary, index in zip(codes, dictionaries, dictionary_indexes):
+                value = str(columns[index])
+                code = dictionary.get(value)
+                if code is None:
+                    code = dictionary[value] = len(dictionary)
+                column_codes.append(code)
+        except (IndexError, ValueError) as e:
+            raise ValueError(f"Could not convert the row at line {columns[-1]}: {e}")
+        lines.append(columns[-1])
+
+    os.makedirs(directory, exist_ok=True)
+    # The files of each conversion have a distinct prefix, so that the ones referenced
+    # by the current metadata are never overwritten.
+    prefix = uuid.uuid4().hex[:12]
+    metadata_columns: List[Dict[str, Any]] = [
+        __write_column(
+            directory,
+            f"{prefix}-0",
+            column_headers[date_index],
+            "date",
+            np.frombuffer(days, dtype=np.int32)
+        ),
+        __write_column(
+            directory,
+            f"{prefix}-1",
+            column_headers[amount_index],
+            "amount",
+            np.frombuffer(amounts, dtype=np.float64)
+        ),
+    ]
+    for position, (index, column_codes, dictionary) in enumerate(zip(dictionary_indexes, codes, dictionaries), 2):
+        column = __write_column(
+            directory,
+            f"{prefix}-{position}",
+            column_headers[index],
+            "dictionary",
+            np.frombuffer(column_codes, dtype=np.int32)
+        )
+        column["values"] = f"{prefix}-{position}.json"
+        write_atomically(directory, column["values"], json.dumps(list(dictionary)).encode("utf-8"))
+        metadata_columns.append(column)
+
+    metadata = {
+        "format": COLUMNAR_LEDGER_FORMAT,
+        "version": COLUMNAR_LEDGER_VERSION,
+        "rows": len(days),
+        "lines": __save_array(directory, f"{prefix}-lines", np.frombuffer(lines, dtype=np.int64)),
+        "columns": metadata_columns,
+    }
+    write_atomically(directory, COLUMNAR_LEDGER_METADATA, json.dumps(metadata, indent=2).encode("utf-8"))
+    __delete_stale_files(directory, metadata)
+    return len(days)
+
+
+def read_columnar_movements(
+        directory: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell] = None,
+        filter_mode: Optional[Literal["in", "out"]] = None,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = ()
+) -> MovementSeries:
+    """
+    Only the columns of the date, the amount and the filters are loaded, by memory mapping
+    them, then the movements of each day are summed with array operations.
+    :param filter_mode: Whether only the rows matching the filtering cell are kept ("in"),
+           or all the others ("out"). The filtering cell is ignored if not specified.
+    :return: The sum of the amounts of the movements, for each day, sorted by date,
+             not rounded.
+    """
+    columns = __read_metadata(directory)["columns"]
+    days = __load_column(directory, columns, date_cell.label, "date")
+    amounts = __load_column(directory, columns, amount_label, "amount")
+
+    mask = __get_mask(directory, columns, date_cell, amount_label, filtering_cell, filter_mode, filters)
+    if mask is not None:
+        days = days[mask]
+        amounts = amounts[mask]
+    if len(days) == 0:
+        return MovementSeries(array("i"), array("q" if amount_mode == "cents" else "d"))
+
+    # Ledgers span few days compared to their rows, so the rows are summed by their
+    # offset from the first day, without sorting them.
+    first_day = int(days.min())
+    offsets = days - first_day
+    counts = np.bincount(offsets)
+    present = np.flatnonzero(counts)
+    unique_days = (present + first_day).astype(np.int32)
+    if amount_mode == "cents":
+        cents = np.rint(amounts * 100).astype(np.int64)
+        sums = np.zeros(len(counts), dtype=np.int64)
+        np.add.at(sums, offsets, cents)
+        return MovementSeries(array("i", unique_days.tobytes()), array("q", sums[present].tobytes()))
+
+    sums = np.bincount(offsets, weights=amounts)
+    return MovementSeries(array("i", unique_days.tobytes()), array("d", sums[present].tobytes()))
+
+
+def read_columnar_movements_by_group(
+        directory: str,
+        date_cell: DateCell,
+        amount_label: str,
+        group_label: str,
+        filtering_cell: Optional[Cell] = None,
+        filter_mode: Optional[Literal["in", "out"]] = None,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = ()
+) -> Dict[str, MovementSeries]:
+    """
+    Like "read_columnar_movements", but the movements are summed by the value of a
+    dictionary column and by day. The codes of the column are combined with the days
+    into a single key, so all the groups are summed at once.
+    :return: The movements of each group, by the value of the group, not rounded.
+    """
+    columns = __read_metadata(directory)["columns"]
+    days = __load_column(directory, columns, date_cell.label, "date")
+    amounts = __load_column(directory, columns, amount_label, "amount")
+    codes = __load_column(directory, columns, group_label, "dictionary")
+    group_values = __load_dictionary(directory, __find_column(columns, group_label))
+
+    mask = __get_mask(directory, columns, date_cell, amount_label, filtering_cell, filter_mode, filters)
+    if mask is not None:
+        days, amounts, codes = days[mask], amounts[mask], codes[mask]
+    if len(days) == 0:
+        return {}
+
+    first_day = int(days.min())
+    span = int(days.max()) - first_day + 1
+    keys, positions = np.unique(codes.astype(np.int64) * span + (days - first_day), return_inverse=True)
+    if amount_mode == "cents":
+        sums = np.zeros(len(keys), dtype=np.int64)
+        np.add.at(sums, positions, np.rint(amounts * 100).astype(np.int64))
+    else:
+        sums = np.bincount(positions, weights=amounts)
+
+    # Keys are sorted by code and then by day, so the days of each group are contiguous.
+    group_codes = keys // span
+    unique_days = (keys % span + first_day).astype(np.int32)
+    boundaries = np.concatenate((np.flatnonzero(group_codes[1:] != group_codes[:-1]) + 1, [len(keys)]))
+    movements_by_group = {}
+    start = 0
+    for end in boundaries.tolist():
+        movements_by_group[group_values[int(group_codes[start])]] = MovementSeries(
+            array("i", unique_days[start:end].tobytes()),
+            array("q" if amount_mode == "cents" else "d", sums[start:end].tobytes())
+        )
+        start = end
+
+    return movements_by_group
+
+
+def read_columnar_movement_rows(
+        directory: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell] = None,
+        filter_mode: Optional[Literal["in", "out"]] = None,
+        filters: Sequence[FilterExpression] = ()
+) -> MovementRows:
+    """
+    Like "read_columnar_movements", but each movement is kept on its own, with the line
+    its row starts at in the converted records file, and its amount in integer cents.
+    """
+    metadata = __read_metadata(directory)
+    columns = metadata["columns"]
+    lines = np.load(os.path.join(directory, metadata["lines"]), mmap_mode="r")
+    days = __load_column(directory, columns, date_cell.label, "date")
+    amounts = __load_column(directory, columns, amount_label, "amount")
+
+    mask = __get_mask(directory, columns, date_cell, amount_label, filtering_cell, filter_mode, filters)
+    positions = np.arange(len(days), dtype=np.int64) if mask is None else np.flatnonzero(mask).astype(np.int64)
+
+    movement_rows = MovementRows()
+    movement_rows.numbers = array("q", np.ascontiguousarray(lines[positions], dtype=np.int64).tobytes())
+    movement_rows.days = array("i", np.ascontiguousarray(days[positions], dtype=np.int32).tobytes())
+    movement_rows.amounts = array("q", np.rint(amounts[positions] * 100).astype(np.int64).tobytes())
+    return movement_rows
+
+
+def __write_column(
+        directory: str,
+        name: str,
+        label: str,
+        column_type: ColumnType,
+        values: np.ndarray
+) -> Dict[str, Any]:
+    return {"label": label, "type": column_type, "file": __save_array(directory, name, values)}
+
+
+def __save_array(directory: str, name: str, values: np.ndarray) -> str:
+    """
+    :return: The name of the NPY file.
+    """
+    file_name = f"{name}.npy"
+    temporary_path = os.path.join(directory, f"{name}.tmp.npy")
+    np.save(temporary_path, values)
+    os.replace(temporary_path, os.path.join(directory, file_name))
+    return file_name
+
+
+def __delete_stale_files(directory: str, metadata: Dict[str, Any]) -> None:
+    """
+    Deletes the column files which aren't referenced by the metadata, written by previous
+    conversions or left by interrupted ones. Readers which already loaded them keep their
+    memory mapping.
+    """
+    referenced = {COLUMNAR_LEDGER_METADATA, metadata["lines"]}
+    for column in metadata["columns"]:
+        referenced.add(column["file"])
+        if "values" in column:
+            referenced.add(column["values"])
+
+    for file_name in os.listdir(directory):
+        if file_name not in referenced and file_name.endswith((".npy", ".json", ".tmp")):
+            try:
+                os.remove(os.path.join(directory, file_name))
+            except FileNotFoundError:
+                pass
+
+
+def __read_metadata(directory: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(directory, COLUMNAR_LEDGER_METADATA), "r", encoding="utf-8") as file:
+            metadata = json.load(file)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid columnar ledger '{directory}': {e}")
+
+    if metadata.get("format") != COLUMNAR_LEDGER_FORMAT or metadata.get("version") != COLUMNAR_LEDGER_VERSION:
+        raise ValueError(f"Unsupported columnar ledger '{directory}', convert the records file again.")
+
+    return metadata
+
+
+def __find_column(columns: List[Dict[str, Any]], label: str) -> Dict[str, Any]:
+    return columns[get_index_of_cell(label, [column["label"] for column in columns])]
+
+
+def __load_column(directory: str, columns: List[Dict[str, Any]], label: str, column_type: ColumnType) -> np.ndarray:
+    column = __find_column(columns, label)
+    if column["type"] != column_type:
+        raise ValueError(f"The column '{label}' of the columnar ledger doesn't contain the {column_type}.")
+
+    return np.load(os.path.join(directory, column["file"]), mmap_mode="r")
+
+
+def __load_dictionary(directory: str, column: Dict[str, Any]) -> List[str]:
+    with open(os.path.join(directory, column["values"]), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def __get_mask(
+        directory: str,
+        columns: List[Dict[str, Any]],
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell],
+        filter_mode: Optional[Literal["in", "out"]],
+        filters: Sequence[FilterExpression]
+) -> Optional[np.ndarray]:
+    """
+    Filters on the dictionary columns are evaluated once for each distinct value, then
+    the result of each row is looked up by its code.
+    """
+    mask = None
+    if filtering_cell is not None and filter_mode is not None:
+        codes = __load_column(directory, columns, filtering_cell.label, "dictionary")
+        value = filtering_cell.value.lower()
+        matches = np.array(
+            [dictionary_value.lower() == value for dictionary_value in
+             __load_dictionary(directory, __find_column(columns, filtering_cell.label))],
+            dtype=bool
+        )
+        mask = matches[codes] if filter_mode == "in" else ~matches[codes]
+
+    for expression in filters:
+        column = __find_column(columns, expression.label)
+        if column["type"] == "dictionary":
+            predicate = compile_filters([expression], [0], date_cell)
+            assert predicate is not None
+            matches = np.array(
+                [predicate([dictionary_value]) for dictionary_value in __load_dictionary(directory, column)],
+                dtype=bool
+            )
+            filter_mask = matches[__load_column(directory, columns, expression.label, "dictionary")]
+        elif expression.operator in COMPARISON_OPERATORS:
+            compare = COMPARISON_OPERATORS[expression.operator]
+            values = np.load(os.path.join(directory, column["file"]), mmap_mode="r")
+            bound = get_comparison_bound(expression, date_cell)
+            filter_mask = compare(values, bound.toordinal() if isinstance(bound, datetime) else bound)
+        else:
+            raise ValueError(f"The filter '{expression}' is not supported on the {column['type']} column of"
+                             " a columnar ledger, use a comparison operator.")
+
+        mask = filter_mask if mask is None else mask & filter_mask
+
+    return mask
@@ -0,0 +1,86 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+DateParser = Callable[[str], datetime]
+"""
+Parses a date string, raising ValueError if it doesn't match the date format.
+"""
+
+DATE_CACHE_SIZE = 16384
+"""
+Records files contain very few distinct dates compared to the number of rows,
+this is enough for about 45 years of daily movements.
+"""
+
+__DIRECTIVE_LENGTHS = {"Y": 4, "m": 2, "d": 2}
+__FORMAT_TOKEN = re.compile(r"%(.)|([^%])")
+
+
+@lru_cache(maxsize=32)
+def get_date_parser(date_format: str) -> DateParser:
+    """
+    Parsers are shared by all the callers using the same date format, each of them
+    memoizes the dates it has already parsed.
+    Date formats made only of zero padded days, months, 4-digit years and separators
+    (like "%d/%m/%Y", "%Y-%m-%d" or "%Y/%m/%d") are parsed by slicing the date string,
+    which is much faster than "datetime.strptime", used for all other formats and
+    for the dates not matching the fast path (e.g. not zero padded).
+    """
+    fast_parser = compile_fast_date_parser(date_format)
+
+    def parse_date(date_str: str) -> datetime:
+        if fast_parser is not None:
+            parsed_date = fast_parser(date_str)
+            if parsed_date is not None:
+                return parsed_date
+
+        return datetime.strptime(date_str, date_format)
+
+    return lru_cache(maxsize=DATE_CACHE_SIZE)(parse_date)
+
+
+def compile_fast_date_parser(date_format: str) -> Optional[Callable[[str], Optional[datetime]]]:
+    """
+    :return: A parser which slices the date string at fixed positions, returning None
+             when the string doesn't have the expected shape, or None if the date format
+             is not supported.
+    """
+    fields: List[Tuple[str, int, int]] = []
+    separators: List[Tuple[int, str]] = []
+    position = 0
+    for match in __FORMAT_TOKEN.finditer(date_format):
+        directive, literal = match.groups()
+        if literal is not None:
+            separators.append((position, literal))
+            position += 1
+        elif directive in __DIRECTIVE_LENGTHS and directive not in [field[0] for field in fields]:
+            fields.append((directive, position, position + __DIRECTIVE_LENGTHS[directive]))
+            position += __DIRECTIVE_LENGTHS[directive]
+        else:
+            return None
+
+    if sorted(field[0] for field in fields) != ["Y", "d", "m"]:
+        return None
+
+    length = position
+    slices = {directive: slice(start, end) for directive, start, end in fields}
+    year, month, day = slices["Y"], slices["m"], slices["d"]
+
+    def parse_fast(date_str: str) -> Optional[datetime]:
+        if len(date_str) != length:
+            return None
+
+        for separator_position, separator in separators:
+            if date_str[separator_position] != separator:
+                return None
+
+        digits = date_str[year] + date_str[month] + date_str[day]
+        if not digits.isdigit():
+            return None
+
+        # Out of range days and months raise ValueError, like "datetime.strptime".
+        return datetime(int(date_str[year]), int(date_str[month]), int(date_str[day]))
+
+    return parse_fast
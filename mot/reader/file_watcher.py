@@ -0,0 +1,50 @@
+import os
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+from mot.reader.memory_cache import FileSignature
+
+DEFAULT_WATCH_INTERVAL = 1.0
+
+
+def get_optional_file_signatures(file_paths: Sequence[str]) -> Tuple[Optional[FileSignature], ...]:
+    """
+    Like "get_file_signatures", but the signature of a missing file is None, since editors
+    often save a file by deleting it and writing it again.
+    """
+    signatures: List[Optional[FileSignature]] = []
+    for file_path in file_paths:
+        try:
+            stat = os.stat(file_path)
+            signatures.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signatures.append(None)
+
+    return tuple(signatures)
+
+
+def wait_for_changes(
+        file_paths: Sequence[str],
+        signatures: Tuple[Optional[FileSignature], ...],
+        interval: float = DEFAULT_WATCH_INTERVAL,
+        stop: Optional[threading.Event] = None
+) -> Optional[Tuple[Optional[FileSignature], ...]]:
+    """
+    Polls the records files until any of them changes, then waits until all of them
+    stay unchanged for a whole interval and exist, so that several saves in a short
+    time, or a file which is still being written, cause a single update.
+    :param signatures: The signatures of the files, see "get_optional_file_signatures".
+    :param interval: Seconds between two checks.
+    :param stop: When set, the function returns as soon as possible.
+    :return: The signatures of the changed files, None if stopped.
+    """
+    stop = threading.Event() if stop is None else stop
+    current_signatures = signatures
+    while not stop.wait(interval):
+        new_signatures = get_optional_file_signatures(file_paths)
+        if new_signatures == current_signatures and new_signatures != signatures and None not in new_signatures:
+            return new_signatures
+
+        current_signatures = new_signatures
+
+    return None
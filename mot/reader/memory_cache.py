@@ -0,0 +1,77 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_MEMORY_CACHE_MAX_ENTRIES = 128
+
+FileSignature = Tuple[int, int]
+"""
+The modification time, in nanoseconds, and the size of a records file.
+"""
+
+
+class MemoryCache(Generic[T]):
+    """
+    In-memory cache of the results computed from records files, for a long-running process.
+    Each entry stores the signature of the records files it was computed from, which
+    are checked with "os.stat" on every lookup: when any of them was modified, the entry
+    is discarded. The least recently used entries are evicted above the maximum number
+    of entries.
+    It can be used by several threads at the same time.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MEMORY_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.__entries: "OrderedDict[Hashable, Tuple[Tuple[FileSignature, ...], T]]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key: Hashable, file_paths: Sequence[str]) -> Optional[T]:
+        """
+        :return: The value stored with the key, None if missing or if any of the
+                 records files has changed since it was stored.
+        """
+        try:
+            signatures = get_file_signatures(file_paths)
+        except OSError:
+            return None
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] != signatures:
+                del self.__entries[key]
+                return None
+
+            self.__entries.move_to_end(key)
+            return entry[1]
+
+    def store(self, key: Hashable, signatures: Tuple[FileSignature, ...], value: T) -> None:
+        """
+        :param signatures: The signatures of the records files, see "get_file_signatures".
+               They must be taken before reading the files, so that a file modified
+               while it was read invalidates the entry.
+        """
+        with self.__lock:
+            self.__entries[key] = (signatures, value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+
+def get_file_signatures(file_paths: Sequence[str]) -> Tuple[FileSignature, ...]:
+    """
+    Raises FileNotFoundError if any file does not exist.
+    """
+    signatures = []
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        signatures.append((stat.st_mtime_ns, stat.st_size))
+
+    return tuple(signatures)
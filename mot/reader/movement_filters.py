@@ -0,0 +1,105 @@
+import operator
+import re
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, cast
+
+from mot.reader.date_parser import get_date_parser
+from mot.types.date_cell import DateCell
+from mot.types.filter_expression import FilterExpression, FilterOperator
+
+RowPredicate = Callable[[List[Any]], bool]
+"""
+Accepts the cells of a row and returns whether the row is kept.
+"""
+
+COMPARISON_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+FILTER_EXPRESSION_PATTERN = re.compile(r"^\s*(.+?)\s*(!=|<=|>=|!~|=|<|>|~)\s*(.*?)\s*$")
+
+
+def parse_filter_expression(expression: str) -> FilterExpression:
+    """
+    :param expression: E.g. "account=cash,debit card", "amount>=100" or "description~^rent".
+    """
+    match = FILTER_EXPRESSION_PATTERN.match(expression)
+    if match is None:
+        raise ValueError(f"Invalid filter '{expression}', expected a column label, an operator"
+                         " (=, !=, <, <=, >, >=, ~, !~) and a value.")
+
+    label, filter_operator, value = match.groups()
+    return FilterExpression(label, cast(FilterOperator, filter_operator), value)
+
+
+def compile_filters(
+        filters: Sequence[FilterExpression],
+        indexes: Sequence[int],
+        date_cell: DateCell
+) -> Optional[RowPredicate]:
+    """
+    The filters are compiled once, after reading the header of the records file, into a
+    single predicate which is evaluated on the cells of each row while they're parsed.
+    Raises ValueError if a filter has an invalid value.
+    :param indexes: The index of the cell used by each filter.
+    :return: A predicate keeping the rows matching all the filters, None if there are no filters.
+    """
+    predicates = [
+        __compile_filter(expression, index, date_cell)
+        for expression, index in zip(filters, indexes)
+    ]
+
+    if len(predicates) == 0:
+        return None
+    if len(predicates) == 1:
+        return predicates[0]
+
+    return lambda columns: all(predicate(columns) for predicate in predicates)
+
+
+def get_comparison_bound(expression: FilterExpression, date_cell: DateCell) -> Any:
+    """
+    :return: The value of a comparison, as a date if the filter uses the date column,
+             otherwise as a number.
+    """
+    try:
+        if expression.label.lower() == date_cell.label.lower():
+            return get_date_parser(date_cell.date_format)(expression.value)
+
+        return float(expression.value)
+    except ValueError:
+        raise ValueError(f"Invalid value for the filter '{expression}'.")
+
+
+def __compile_filter(expression: FilterExpression, index: int, date_cell: DateCell) -> RowPredicate:
+    filter_operator: FilterOperator = expression.operator
+
+    if filter_operator in ("=", "!="):
+        values = frozenset(value.strip().lower() for value in expression.value.split(","))
+        if filter_operator == "=":
+            return lambda columns: str(columns[index]).lower() in values
+        return lambda columns: str(columns[index]).lower() not in values
+
+    if filter_operator in ("~", "!~"):
+        try:
+            pattern = re.compile(expression.value, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression for the filter '{expression}': {e}")
+
+        if filter_operator == "~":
+            return lambda columns: pattern.search(str(columns[index])) is not None
+        return lambda columns: pattern.search(str(columns[index])) is None
+
+    compare = COMPARISON_OPERATORS[filter_operator]
+    bound = get_comparison_bound(expression, date_cell)
+    if isinstance(bound, datetime):
+        parse_date = get_date_parser(date_cell.date_format)
+        return lambda columns: compare(
+            columns[index] if isinstance(columns[index], datetime) else parse_date(columns[index]),
+            bound
+        )
+
+    return lambda columns: compare(float(columns[index]), bound)
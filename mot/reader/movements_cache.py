@@ -0,0 +1,528 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Mapping, Optional, Sequence, Tuple
+
+from mot.types.balance_index import BalanceIndex
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+from mot.types.filter_expression import FilterExpression
+from mot.types.movement_series import MovementSeries
+from mot.types.movements import AmountMode, Movements
+from mot.types.records_file import RecordsFile
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "mot"
+)
+DEFAULT_CACHE_MAX_SIZE = 64 * 1024 * 1024
+
+CACHE_FORMAT_VERSION = 2
+CACHE_ENTRY_HEADER = struct.Struct("<4sII1s")
+CACHE_ENTRY_MAGIC = b"MOTC"
+BALANCE_INDEX_HEADER = struct.Struct("<4sII1s")
+BALANCE_INDEX_MAGIC = b"MOTI"
+MOVEMENTS_EXTENSION = ".movements"
+FINGERPRINT_EXTENSION = ".fingerprint"
+INCREMENTAL_STATE_EXTENSION = ".incremental"
+GROUPS_EXTENSION = ".groups"
+BALANCE_INDEX_EXTENSION = ".index"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class IncrementalState:
+    """
+    What's needed to parse only the rows appended to a records file since
+    it was parsed the last time.
+    :param offset: Size of the records file when it was parsed.
+    :param prefix_hash: Hash of the whole content of the records file before the offset.
+    :param last_byte: The last byte before the offset, to know whether the last row was
+           terminated by a new line.
+    :param movements: Sum of the amounts of the movements parsed so far, for each
+           day, without rounding.
+    """
+
+    def __init__(self, offset: int, prefix_hash: str, last_byte: bytes, movements: Movements):
+        self.offset = offset
+        self.prefix_hash = prefix_hash
+        self.last_byte = last_byte
+        self.movements = movements
+
+
+class MovementsCache:
+    """
+    On-disk cache of the movements parsed from records files, so that unchanged
+    files don't need to be read and parsed again.
+    Movements are stored in a compact binary format, and the least recently used
+    entries are evicted when the cache exceeds its maximum size.
+    The cache is best-effort: any error while reading or writing it is ignored,
+    and the movements are parsed from the records file instead.
+    """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, max_size: int = DEFAULT_CACHE_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+
+    def get_key(
+            self,
+            file_path: str,
+            delimiter: str,
+            date_cell: DateCell,
+            amount_label: str,
+            filtering_cell: Optional[Cell] = None,
+            filter_callback: Optional[Callable] = None,
+            amount_mode: AmountMode = "float",
+            filters: Sequence[FilterExpression] = (),
+            group_label: Optional[str] = None
+    ) -> str:
+        """
+        The key identifies both the content of the records file and the arguments
+        used to parse it. Raises FileNotFoundError if the file does not exist.
+        :param group_label: The label of the column the movements are grouped by, for
+               the entries stored with "store_groups".
+        """
+        parameters = get_parsing_parameters(
+            delimiter,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            filter_callback,
+            amount_mode,
+            filters,
+            group_label
+        )
+        parameters["content"] = self.__get_content_hash(file_path)
+        return hash_text(json.dumps(parameters, sort_keys=True))
+
+    def get_incremental_key(
+            self,
+            file_path: str,
+            delimiter: str,
+            date_cell: DateCell,
+            amount_label: str,
+            filtering_cell: Optional[Cell] = None,
+            filter_callback: Optional[Callable] = None,
+            amount_mode: AmountMode = "float",
+            filters: Sequence[FilterExpression] = ()
+    ) -> str:
+        """
+        Unlike "get_key", the key identifies the path of the records file instead of
+        its content, which is expected to grow over time.
+        """
+        parameters = get_parsing_parameters(
+            delimiter,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            filter_callback,
+            amount_mode,
+            filters
+        )
+        parameters["path"] = os.path.abspath(file_path)
+        return hash_text(json.dumps(parameters, sort_keys=True))
+
+    def load(self, key: str) -> Optional[Movements]:
+        """
+        :return: The cached movements, or None if they're not available.
+        """
+        entry_path = os.path.join(self.directory, key + MOVEMENTS_EXTENSION)
+        try:
+            with open(entry_path, "rb") as file:
+                content = file.read()
+            movements = decode_movements(content)
+            # The modification time is used to track the least recently used entries.
+            os.utime(entry_path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+        return movements
+
+    def store(self, key: str, movements: Mapping[date, float]) -> None:
+        try:
+            write_atomically(self.directory, key + MOVEMENTS_EXTENSION, encode_movements(movements))
+            self.__evict_least_recently_used()
+        except OSError:
+            pass
+
+    def load_groups(self, key: str) -> Optional[Dict[str, Movements]]:
+        """
+        :return: The cached movements of each value of the group column, or None if
+                 they're not available.
+        """
+        entry_path = os.path.join(self.directory, key + GROUPS_EXTENSION)
+        try:
+            with open(entry_path, "rb") as file:
+                metadata = json.loads(file.readline())
+                groups = {
+                    str(group_value): decode_movements(file.read(int(size)))
+                    for group_value, size in zip(metadata["groups"], metadata["sizes"], strict=True)
+                }
+            os.utime(entry_path)
+            return groups
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+
+    def store_groups(self, key: str, groups: Mapping[str, Mapping[date, float]]) -> None:
+        """
+        :param groups: The movements of each value of the group column, e.g. of each
+               value of the filtering column, so that any of them can be selected later.
+               They're not stored if they're larger than the cache, since they would be
+               evicted right away.
+        """
+        encoded_groups = [encode_movements(movements) for movements in groups.values()]
+        metadata = {
+            "groups": list(groups),
+            "sizes": [len(encoded_movements) for encoded_movements in encoded_groups],
+        }
+        content = json.dumps(metadata).encode("utf-8") + b"\n" + b"".join(encoded_groups)
+        if len(content) > self.max_size:
+            return
+
+        try:
+            write_atomically(self.directory, key + GROUPS_EXTENSION, content)
+            self.__evict_least_recently_used()
+        except OSError:
+            pass
+
+    def load_incremental_state(self, key: str) -> Optional[IncrementalState]:
+        """
+        :return: The state stored by the last incremental parsing, or None if it's not available.
+        """
+        entry_path = os.path.join(self.directory, key + INCREMENTAL_STATE_EXTENSION)
+        try:
+            with open(entry_path, "rb") as file:
+                metadata = json.loads(file.readline())
+                movements = decode_movements(file.read())
+            os.utime(entry_path)
+            return IncrementalState(
+                int(metadata["offset"]),
+                str(metadata["prefix_hash"]),
+                bytes.fromhex(metadata["last_byte"]),
+                movements
+            )
+        except (OSError, ValueError, KeyError, TypeError, struct.error):
+            return None
+
+    def store_incremental_state(self, key: str, state: IncrementalState) -> None:
+        metadata = {
+            "offset": state.offset,
+            "prefix_hash": state.prefix_hash,
+            "last_byte": state.last_byte.hex(),
+        }
+        content = json.dumps(metadata).encode("utf-8") + b"\n" + encode_movements(state.movements)
+        try:
+            write_atomically(self.directory, key + INCREMENTAL_STATE_EXTENSION, content)
+            self.__evict_least_recently_used()
+        except OSError:
+            pass
+
+    def get_balance_index_key(
+            self,
+            records_files: Sequence[RecordsFile],
+            filtering_cell: Optional[Cell] = None,
+            filter_callback: Optional[Callable] = None,
+            amount_mode: AmountMode = "float",
+            filters: Sequence[FilterExpression] = ()
+    ) -> str:
+        """
+        The key identifies the content of the records files and the arguments used to
+        parse them, like "get_key", so that the index is found without parsing them.
+        Raises FileNotFoundError if any of the files does not exist.
+        """
+        return hash_text(json.dumps([
+            self.get_key(
+                records_file.file_path,
+                records_file.delimiter,
+                records_file.date_cell,
+                records_file.amount_label,
+                filtering_cell,
+                filter_callback,
+                amount_mode,
+                filters
+            )
+            for records_file in records_files
+        ]))
+
+    def load_balance_index(self, key: str) -> Optional[BalanceIndex]:
+        """
+        :return: The cached index, or None if it's not available.
+        """
+        entry_path = os.path.join(self.directory, key + BALANCE_INDEX_EXTENSION)
+        try:
+            with open(entry_path, "rb") as file:
+                content = file.read()
+            balance_index = decode_balance_index(content)
+            os.utime(entry_path)
+        except (OSError, ValueError, struct.error):
+            return None
+
+        return balance_index
+
+    def store_balance_index(self, key: str, balance_index: BalanceIndex) -> None:
+        try:
+            write_atomically(self.directory, key + BALANCE_INDEX_EXTENSION, encode_balance_index(balance_index))
+            self.__evict_least_recently_used()
+        except OSError:
+            pass
+
+    def __get_content_hash(self, file_path: str) -> str:
+        """
+        Hashing a large records file takes time too, so the hash is stored along
+        with the size and modification time of the file: as long as they don't
+        change, the file is not read again.
+        """
+        absolute_path = os.path.abspath(file_path)
+        stat = os.stat(absolute_path)
+        fingerprint = f"{stat.st_size} {stat.st_mtime_ns}"
+        fingerprint_name = hash_text(absolute_path) + FINGERPRINT_EXTENSION
+        fingerprint_path = os.path.join(self.directory, fingerprint_name)
+
+        try:
+            with open(fingerprint_path, "r", encoding="utf-8") as file:
+                cached_fingerprint, content_hash = file.read().rsplit(" ", 1)
+            if cached_fingerprint == fingerprint:
+                os.utime(fingerprint_path)
+                return content_hash
+        except (OSError, ValueError):
+            pass
+
+        content_hash = hash_file(absolute_path)
+        try:
+            write_atomically(self.directory, fingerprint_name, f"{fingerprint} {content_hash}".encode("utf-8"))
+        except OSError:
+            pass
+
+        return content_hash
+
+    def __evict_least_recently_used(self) -> None:
+        entries = []
+        total_size = 0
+        with os.scandir(self.directory) as directory_entries:
+            for entry in directory_entries:
+                extensions = (
+                    MOVEMENTS_EXTENSION,
+                    FINGERPRINT_EXTENSION,
+                    INCREMENTAL_STATE_EXTENSION,
+                    BALANCE_INDEX_EXTENSION,
+                    GROUPS_EXTENSION
+                )
+                if entry.name.endswith(extensions) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                    total_size += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+
+            os.remove(path)
+            total_size -= size
+
+
+def get_parsing_parameters(
+        delimiter: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell] = None,
+        filter_callback: Optional[Callable] = None,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = (),
+        group_label: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Arguments which affect the parsed movements, labels are case-insensitive.
+    """
+    parameters: Dict[str, Any] = {
+        "version": CACHE_FORMAT_VERSION,
+        "delimiter": delimiter,
+        "date_label": date_cell.label.lower(),
+        "date_format": date_cell.date_format,
+        "amount_label": amount_label.lower(),
+        "amount_mode": amount_mode,
+    }
+    if filtering_cell is not None and filter_callback is not None:
+        parameters["filter_label"] = filtering_cell.label.lower()
+        parameters["filter_value"] = filtering_cell.value.lower()
+        parameters["filter_callback"] = f"{filter_callback.__module__}.{filter_callback.__qualname__}"
+    if len(filters) > 0:
+        parameters["filters"] = [
+            [expression.label.lower(), expression.operator, expression.value]
+            for expression in filters
+        ]
+    if group_label is not None:
+        parameters["group_label"] = group_label.lower()
+
+    return parameters
+
+
+def create_incremental_state(file_path: str, offset: int, movements: Movements) -> IncrementalState:
+    prefix_hash, last_byte, _ = __hash_prefix(file_path, offset)
+    return IncrementalState(offset, prefix_hash, last_byte, movements)
+
+
+def is_prefix_unchanged(file_path: str, state: IncrementalState) -> bool:
+    """
+    Records files are expected to only grow by appending rows at their end, so the
+    whole content before the offset must be the same. Hashing it is much faster than
+    parsing it, and detects edits to any of the existing rows.
+    """
+    if os.stat(file_path).st_size < state.offset:
+        return False
+
+    prefix_hash, last_byte, next_byte = __hash_prefix(file_path, state.offset)
+    if prefix_hash != state.prefix_hash or last_byte != state.last_byte:
+        return False
+
+    # If the last row was not terminated by a new line, cells may have been
+    # appended to it, instead of adding new rows.
+    return last_byte in (b"", b"\n") or next_byte in (b"", b"\r", b"\n")
+
+
+def encode_movements(movements: Mapping[date, float]) -> bytes:
+    """
+    Dates are stored as the microseconds elapsed since datetime.min, and amounts
+    as doubles, or as 64-bit integers if they're all integer cents, both in little
+    endian order.
+    """
+    dates = array("q", [(movement_date - datetime.min) // timedelta(microseconds=1) for movement_date in movements])
+    amount_type = "q" if all(type(amount) is int for amount in movements.values()) else "d"
+    amounts = array(amount_type, movements.values())
+    if dates.itemsize != 8 or amounts.itemsize != 8:
+        raise OSError("Unsupported platform for the movements cache.")
+
+    if sys.byteorder == "big":
+        dates.byteswap()
+        amounts.byteswap()
+
+    header = CACHE_ENTRY_HEADER.pack(CACHE_ENTRY_MAGIC, CACHE_FORMAT_VERSION, len(movements), amount_type.encode())
+    return header + dates.tobytes() + amounts.tobytes()
+
+
+def decode_movements(content: bytes) -> Movements:
+    magic, version, count, amount_type = CACHE_ENTRY_HEADER.unpack_from(content)
+    size = CACHE_ENTRY_HEADER.size + count * 16
+    if magic != CACHE_ENTRY_MAGIC or version != CACHE_FORMAT_VERSION or len(content) != size:
+        raise ValueError("Invalid movements cache entry.")
+
+    dates = array("q")
+    amounts = array(amount_type.decode())
+    dates.frombytes(content[CACHE_ENTRY_HEADER.size:CACHE_ENTRY_HEADER.size + count * 8])
+    amounts.frombytes(content[CACHE_ENTRY_HEADER.size + count * 8:])
+    if sys.byteorder == "big":
+        dates.byteswap()
+        amounts.byteswap()
+
+    return {
+        datetime.min + timedelta(microseconds=movement_date): amount
+        for movement_date, amount in zip(dates, amounts)
+    }
+
+
+def encode_balance_index(balance_index: BalanceIndex) -> bytes:
+    """
+    Only the days, as 32-bit integers, and the balances, as doubles or 64-bit integers,
+    are stored, in little endian order. The sparse tables take O(n log n) space, so
+    they're built again when the index is decoded.
+    """
+    arrays = [balance_index.days, balance_index.balances]
+    if balance_index.days.itemsize != 4 or balance_index.balances.itemsize != 8:
+        raise OSError("Unsupported platform for the movements cache.")
+
+    content = [
+        BALANCE_INDEX_HEADER.pack(
+            BALANCE_INDEX_MAGIC,
+            CACHE_FORMAT_VERSION,
+            len(balance_index),
+            balance_index.balances.typecode.encode()
+        )
+    ]
+    for values in arrays:
+        if sys.byteorder == "big":
+            values = array(values.typecode, values)
+            values.byteswap()
+        content.append(values.tobytes())
+
+    return b"".join(content)
+
+
+def decode_balance_index(content: bytes) -> BalanceIndex:
+    magic, version, count, balance_type = BALANCE_INDEX_HEADER.unpack_from(content)
+    if magic != BALANCE_INDEX_MAGIC or version != CACHE_FORMAT_VERSION:
+        raise ValueError("Invalid balance index cache entry.")
+
+    offset = BALANCE_INDEX_HEADER.size
+
+    def read_array(typecode: str, length: int) -> "array[Any]":
+        nonlocal offset
+        values = array(typecode)
+        end = offset + length * values.itemsize
+        if end > len(content):
+            raise ValueError("Invalid balance index cache entry.")
+
+        values.frombytes(content[offset:end])
+        if sys.byteorder == "big":
+            values.byteswap()
+        offset = end
+        return values
+
+    days = read_array("i", count)
+    balances = read_array(balance_type.decode(), count)
+    if offset != len(content):
+        raise ValueError("Invalid balance index cache entry.")
+
+    return BalanceIndex.from_money_over_time(MovementSeries(days, balances))
+
+
+def hash_text(text: str) -> str:
+    return hash_bytes(text.encode("utf-8"))
+
+
+def hash_bytes(content: bytes) -> str:
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def hash_file(file_path: str) -> str:
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def write_atomically(directory: str, file_name: str, content: bytes) -> None:
+    """
+    Concurrent runs never read partially written entries.
+    """
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(content)
+        os.replace(temporary_path, os.path.join(directory, file_name))
+    except OSError:
+        os.remove(temporary_path)
+        raise
+
+
+def __hash_prefix(file_path: str, offset: int) -> Tuple[str, bytes, bytes]:
+    """
+    :return: The hash of the content before the offset, the last byte before the
+             offset and the byte after it.
+    """
+    prefix_hash = hashlib.blake2b(digest_size=16)
+    last_byte = b""
+    with open(file_path, "rb") as file:
+        remaining = offset
+        while remaining > 0 and (chunk := file.read(min(HASH_CHUNK_SIZE, remaining))):
+            prefix_hash.update(chunk)
+            last_byte = chunk[-1:]
+            remaining -= len(chunk)
+        next_byte = file.read(1)
+
+    return prefix_hash.hexdigest(), last_byte, next_byte
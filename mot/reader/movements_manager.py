@@ -1,33 +1,76 @@
+import heapq
+import itertools
+import os
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import date
-from typing import List, Optional, Callable, Dict, Any
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Set, \
+    Tuple, TypeVar
 
-from mot.reader.movements_parser import get_row_cells, read_lines_of_xlsx, read_lines_of_text_file, get_index_of_cell, \
-    parse_movements
+from mot.reader.movements_cache import MovementsCache, create_incremental_state, is_prefix_unchanged
+from mot.reader.movements_parser import FilterCallback, read_rows_of_xlsx, read_rows_of_text_file, parse_rows, \
+    parse_movement_rows, parse_rows_by_group, is_columnar_ledger, get_index_of_cell
+from mot.reader.parallel_movements_parser import parse_movements_in_parallel
 from mot.types.cell import Cell
 from mot.types.date_cell import DateCell
-from mot.types.movements import Movements
+from mot.types.filter_expression import FilterExpression
+from mot.types.movement_rows import MovementRows
+from mot.types.movement_series import MovementSeries
+from mot.types.movements import AmountMode, Movements
 
-FilterCallback = Callable[[int, str, str, List[str]], List[str]]
+# Pandas is only imported when the vectorized engine is used.
+if TYPE_CHECKING:
+    from mot.reader.vectorized_movements_parser import MaskCallback
+
+Engine = Literal["python", "vectorized"]
+"""
+    - python: rows are read and parsed one by one, using a constant amount of memory.
+    - vectorized: only the needed columns are loaded with Pandas and parsed using array
+      operations, which is much faster on large records files.
+"""
+
+Concurrency = Literal["none", "thread", "process"]
 """
-The callback accepts:
-    - 1: int -> The index of the cell to filter on.
-    - 2: str -> The value to match for filtering.
-    - 3: str -> The CSV/XLSX cells delimiter.
-    - 4: List[str] -> the CSV/XLSX rows containing the movements to filter.
-Returns the list of filtered rows.
+How several records files are loaded:
+    - none: one after the other.
+    - thread: at the same time, in multiple threads. Useful when loading is mostly I/O or
+      done by libraries releasing the GIL, like the vectorized engine.
+    - process: at the same time, in multiple processes. Useful when loading is CPU bound,
+      like the python engine.
 """
 
+MAX_FILTER_VALUES = 100
+"""
+The movements are cached by each value of the filtering column only if it has at most
+this many distinct values, like an account or a category, since the sums of each day
+are kept in memory for all of them.
+"""
+
+T = TypeVar("T")
+
 def get_movements(
         file_path: str,
         delimiter: str,
         date_cell: DateCell,
         amount_label: str,
         filtering_cell: Optional[Cell] = None,
-        filter_callback: Optional[FilterCallback] = None
-) -> Movements:
+        filter_callback: Optional[FilterCallback] = None,
+        engine: Engine = "python",
+        cache: Optional[MovementsCache] = None,
+        incremental: bool = False,
+        workers: int = 1,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = (),
+        max_memory: Optional[int] = None
+) -> MovementSeries:
     """
     Reads the movements from a CSV/XLSX file.
-    :param file_path: E.g. /home/ciro23/Documents/bank-movements.xlsx
+    The file is read as a stream of rows: header resolution, filtering and aggregation
+    are all applied in a single pass, without keeping the whole file in memory.
+    Columnar ledgers created by "mot convert" are read by memory mapping only the needed
+    columns, ignoring the engine, the cache and the incremental mode.
+    :param file_path: E.g. /home/ciro23/Documents/bank-movements.xlsx, or the directory
+           of a columnar ledger.
     :param delimiter: CSV/XLSX cells delimiter (usually "," or ";").
     :param date_cell: Used to recognize the cell containing the date, given its label, and to
            correctly parse it using the right date format.
@@ -37,128 +80,374 @@ def get_movements(
     :param filter_callback: Based on the "filtering_cell", this callback specified the behaviour
            to filter in/out certain movements. Both this argument and "filtering_cell" must be specified
            to enable the filtering feature.
-    :return:
+    :param engine: The engine used to parse the movements, see "Engine".
+    :param cache: When specified, movements are only parsed if they're not already
+           cached for the same records file and arguments. With the python engine and a
+           single worker, the movements are cached by each value of the filtering column,
+           so that changing the filtering value or mode doesn't parse the file again,
+           unless the column has more than "MAX_FILTER_VALUES" distinct values.
+    :param incremental: Records files are expected to only grow by appending rows, so
+           only the rows appended since the previous run are parsed, ignoring the
+           engine. It requires the cache and it's not supported by XLSX files.
+    :param workers: The number of processes used to parse CSV files with the python
+           engine, large files are split into chunks which are parsed in parallel.
+    :param amount_mode: Whether amounts are parsed as floats or integer cents, see "AmountMode".
+    :param filters: Only the movements matching all of them are read, see "FilterOperator".
+           They're compiled once and evaluated while parsing, without additional passes.
+    :param max_memory: The approximate number of bytes the vectorized engine can use to
+           load the records file, which is then read in chunks, so that records files
+           larger than the available memory can be parsed. The python engine always reads
+           one row at a time, keeping only the sums of each day.
+    :return: The sum of the amounts of the movements, for each day, sorted by date.
     """
-    try:
-        if file_path.endswith(".xlsx"):
-            rows = read_lines_of_xlsx(file_path)
-            date_cell.date_format = "%Y-%m-%d"
-        else:
-            rows = read_lines_of_text_file(file_path)
-    except FileNotFoundError as e:
-        raise FileNotFoundError(e)
+    if is_columnar_ledger(file_path):
+        from mot.reader.columnar_ledger import read_columnar_movements
 
-    rows_without_header = rows[1:]
+        movements = read_columnar_movements(
+            file_path,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            __get_filter_mode(filter_callback),
+            amount_mode,
+            filters
+        )
+        return movements if amount_mode == "cents" else round_amounts(movements)
 
-    try:
-        column_headers = get_row_cells(delimiter, rows[0])
-        date_index = get_index_of_cell(date_cell.label, column_headers)
-        amount_index = get_index_of_cell(amount_label, column_headers)
-
-        if filtering_cell is not None and filter_callback is not None:
-            filtering_cell_index = get_index_of_cell(filtering_cell.label, column_headers)
-            rows_without_header = filter_callback(
-                filtering_cell_index,
-                filtering_cell.value,
-                delimiter,
-                rows_without_header
-            )
-    except ValueError as e:
-        raise ValueError(e)
+    if cache is not None and incremental and not file_path.endswith(".xlsx"):
+        return __read_movements_incrementally(
+            file_path,
+            delimiter,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            filter_callback,
+            cache,
+            amount_mode,
+            filters
+        )
+
+    if cache is None:
+        return __read_movements(
+            file_path,
+            delimiter,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            filter_callback,
+            engine,
+            workers,
+            amount_mode,
+            filters,
+            max_memory
+        )
+
+    key = cache.get_key(
+        file_path,
+        delimiter,
+        date_cell,
+        amount_label,
+        filtering_cell,
+        filter_callback,
+        amount_mode,
+        filters
+    )
+    cached_movements = cache.load(key)
+    if cached_movements is not None:
+        return MovementSeries.from_movements(cached_movements, amount_mode)
 
-    movements = sort_dictionary_by_keys(
-        parse_movements(
-            rows_without_header,
+    if (
+        filtering_cell is not None
+        and filter_callback in (exclude_all_except, include_all_except)
+        and engine == "python"
+        and workers <= 1
+    ):
+        movements_of_filter_value = __read_movements_of_filter_value(
+            file_path,
             delimiter,
-            date_index,
-            date_cell.date_format,
-            amount_index
+            date_cell,
+            amount_label,
+            filtering_cell,
+            filter_callback,
+            cache,
+            amount_mode,
+            filters
         )
+        if movements_of_filter_value is not None:
+            return movements_of_filter_value
+
+    movements = __read_movements(
+        file_path,
+        delimiter,
+        date_cell,
+        amount_label,
+        filtering_cell,
+        filter_callback,
+        engine,
+        workers,
+        amount_mode,
+        filters,
+        max_memory
     )
+    cache.store(key, movements)
 
-    return round_amounts(movements)
+    return movements
 
 
-def round_amounts(movements: Movements) -> Movements:
+def get_movement_rows(
+        file_path: str,
+        delimiter: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell] = None,
+        filter_callback: Optional[FilterCallback] = None,
+        filters: Sequence[FilterExpression] = ()
+) -> MovementRows:
+    """
+    Reads the movements from a CSV/XLSX file, one for each row, without summing the ones
+    of the same day. See "get_movements" for the arguments.
+    :return: The movements in the same order of the file, with the line their row starts at,
+             and their amount in integer cents.
+    """
+    if is_columnar_ledger(file_path):
+        from mot.reader.columnar_ledger import read_columnar_movement_rows
+
+        return read_columnar_movement_rows(
+            file_path,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            __get_filter_mode(filter_callback),
+            filters
+        )
+
+    return parse_movement_rows(
+        file_path,
+        __read_rows(file_path, delimiter, True),
+        date_cell,
+        amount_label,
+        filtering_cell,
+        filter_callback,
+        filters
+    )
+
+
+def get_movements_by_group(
+        file_path: str,
+        delimiter: str,
+        date_cell: DateCell,
+        amount_label: str,
+        group_label: str,
+        filtering_cell: Optional[Cell] = None,
+        filter_callback: Optional[FilterCallback] = None,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = ()
+) -> Dict[str, MovementSeries]:
+    """
+    Reads the movements from a CSV/XLSX file, or from a columnar ledger, grouped by the
+    value of a column, in a single pass. See "get_movements" for the arguments.
+    The rows are always parsed one by one, ignoring the engine and the cache.
+    :param group_label: The label of the column whose values the movements are grouped by,
+           e.g. "account".
+    :return: The sum of the amounts of the movements of each group, for each day, sorted
+             by date, by the value of the group.
+    """
+    if is_columnar_ledger(file_path):
+        from mot.reader.columnar_ledger import read_columnar_movements_by_group
+
+        movements_by_group = read_columnar_movements_by_group(
+            file_path,
+            date_cell,
+            amount_label,
+            group_label,
+            filtering_cell,
+            __get_filter_mode(filter_callback),
+            amount_mode,
+            filters
+        )
+        if amount_mode == "cents":
+            return movements_by_group
+        return {group: round_amounts(movements) for group, movements in movements_by_group.items()}
+
+    group_values, amount_per_group = parse_rows_by_group(
+        file_path,
+        __read_rows(file_path, delimiter),
+        date_cell,
+        amount_label,
+        group_label,
+        filtering_cell,
+        filter_callback,
+        amount_mode,
+        filters
+    )
+    return {
+        group_value: __sort_and_round(movements, amount_mode)
+        for group_value, movements in zip(group_values, amount_per_group)
+    }
+
+
+def load_concurrently(
+        concurrency: Concurrency,
+        *loaders: Tuple[str, Callable[[], T]]
+) -> Tuple[T, ...]:
+    """
+    Errors raised while loading a records file are raised again, with the same type,
+    specifying the path of the file which failed.
+    :param loaders: The path of each records file, with the callable loading its movements.
+    """
+    if concurrency == "none" or len(loaders) == 1:
+        return tuple(__load_file(file_path, load) for file_path, load in loaders)
+
+    executor: Executor
+    if concurrency == "process":
+        executor = ProcessPoolExecutor(max_workers=len(loaders))
+    else:
+        executor = ThreadPoolExecutor(max_workers=len(loaders))
+
+    with executor:
+        futures = [executor.submit(load) for _, load in loaders]
+        return tuple(
+            __load_file(file_path, future.result)
+            for (file_path, _), future in zip(loaders, futures)
+        )
+
+
+def merge_movements(movements: Sequence[MovementSeries]) -> MovementSeries:
+    """
+    The series are already sorted by date, so they're merged in a single pass with a
+    k-way merge, summing the amounts of the same day.
+    The given series are not modified.
+    """
+    if len(movements) == 0:
+        return MovementSeries(array("i"), array("d"))
+
+    days = array("i")
+    amounts = array(movements[0].amounts.typecode)
+    for day, amount in heapq.merge(*[zip(series.days, series.amounts) for series in movements], key=lambda x: x[0]):
+        if len(days) > 0 and days[-1] == day:
+            amounts[-1] += amount
+        else:
+            days.append(day)
+            amounts.append(amount)
+
+    return MovementSeries(days, amounts)
+
+
+def round_amounts(movements: MovementSeries) -> MovementSeries:
     """
     Each amount is rounded to 2 decimals.
     """
-    for movement_date, amount in movements.items():
-        movements[movement_date] = round(amount, 2)
+    amounts = movements.amounts
+    for index, amount in enumerate(amounts):
+        amounts[index] = round(amount, 2)
 
     return movements
 
 
-def round_and_sum_total(movements: Movements) -> Movements:
+def round_and_sum_total(movements: MovementSeries) -> MovementSeries:
     """
-    Given a dictionary of movement entries with dates as keys and amounts as values,
-    this function calculates a cumulative total amount and updates each entry
-    to reflect the running total up to that date.
-    Each total is rounded to 2 decimals.
+    Given the movements for each day, this function calculates a cumulative total
+    amount and updates each day to reflect the running total up to that date.
+    Each total is rounded to 2 decimals, integer cents are kept as integers.
     """
-    total = 0.0
-    for movement_date, amount in movements.items():
+    amounts = movements.amounts
+    total: float = 0
+    for index, amount in enumerate(amounts):
         total += amount
-        movements[movement_date] = round(total, 2)
+        amounts[index] = round(total, 2)
 
     return movements
 
 
+def sum_total(movements: MovementSeries) -> MovementSeries:
+    """
+    Like "round_and_sum_total", but the totals are not rounded, so that they can be
+    updated by "update_total" without accumulating rounding errors.
+    """
+    amounts = movements.amounts
+    total: float = 0
+    for index, amount in enumerate(amounts):
+        total += amount
+        amounts[index] = total
+
+    return movements
+
+
+def update_total(
+        previous_movements: MovementSeries,
+        previous_total: MovementSeries,
+        movements: MovementSeries
+) -> MovementSeries:
+    """
+    Like "sum_total", but the totals of the days before the first one whose movements
+    changed are copied from the previous total, so that when rows are appended to a
+    records file only the totals of the last days are summed again.
+    The given series are not modified, and the totals are not rounded: rounding a copy
+    with "round_amounts" gives the same result of "round_and_sum_total".
+    :param previous_movements: The movements the previous total was calculated from.
+    :param previous_total: The result of "sum_total" or "update_total" on the previous
+           movements.
+    """
+    start = __get_unchanged_days(previous_movements, movements)
+    amounts = previous_total.amounts[:start]
+    total = amounts[-1] if start > 0 else 0
+    for amount in movements.amounts[start:]:
+        total += amount
+        amounts.append(total)
+
+    return MovementSeries(array("i", movements.days), amounts)
+
+
+def cents_to_amounts(movements: MovementSeries) -> MovementSeries:
+    """
+    Converts the amounts parsed as integer cents back to floats, with 2 decimals.
+    """
+    return MovementSeries(movements.days, array("d", [cents / 100 for cents in movements.amounts]))
+
+
 def include_all_except(
         except_cell_index: int,
         value_to_match: str,
-        delimiter: str,
-        rows: List[str]
-) -> List[str]:
+        rows: Iterable[List[Any]]
+) -> Iterator[List[Any]]:
     """
     This may be useful when movements of an investment account should not be considered.
     :param except_cell_index: The index of the cell that must be checked.
     :param value_to_match: The value to check against for the cell which index was specified.
-    :param delimiter: Cells delimiter (usually "," or ";").
-    :param rows: Movement rows read from the records file.
+    :param rows: Cells of the movement rows read from the records file.
     :return: All movement rows except the ones which the specified cell matches a certain value.
     """
-    filtered_rows = []
-    for row in rows:
-        columns = get_row_cells(delimiter, row)
-
+    value_to_match = value_to_match.lower()
+    for columns in rows:
         # If the index of the "column to skip" has been set,
         # then the value in the cell of this row must be checked,
         # so that it's skipped if there's a match.
         if except_cell_index >= 0:
-            skip: str = columns[except_cell_index]
-            if skip.lower() == value_to_match.lower():
+            skip = str(columns[except_cell_index])
+            if skip.lower() == value_to_match:
                 continue
 
-        filtered_rows.append(row)
-
-    return filtered_rows
+        yield columns
 
 
 def exclude_all_except(
         except_cell_index: int,
         value_to_match: str,
-        delimiter: str,
-        rows: List[str]
-) -> List[str]:
+        rows: Iterable[List[Any]]
+) -> Iterator[List[Any]]:
     """
     This may be useful when only movements of a specific account should be
     considered.
     :param except_cell_index: The index of the cell that must be checked.
     :param value_to_match: The value to check against for the cell which index was specified.
-    :param delimiter: Cells delimiter (usually "," or ";").
-    :param rows: Movement rows read from the records file.
+    :param rows: Cells of the movement rows read from the records file.
     :return: All movement rows which the specified cell does not match a certain value.
     """
-    filtered_rows = []
-    for row in rows:
-        columns = get_row_cells(delimiter, row)
-
-        skip: str = columns[except_cell_index]
-        if skip.lower() == value_to_match.lower():
-            filtered_rows.append(row)
-
-    return filtered_rows
+    value_to_match = value_to_match.lower()
+    for columns in rows:
+        skip = str(columns[except_cell_index])
+        if skip.lower() == value_to_match:
+            yield columns
 
 
 def sort_dictionary_by_keys(dictionary: Dict[date, Any], reverse: bool = False) -> Dict[date, Any]:
@@ -172,3 +461,300 @@ def sort_dictionary_by_keys(dictionary: Dict[date, Any], reverse: bool = False)
             reverse=reverse
         )
     )
+
+
+def __read_movements(
+        file_path: str,
+        delimiter: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell],
+        filter_callback: Optional[FilterCallback],
+        engine: Engine,
+        workers: int,
+        amount_mode: AmountMode,
+        filters: Sequence[FilterExpression],
+        max_memory: Optional[int]
+) -> MovementSeries:
+    if engine == "vectorized":
+        from mot.reader.vectorized_movements_parser import parse_movements_vectorized
+
+        movements = parse_movements_vectorized(
+            file_path,
+            delimiter,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            __get_mask_callback(filter_callback),
+            amount_mode,
+            filters,
+            max_memory
+        )
+        return MovementSeries.from_movements(movements, amount_mode)
+
+    if workers > 1 and not file_path.endswith(".xlsx"):
+        movements = parse_movements_in_parallel(
+            file_path,
+            delimiter,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            filter_callback,
+            workers,
+            amount_mode,
+            filters
+        )
+        return __sort_and_round(movements, amount_mode)
+
+    movements = parse_rows(
+        file_path,
+        __read_rows(file_path, delimiter),
+        date_cell,
+        amount_label,
+        filtering_cell,
+        filter_callback,
+        amount_mode=amount_mode,
+        filters=filters
+    )
+    return __sort_and_round(movements, amount_mode)
+
+
+def __load_file(file_path: str, load: Callable[[], T]) -> T:
+    try:
+        return load()
+    except FileNotFoundError as e:
+        raise FileNotFoundError(f"Could not read the records file '{file_path}': {e}") from e
+    except ValueError as e:
+        raise ValueError(f"Could not read the records file '{file_path}': {e}") from e
+
+
+def __read_rows(file_path: str, delimiter: str, numbered: bool = False) -> Iterator[List[Any]]:
+    if file_path.endswith(".xlsx"):
+        return read_rows_of_xlsx(file_path, numbered)
+
+    return read_rows_of_text_file(file_path, delimiter, numbered=numbered)
+
+
+def __read_movements_incrementally(
+        file_path: str,
+        delimiter: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell],
+        filter_callback: Optional[FilterCallback],
+        cache: MovementsCache,
+        amount_mode: AmountMode,
+        filters: Sequence[FilterExpression]
+) -> MovementSeries:
+    """
+    Only the rows appended since the previous run are parsed, and their amounts are
+    added to the stored sums, which are kept without rounding so that the result is
+    the same of parsing the whole file.
+    The whole file is parsed again if the rows before the stored offset were edited.
+    """
+    key = cache.get_incremental_key(
+        file_path,
+        delimiter,
+        date_cell,
+        amount_label,
+        filtering_cell,
+        filter_callback,
+        amount_mode,
+        filters
+    )
+    size = os.stat(file_path).st_size
+    state = cache.load_incremental_state(key)
+
+    if state is None or not is_prefix_unchanged(file_path, state):
+        rows = read_rows_of_text_file(file_path, delimiter, 0, size)
+        movements = parse_rows(
+            file_path,
+            rows,
+            date_cell,
+            amount_label,
+            filtering_cell,
+            filter_callback,
+            amount_mode=amount_mode,
+            filters=filters
+        )
+        state = create_incremental_state(file_path, size, movements)
+        cache.store_incremental_state(key, state)
+    elif state.offset < size:
+        header = next(read_rows_of_text_file(file_path, delimiter), [])
+        appended_rows = read_rows_of_text_file(file_path, delimiter, state.offset, size)
+        movements = parse_rows(
+            file_path,
+            itertools.chain([header], appended_rows),
+            date_cell,
+            amount_label,
+            filtering_cell,
+            filter_callback,
+            state.movements,
+            amount_mode,
+            filters
+        )
+        state = create_incremental_state(file_path, size, movements)
+        cache.store_incremental_state(key, state)
+
+    return __sort_and_round(state.movements, amount_mode)
+
+
+def __read_movements_of_filter_value(
+        file_path: str,
+        delimiter: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Cell,
+        filter_callback: FilterCallback,
+        cache: MovementsCache,
+        amount_mode: AmountMode,
+        filters: Sequence[FilterExpression]
+) -> Optional[MovementSeries]:
+    """
+    The movements are cached by each value of the filtering column and by day, so that
+    other filtering values, or the other filter mode, are answered from the cache
+    without parsing the records file again.
+    The sums of each group are kept without rounding, and the ones of the kept values
+    are added together before rounding them, like parsing the whole file does.
+    :return: None if the filtering column has more than "MAX_FILTER_VALUES" distinct
+             values, parsing stops as soon as they're found.
+    """
+    key = cache.get_key(
+        file_path,
+        delimiter,
+        date_cell,
+        amount_label,
+        amount_mode=amount_mode,
+        filters=filters,
+        group_label=filtering_cell.label
+    )
+    groups = cache.load_groups(key)
+    if groups is None:
+        filter_values: Set[str] = set()
+        group_values, amount_per_group = parse_rows_by_group(
+            file_path,
+            __collect_values(__read_rows(file_path, delimiter), filtering_cell.label, filter_values),
+            date_cell,
+            amount_label,
+            filtering_cell.label,
+            None,
+            None,
+            amount_mode,
+            filters
+        )
+        if len(filter_values) > MAX_FILTER_VALUES:
+            return None
+
+        groups = dict(zip(group_values, amount_per_group))
+        cache.store_groups(key, groups)
+
+    # Like the filter callbacks, values are compared case-insensitively.
+    value_to_match = filtering_cell.value.lower()
+    keep_matching = filter_callback == exclude_all_except
+    movements: Movements = {}
+    for group_value, amount_per_date in groups.items():
+        if (group_value.lower() == value_to_match) != keep_matching:
+            continue
+
+        for movement_date, amount in amount_per_date.items():
+            movements[movement_date] = movements.get(movement_date, 0) + amount
+
+    return __sort_and_round(movements, amount_mode)
+
+
+def __collect_values(rows: Iterator[List[Any]], label: str, values: Set[str]) -> Iterator[List[Any]]:
+    """
+    Adds the distinct values of a column to the given set, and stops reading the rows when
+    there are more than "MAX_FILTER_VALUES" of them.
+    """
+    header = next(rows, None)
+    if header is None:
+        return
+
+    yield header
+    index = get_index_of_cell(label, [str(cell) for cell in header])
+    for columns in rows:
+        if index < len(columns):
+            values.add(str(columns[index]))
+            if len(values) > MAX_FILTER_VALUES:
+                return
+        yield columns
+
+
+def __sort_and_round(movements: Movements, amount_mode: AmountMode) -> MovementSeries:
+    """
+    The given movements are not modified, integer cents don't need to be rounded.
+    """
+    series = MovementSeries.from_movements(movements, amount_mode)
+    if amount_mode == "cents":
+        return series
+
+    return round_amounts(series)
+
+
+def __get_unchanged_days(previous_movements: MovementSeries, movements: MovementSeries) -> int:
+    """
+    :return: The number of days, from the first one, whose movements didn't change.
+    """
+    if previous_movements.amounts.typecode != movements.amounts.typecode:
+        return 0
+
+    # Appending rows usually changes only the last day, or adds new ones, so all the
+    # days before it are compared at once.
+    last = len(previous_movements) - 1
+    if (
+            last >= 0
+            and previous_movements.days[:last] == movements.days[:last]
+            and previous_movements.amounts[:last] == movements.amounts[:last]
+    ):
+        if len(movements) > last and movements.days[last] == previous_movements.days[last] \
+                and movements.amounts[last] == previous_movements.amounts[last]:
+            return last + 1
+        return last
+
+    unchanged_days = 0
+    for previous_day, previous_amount, day, amount in zip(
+            previous_movements.days,
+            previous_movements.amounts,
+            movements.days,
+            movements.amounts
+    ):
+        if previous_day != day or previous_amount != amount:
+            break
+        unchanged_days += 1
+
+    return unchanged_days
+
+
+def __get_mask_callback(filter_callback: Optional[FilterCallback]) -> Optional["MaskCallback"]:
+    """
+    The vectorized engine can't call the filter callbacks row by row, so their
+    vectorized counterpart is used instead.
+    """
+    from mot.reader.vectorized_movements_parser import mask_exclude_all_except, mask_include_all_except
+
+    if filter_callback is None:
+        return None
+
+    if filter_callback == include_all_except:
+        return mask_include_all_except
+    if filter_callback == exclude_all_except:
+        return mask_exclude_all_except
+
+    raise ValueError("The specified filter callback is not supported by the vectorized engine.")
+
+
+def __get_filter_mode(filter_callback: Optional[FilterCallback]) -> Optional[Literal["in", "out"]]:
+    """
+    Columnar ledgers are filtered with array operations, so the filter callbacks are
+    replaced by whether the rows matching the filtering cell are kept or dropped.
+    """
+    if filter_callback is None:
+        return None
+
+    if filter_callback == exclude_all_except:
+        return "in"
+    if filter_callback == include_all_except:
+        return "out"
+
+    raise ValueError("The specified filter callback is not supported by columnar ledgers.")
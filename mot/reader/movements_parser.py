@@ -1,75 +1,283 @@
 import csv
+import itertools
+import os
 import warnings
 from datetime import datetime
-from io import StringIO
-from typing import List
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
-import pandas as pd
+from mot.reader.date_parser import get_date_parser
+from mot.reader.movement_filters import compile_filters
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+from mot.types.filter_expression import FilterExpression
+from mot.types.movement_rows import MovementRows
+from mot.types.movements import AmountMode, Movements
 
-from mot.types.movements import Movements
+FilterCallback = Callable[[int, str, Iterable[List[Any]]], Iterator[List[Any]]]
+"""
+The callback accepts:
+    - 1: int -> The index of the cell to filter on.
+    - 2: str -> The value to match for filtering.
+    - 3: Iterable[List[Any]] -> the cells of the CSV/XLSX rows containing the movements to filter.
+Returns the filtered rows, lazily, so that filtering doesn't require an additional pass.
+"""
 
+COLUMNAR_LEDGER_METADATA = "ledger.json"
 
-def read_lines_of_xlsx(file_path: str) -> List[str]:
+
+def read_rows_of_xlsx(file_path: str, numbered: bool = False) -> Iterator[List[Any]]:
     """
-    WARNING: all cells containing dates will be automatically converted
-    using the format "%Y-%m-%d" by Pandas!
+    Lazily reads the rows of the first worksheet, using the read-only mode of openpyxl.
+    Cells keep the type they have in the workbook, so that dates and amounts
+    don't need to be converted to strings and parsed again.
+    Empty cells are read as empty strings.
+    :param numbered: Whether the number of each row in the worksheet is appended as its
+           last cell, which skipped empty rows don't change.
     """
     with warnings.catch_warnings():
         warnings.simplefilter("ignore")
-        df = pd.read_excel(file_path, engine='openpyxl')
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
 
-    csv_buffer = StringIO()
+    try:
+        worksheet = workbook.worksheets[0]
+        for number, row in enumerate(worksheet.iter_rows(values_only=True), worksheet.min_row):
+            if any(cell is not None for cell in row):
+                columns = ["" if cell is None else cell for cell in row]
+                if numbered:
+                    columns.append(number)
+                yield columns
+    finally:
+        workbook.close()
 
-    df.to_csv(csv_buffer, encoding='utf-8', index=False)
-    csv_buffer.seek(0)
 
-    pd.read_csv(csv_buffer)
-    return csv_buffer.getvalue().splitlines()
+def read_rows_of_text_file(
+        file_path: str,
+        delimiter: str,
+        start: int = 0,
+        end: Optional[int] = None,
+        numbered: bool = False
+) -> Iterator[List[Any]]:
+    """
+    Lazily reads the records file one row at a time, so that the whole file
+    never needs to be kept in memory.
+    A single CSV reader is used over the open file, which also allows quoted
+    cells to span multiple lines.
+    :param start: Byte offset of the first row to read, it must be the beginning of a row.
+    :param end: Byte offset where reading stops, it must be the end of a row.
+           By default, the file is read until its end.
+    :param numbered: Whether the number of the line each row starts at is appended as its
+           last cell, so that rows can be found in the file even when it has empty lines or
+           cells spanning multiple lines. Only supported when the whole file is read.
+    """
+    if start == 0 and end is None:
+        with open(file_path, "r", encoding="utf-8-sig", newline="") as file:
+            reader = csv.reader(file, delimiter=delimiter)
+            yield from __number_lines(reader) if numbered else __skip_empty_rows(reader)
+        return
 
+    if numbered:
+        raise ValueError("Rows can only be numbered when the whole records file is read.")
 
-def read_lines_of_text_file(file_path: str) -> List[str]:
-    with open(file_path, "r", encoding="utf-8-sig") as file:
-        return file.read().splitlines()
+    with open(file_path, "rb") as binary_file:
+        binary_file.seek(start)
+        lines = __read_lines_of_range(binary_file, start, end)
+        yield from __skip_empty_rows(csv.reader(lines, delimiter=delimiter))
 
 
 def parse_movements(
-        rows: List[str],
-        delimiter: str,
+        rows: Iterable[List[Any]],
         date_index: int,
         date_format: str,
-        amount_index: int
+        amount_index: int,
+        amount_per_date: Optional[Movements] = None,
+        amount_mode: AmountMode = "float"
 ) -> Movements:
     """
     After reading the movements from a CSV or XLSX file, it's necessary
     to parse them into a more useful format.
-    :param rows: Each row is a string of comma separated values, containing
+    :param rows: Each row is the list of cells of a movement, containing
                  at least an amount and the date the movement was made.
-    :param delimiter: Cells delimiter (usually "," or ";").
+                 Cells read from XLSX files may already contain dates and numbers.
     :param date_index: Zero based index of the cell containing the date.
-    :param date_format: The date format used inside the rows.
+    :param date_format: The date format used inside the rows, for dates stored as strings.
     :param amount_index: Zero based index of the cell containing the amount.
+    :param amount_per_date: Movements parsed previously, which the new ones are added to.
+    :param amount_mode: Whether amounts are parsed as floats or integer cents.
     :return: The parsed movements by the date they were made.
     """
-    amount_per_date: Movements = {}
-    for row in rows:
-        columns = get_row_cells(delimiter, row)
+    if amount_per_date is None:
+        amount_per_date = {}
 
-        date_str = columns[date_index]
-        date = datetime.strptime(date_str, date_format)
+    parse_amount = float if amount_mode == "float" else parse_cents
 
-        amount = columns[amount_index]
-        float_amount = float(amount)
+    parse_date = get_date_parser(date_format)
+
+    for columns in rows:
+        date_value = columns[date_index]
+        if isinstance(date_value, datetime):
+            date = date_value
+        else:
+            date = parse_date(date_value)
+
+        amount = parse_amount(columns[amount_index])
 
         if date in amount_per_date:
-            amount_per_date[date] += float_amount
+            amount_per_date[date] += amount
         else:
-            amount_per_date[date] = float_amount
+            amount_per_date[date] = amount
 
     return amount_per_date
 
 
-def get_row_cells(delimiter: str, row: str) -> List[str]:
-    return next(csv.reader([row], delimiter=delimiter))
+def parse_rows(
+        file_path: str,
+        rows: Iterator[List[Any]],
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell],
+        filter_callback: Optional[FilterCallback],
+        amount_per_date: Optional[Movements] = None,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = ()
+) -> Movements:
+    """
+    Parses the rows of a records file, after finding the cells to parse and filter
+    using the column headers, in the first row.
+    :param filters: Only the rows matching all of them are parsed.
+    :return: The sum of the amounts of the movements, for each day, not sorted nor rounded.
+    """
+    date_index, amount_index, rows = __find_cells(
+        file_path,
+        rows,
+        date_cell,
+        amount_label,
+        filtering_cell,
+        filter_callback,
+        filters
+    )
+
+    return parse_movements(
+        rows,
+        date_index,
+        date_cell.date_format,
+        amount_index,
+        amount_per_date,
+        amount_mode
+    )
+
+
+def parse_rows_by_group(
+        file_path: str,
+        rows: Iterator[List[Any]],
+        date_cell: DateCell,
+        amount_label: str,
+        group_label: str,
+        filtering_cell: Optional[Cell],
+        filter_callback: Optional[FilterCallback],
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = ()
+) -> Tuple[List[str], List[Movements]]:
+    """
+    Like "parse_rows", but the movements are summed by the value of the group cell and
+    by day, in a single pass.
+    Group values are dictionary encoded: each distinct value is stored once, and the
+    movements of each group are found by its code, the position of its first occurrence.
+    :param group_label: The label of the column whose values the movements are grouped by.
+    :return: The distinct values of the group cell, and the movements of each of them,
+             by their code, not sorted nor rounded.
+    """
+    header = next(rows, None)
+    if header is None:
+        raise ValueError(f"The records file '{file_path}' is empty.")
+
+    group_index = get_index_of_cell(group_label, [str(cell) for cell in header])
+    date_index, amount_index, rows = __find_cells(
+        file_path,
+        itertools.chain([header], rows),
+        date_cell,
+        amount_label,
+        filtering_cell,
+        filter_callback,
+        filters
+    )
+
+    parse_amount = float if amount_mode == "float" else parse_cents
+    parse_date = get_date_parser(date_cell.date_format)
+    codes: Dict[str, int] = {}
+    amount_per_group: List[Movements] = []
+    for columns in rows:
+        group_value = str(columns[group_index])
+        code = codes.get(group_value)
+        if code is None:
+            code = codes[group_value] = len(amount_per_group)
+            amount_per_group.append({})
+
+        date_value = columns[date_index]
+        date = date_value if isinstance(date_value, datetime) else parse_date(date_value)
+        amount = parse_amount(columns[amount_index])
+
+        amount_per_date = amount_per_group[code]
+        if date in amount_per_date:
+            amount_per_date[date] += amount
+        else:
+            amount_per_date[date] = amount
+
+    return list(codes), amount_per_group
+
+
+def parse_movement_rows(
+        file_path: str,
+        rows: Iterator[List[Any]],
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell],
+        filter_callback: Optional[FilterCallback],
+        filters: Sequence[FilterExpression] = ()
+) -> MovementRows:
+    """
+    Like "parse_rows", but each movement is kept on its own, with the number of its row,
+    instead of being summed with the others of the same day.
+    Amounts are parsed as integer cents.
+    :param rows: The rows of the records file, numbered by "read_rows_of_text_file" or
+           "read_rows_of_xlsx", so that the number of each row is kept by the filters.
+    """
+    date_index, amount_index, numbered_rows = __find_cells(
+        file_path,
+        rows,
+        date_cell,
+        amount_label,
+        filtering_cell,
+        filter_callback,
+        filters
+    )
+
+    parse_date = get_date_parser(date_cell.date_format)
+    movement_rows = MovementRows()
+    for columns in numbered_rows:
+        date_value = columns[date_index]
+        if not isinstance(date_value, datetime):
+            date_value = parse_date(date_value)
+
+        movement_rows.append(columns[-1], date_value.toordinal(), parse_cents(columns[amount_index]))
+
+    return movement_rows
+
+
+def is_columnar_ledger(path: str) -> bool:
+    """
+    Columnar ledgers are directories created by "mot convert", they're read instead of
+    records files without parsing any text.
+    """
+    return os.path.isfile(os.path.join(path, COLUMNAR_LEDGER_METADATA))
+
+
+def parse_cents(amount: Any) -> int:
+    """
+    Amounts with more than 2 decimals are rounded to the nearest cent.
+    """
+    return round(float(amount) * 100)
 
 
 def get_index_of_cell(cell_value: str, cells: List[str]) -> int:
@@ -87,3 +295,77 @@ def get_index_of_cell(cell_value: str, cells: List[str]) -> int:
 
     raise ValueError(f"Could not find the index of the cell with value '{cell_value}'"
                      " Check if the specified value match the one in the CSV/XLSX file.")
+
+
+def __find_cells(
+        file_path: str,
+        rows: Iterator[List[Any]],
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell],
+        filter_callback: Optional[FilterCallback],
+        filters: Sequence[FilterExpression]
+) -> Tuple[int, int, Iterator[List[Any]]]:
+    """
+    :return: The indexes of the date and amount cells, and the rows after the header, filtered.
+    """
+    try:
+        column_headers = [str(cell) for cell in next(rows)]
+    except StopIteration:
+        raise ValueError(f"The records file '{file_path}' is empty.")
+
+    try:
+        date_index = get_index_of_cell(date_cell.label, column_headers)
+        amount_index = get_index_of_cell(amount_label, column_headers)
+
+        if filtering_cell is not None and filter_callback is not None:
+            filtering_cell_index = get_index_of_cell(filtering_cell.label, column_headers)
+            rows = filter_callback(
+                filtering_cell_index,
+                filtering_cell.value,
+                rows
+            )
+
+        predicate = compile_filters(
+            filters,
+            [get_index_of_cell(expression.label, column_headers) for expression in filters],
+            date_cell
+        )
+        if predicate is not None:
+            rows = filter(predicate, rows)
+    except ValueError as e:
+        raise ValueError(e)
+
+    return date_index, amount_index, rows
+
+
+def __skip_empty_rows(rows: Iterable[List[str]]) -> Iterator[List[str]]:
+    for row in rows:
+        if len(row) > 0:
+            yield row
+
+
+def __number_lines(reader: Any) -> Iterator[List[Any]]:
+    """
+    The reader counts the lines it has read, so each row starts on the line after the
+    ones read before it.
+    """
+    line = reader.line_num + 1
+    for row in reader:
+        if len(row) > 0:
+            row.append(line)
+            yield row
+        line = reader.line_num + 1
+
+
+def __read_lines_of_range(binary_file: BinaryIO, start: int, end: Optional[int]) -> Iterator[str]:
+    remaining = -1 if end is None else end - start
+    while remaining != 0:
+        line = binary_file.readline(remaining)
+        if len(line) == 0:
+            break
+
+        if remaining > 0:
+            remaining -= len(line)
+        # Only the first line of the file may start with the BOM.
+        yield line.decode("utf-8-sig")
@@ -0,0 +1,136 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+
+from mot.reader.movements_parser import FilterCallback, parse_rows, read_rows_of_text_file
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+from mot.types.filter_expression import FilterExpression
+from mot.types.movements import AmountMode, Movements
+
+BLOCK_SIZE = 1024 * 1024
+MIN_CHUNK_SIZE = 4 * 1024 * 1024
+CHUNKS_PER_WORKER = 4
+
+
+def parse_movements_in_parallel(
+        file_path: str,
+        delimiter: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell],
+        filter_callback: Optional[FilterCallback],
+        workers: int,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = ()
+) -> Movements:
+    """
+    The records file is split into chunks of rows, which are parsed by a pool of
+    processes, then the sums of each chunk are merged in the order of the chunks.
+    Each chunk contains several megabytes, smaller files are parsed in the current process.
+    Integer cents are summed exactly, regardless of how the file is split.
+    The filter callback must be picklable, e.g. a function defined at module level.
+    :return: The sum of the amounts of the movements, for each day, not sorted nor rounded.
+    """
+    header = next(read_rows_of_text_file(file_path, delimiter), None)
+    if header is None:
+        raise ValueError(f"The records file '{file_path}' is empty.")
+
+    with open(file_path, "rb") as file:
+        data_start = len(file.readline())
+    size = os.stat(file_path).st_size
+
+    chunks = min(workers * CHUNKS_PER_WORKER, max(1, (size - data_start) // MIN_CHUNK_SIZE))
+    boundaries = find_row_boundaries(file_path, data_start, size, chunks)
+    ranges = list(zip(boundaries, boundaries[1:]))
+    if len(ranges) == 1:
+        return parse_rows_of_range(file_path, delimiter, header, *ranges[0], date_cell, amount_label,
+                                   filtering_cell, filter_callback, amount_mode, filters)
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        partial_movements = executor.map(
+            parse_rows_of_range,
+            itertools.repeat(file_path),
+            itertools.repeat(delimiter),
+            itertools.repeat(header),
+            [start for start, _ in ranges],
+            [end for _, end in ranges],
+            itertools.repeat(date_cell),
+            itertools.repeat(amount_label),
+            itertools.repeat(filtering_cell),
+            itertools.repeat(filter_callback),
+            itertools.repeat(amount_mode),
+            itertools.repeat(filters)
+        )
+
+        amount_per_date: Movements = {}
+        for movements in partial_movements:
+            for movement_date, amount in movements.items():
+                if movement_date in amount_per_date:
+                    amount_per_date[movement_date] += amount
+                else:
+                    amount_per_date[movement_date] = amount
+
+    return amount_per_date
+
+
+def parse_rows_of_range(
+        file_path: str,
+        delimiter: str,
+        header: List[str],
+        start: int,
+        end: int,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell],
+        filter_callback: Optional[FilterCallback],
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = ()
+) -> Movements:
+    """
+    Parses the rows between two byte offsets of the records file, which must be row boundaries.
+    """
+    rows = itertools.chain([header], read_rows_of_text_file(file_path, delimiter, start, end))
+    return parse_rows(file_path, rows, date_cell, amount_label, filtering_cell, filter_callback,
+                      amount_mode=amount_mode, filters=filters)
+
+
+def find_row_boundaries(file_path: str, start: int, end: int, chunks: int) -> List[int]:
+    """
+    Splits a range of the records file into chunks of about the same size, which
+    begin and end at row boundaries.
+    Quoted cells may contain new lines: a new line is a row boundary only if it's
+    preceded by an even number of quotes, since escaped quotes are doubled.
+    :return: The offsets of the boundaries, including start and end.
+    """
+    chunk_size = (end - start) // chunks
+    boundaries = [start]
+    in_quotes = False
+
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        block_start = start
+        while block_start < end and len(boundaries) < chunks:
+            block = file.read(min(BLOCK_SIZE, end - block_start))
+            if len(block) == 0:
+                break
+
+            # Quotes have been counted up to this position of the block.
+            cursor = 0
+            while len(boundaries) < chunks:
+                next_target = start + len(boundaries) * chunk_size
+                new_line = block.find(b"\n", max(cursor, next_target - block_start))
+                if new_line < 0:
+                    break
+
+                in_quotes ^= block.count(b'"', cursor, new_line) % 2 == 1
+                cursor = new_line + 1
+                if not in_quotes and block_start + cursor < end:
+                    boundaries.append(block_start + cursor)
+
+            in_quotes ^= block.count(b'"', cursor) % 2 == 1
+            block_start += len(block)
+
+    boundaries.append(end)
+    return boundaries
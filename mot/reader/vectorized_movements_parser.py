@@ -0,0 +1,261 @@
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from mot.reader.movement_filters import COMPARISON_OPERATORS, get_comparison_bound
+from mot.reader.movements_parser import get_index_of_cell, read_rows_of_xlsx
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+from mot.types.filter_expression import FilterExpression
+from mot.types.movements import AmountMode, Movements
+
+MaskCallback = Callable[[pd.Series, str], pd.Series]
+"""
+The vectorized counterpart of a filter callback, it accepts:
+    - 1: pd.Series -> The whole column to filter on.
+    - 2: str -> The value to match for filtering.
+Returns a boolean mask of the rows to keep.
+"""
+
+ROW_MEMORY_PER_COLUMN = 100
+"""
+An estimate of the bytes taken by each loaded cell, mostly by the string objects.
+"""
+
+PARSER_MEMORY = 1024 * 1024
+"""
+The bytes taken by the CSV parser of Pandas, or by openpyxl, regardless of the number of
+rows of each chunk: mostly the buffers the records file is read and decoded into.
+"""
+
+MIN_CHUNK_ROWS = 1000
+SAMPLE_SIZE = 64 * 1024
+
+
+def parse_movements_vectorized(
+        file_path: str,
+        delimiter: str,
+        date_cell: DateCell,
+        amount_label: str,
+        filtering_cell: Optional[Cell] = None,
+        mask_callback: Optional[MaskCallback] = None,
+        amount_mode: AmountMode = "float",
+        filters: Sequence[FilterExpression] = (),
+        max_memory: Optional[int] = None
+) -> Movements:
+    """
+    Columnar alternative to reading the rows one by one and parsing them with
+    "parse_movements": only the date, amount and filtering columns are loaded,
+    then dates, amounts, filtering and the sum of each day are all computed
+    using array operations.
+    :param file_path: E.g. /home/ciro23/Documents/bank-movements.xlsx
+    :param delimiter: CSV cells delimiter (usually "," or ";"), ignored for XLSX files.
+    :param date_cell: Used to recognize the cell containing the date, given its label, and to
+           correctly parse it using the right date format.
+    :param amount_label: Used to recognize the cell containing the amount.
+    :param filtering_cell: It's possible to filter movements based on the value of a specific cell.
+    :param mask_callback: Based on the "filtering_cell", specifies which rows are kept.
+    :param amount_mode: Whether amounts are parsed as floats or integer cents, which are
+           summed using 64-bit integer arrays.
+    :param filters: Only the rows matching all of them are parsed, they're evaluated as
+           boolean masks over the whole columns.
+    :param max_memory: The approximate number of bytes parsing can take, including the
+           "PARSER_MEMORY" overhead. When specified, the records file is read in chunks of
+           rows fitting in it, and only the sums of each date are kept between chunks, so
+           that records files larger than the available memory can be parsed. Raises
+           ValueError if it can't fit "MIN_CHUNK_ROWS" rows. The whole file is loaded by
+           default.
+    :return: The sum of the amounts of the movements, for each day, sorted by date and
+             rounded to 2 decimals.
+    """
+    labels = [date_cell.label, amount_label]
+    if filtering_cell is not None and mask_callback is not None:
+        labels.append(filtering_cell.label)
+    filters_start = len(labels)
+    labels.extend(expression.label for expression in filters)
+
+    chunk_rows = None if max_memory is None else __get_chunk_rows(file_path, len(set(labels)), max_memory)
+    if file_path.endswith(".xlsx"):
+        chunks = __read_xlsx_columns(file_path, labels, chunk_rows)
+    else:
+        chunks = __read_csv_columns(file_path, delimiter, labels, chunk_rows)
+
+    # Ledgers contain very few distinct dates compared to the number of rows,
+    # so movements are first summed by the date as it's written in the records
+    # file, then only the distinct dates are parsed.
+    amount_per_value: Dict[Any, Any] = {}
+    for columns in chunks:
+        mask = None
+        if filtering_cell is not None and mask_callback is not None:
+            mask = mask_callback(columns[2].astype(str), filtering_cell.value)
+        for expression, column in zip(filters, columns[filters_start:]):
+            filter_mask = __get_filter_mask(expression, column, date_cell)
+            mask = filter_mask if mask is None else mask & filter_mask
+        if mask is not None:
+            columns = [column[mask] for column in columns[:2]]
+
+        codes, unique_dates = pd.factorize(columns[0])
+        if (codes < 0).any():
+            raise ValueError(f"Some movements don't have a date in the records file '{file_path}'.")
+
+        amounts: pd.Series = pd.to_numeric(columns[1], errors="raise").astype("float64")
+        if amounts.isna().any():
+            raise ValueError(f"Some movements don't have an amount in the records file '{file_path}'.")
+        if amount_mode == "cents":
+            amounts = (amounts * 100).round().astype("int64")
+
+        amount_per_code = amounts.groupby(codes, sort=False).sum()
+        for date_value, amount in zip(unique_dates[amount_per_code.index], amount_per_code.tolist()):
+            amount_per_value[date_value] = amount_per_value.get(date_value, 0) + amount
+
+    dates = pd.to_datetime(pd.Series(list(amount_per_value), dtype=object), format=date_cell.date_format)
+    amount_per_value_series = pd.Series(
+        list(amount_per_value.values()),
+        dtype="int64" if amount_mode == "cents" else "float64"
+    )
+    amount_per_date = amount_per_value_series.groupby(dates.to_numpy(), sort=True).sum()
+
+    dates_per_day = pd.DatetimeIndex(amount_per_date.index).to_pydatetime()
+    if amount_mode == "cents":
+        return dict(zip(dates_per_day, amount_per_date.tolist()))
+
+    # Python's "round" is used instead of the NumPy one to get exactly the
+    # same results of the row based parser, this only loops over days.
+    return dict(zip(dates_per_day, [round(amount, 2) for amount in amount_per_date.tolist()]))
+
+
+def mask_include_all_except(column: pd.Series, value_to_match: str) -> pd.Series:
+    """
+    Vectorized counterpart of "include_all_except".
+    """
+    return column.str.lower() != value_to_match.lower()
+
+
+def mask_exclude_all_except(column: pd.Series, value_to_match: str) -> pd.Series:
+    """
+    Vectorized counterpart of "exclude_all_except".
+    """
+    return column.str.lower() == value_to_match.lower()
+
+
+def __get_filter_mask(expression: FilterExpression, column: pd.Series, date_cell: DateCell) -> pd.Series:
+    """
+    Vectorized counterpart of the predicates compiled by "compile_filters".
+    """
+    if expression.operator in ("=", "!="):
+        values = [value.strip().lower() for value in expression.value.split(",")]
+        mask = column.astype(str).str.lower().isin(values)
+        return mask if expression.operator == "=" else ~mask
+
+    if expression.operator in ("~", "!~"):
+        try:
+            pattern = re.compile(expression.value, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regular expression for the filter '{expression}': {e}")
+
+        mask = column.astype(str).str.contains(pattern, regex=True)
+        return mask if expression.operator == "~" else ~mask
+
+    compare = COMPARISON_OPERATORS[expression.operator]
+    bound = get_comparison_bound(expression, date_cell)
+    if isinstance(bound, datetime):
+        # Like the movements, only the distinct dates are parsed.
+        codes, unique_dates = pd.factorize(column)
+        dates = pd.to_datetime(pd.Series(unique_dates), format=date_cell.date_format)
+        return pd.Series(compare(dates, bound).to_numpy()[codes], index=column.index)
+
+    return compare(pd.to_numeric(column, errors="raise"), bound)
+
+
+def __get_chunk_rows(file_path: str, columns_count: int, max_memory: int) -> int:
+    """
+    The memory of each row is estimated from the average length of the first lines of the
+    records file, and from the number of loaded columns. The parser overhead is taken
+    from the budget, and half of the rest is left to the masks and to the arrays computed
+    from each chunk.
+    """
+    line_length = 0.0
+    if not file_path.endswith(".xlsx"):
+        with open(file_path, "rb") as file:
+            sample = file.read(SAMPLE_SIZE)
+        line_length = len(sample) / max(sample.count(b"\n"), 1)
+
+    row_memory = line_length + ROW_MEMORY_PER_COLUMN * columns_count
+    chunk_rows = int((max_memory - PARSER_MEMORY) / 2 / row_memory)
+    if chunk_rows < MIN_CHUNK_ROWS:
+        min_memory = PARSER_MEMORY + int(2 * row_memory * MIN_CHUNK_ROWS)
+        raise ValueError(
+            f"The maximum memory to parse the records file '{file_path}' must be at least {min_memory} bytes,"
+            f" but it's {max_memory} bytes."
+        )
+
+    return chunk_rows
+
+
+def __read_csv_columns(
+        file_path: str,
+        delimiter: str,
+        labels: List[str],
+        chunk_rows: Optional[int]
+) -> Iterator[List[pd.Series]]:
+    """
+    Amounts are directly parsed by the CSV parser, while all other columns
+    are read as strings. Amounts which are also filtered on are read as strings too,
+    so that the filters match their text like the python engine does.
+    :param chunk_rows: The number of rows of each chunk, all of them by default.
+    :return: The columns matching the given labels, in the same order, for each chunk.
+    """
+    headers = pd.read_csv(file_path, sep=delimiter, encoding="utf-8-sig", nrows=0)
+    column_headers = [str(header) for header in headers.columns]
+    column_indexes = [get_index_of_cell(label, column_headers) for label in labels]
+
+    # Columns are labeled by their index in the records file, so that they
+    # don't depend on how Pandas handles the headers.
+    unique_indexes = sorted(set(column_indexes))
+    dtypes: Dict[Hashable, str] = {index: "str" for index in unique_indexes}
+    if column_indexes[1] not in column_indexes[2:]:
+        dtypes[column_indexes[1]] = "float64"
+    arguments: Dict[str, Any] = {
+        "sep": delimiter,
+        "encoding": "utf-8-sig",
+        "usecols": unique_indexes,
+        "dtype": dtypes,
+        "keep_default_na": False,
+    }
+    if chunk_rows is None:
+        data_frames: Iterator[pd.DataFrame] = iter([pd.read_csv(file_path, **arguments)])
+    else:
+        data_frames = pd.read_csv(file_path, chunksize=chunk_rows, **arguments)
+
+    for data_frame in data_frames:
+        data_frame.columns = pd.Index(unique_indexes)
+        yield [data_frame[index] for index in column_indexes]
+
+
+def __read_xlsx_columns(file_path: str, labels: List[str], chunk_rows: Optional[int]) -> Iterator[List[pd.Series]]:
+    """
+    Rows are streamed from openpyxl, which is much faster than letting Pandas
+    build the whole DataFrame, and only the needed cells are kept.
+    :param chunk_rows: The number of rows of each chunk, all of them by default.
+    :return: The columns matching the given labels, in the same order, for each chunk.
+    """
+    rows = read_rows_of_xlsx(file_path)
+    try:
+        column_headers = [str(cell) for cell in next(rows)]
+    except StopIteration:
+        raise ValueError(f"The records file '{file_path}' is empty.")
+
+    column_indexes = [get_index_of_cell(label, column_headers) for label in labels]
+    columns: List[List[Any]] = [[] for _ in column_indexes]
+    for row in rows:
+        for column, index in zip(columns, column_indexes):
+            column.append(row[index])
+
+        if chunk_rows is not None and len(columns[0]) == chunk_rows:
+            yield [pd.Series(column) for column in columns]
+            columns = [[] for _ in column_indexes]
+
+    if chunk_rows is None or len(columns[0]) > 0:
+        yield [pd.Series(column) for column in columns]
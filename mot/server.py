@@ -0,0 +1,395 @@
+import asyncio
+import json
+import os
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, cast, get_args
+from urllib.parse import parse_qs, urlsplit
+
+from mot.diff_over_time import get_differences
+from mot.reader.memory_cache import MemoryCache, get_file_signatures
+from mot.reader.movement_filters import parse_filter_expression
+from mot.reader.movements_cache import MovementsCache, get_parsing_parameters
+from mot.reader.movements_manager import Engine, cents_to_amounts, get_movements, load_concurrently, \
+    merge_movements, round_and_sum_total
+from mot.types.filter_expression import FilterExpression
+from mot.types.date_cell import DateCell, DEFAULT_DATE_LABEL, DEFAULT_DATE_FORMAT
+from mot.types.movement_series import MovementSeries
+from mot.types.movements import AmountMode
+from mot.types.period_series import Period
+from mot.types.records_file import RecordsFile
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8421
+
+Query = Mapping[str, List[str]]
+"""
+The parameters of a request, by name, each with all the values it was given.
+"""
+
+Response = Tuple[int, bytes]
+"""
+The HTTP status code and the JSON body of a response.
+"""
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+def serve(
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        socket_path: Optional[str] = None,
+        cache: Optional[MovementsCache] = None,
+        memory_cache: Optional[MemoryCache[MovementSeries]] = None
+) -> None:
+    """
+    Serves the money over time and the differences over time of records files as JSON,
+    until interrupted. See "handle_request" for the endpoints.
+    :param socket_path: If specified, the server listens on this Unix socket instead of
+           the host and port.
+    :param cache: The on-disk cache of the parsed movements, used when a records file
+           isn't in the memory cache, e.g. after the server is restarted.
+    """
+    async def run_server() -> None:
+        server = await start_server(host, port, socket_path, cache, memory_cache)
+        async with server:
+            if socket_path is None:
+                print(f"Serving on http://{host}:{port}, press Ctrl+C to stop.")
+            else:
+                print(f"Serving on {socket_path}, press Ctrl+C to stop.")
+            await server.serve_forever()
+
+    asyncio.run(run_server())
+
+
+async def start_server(
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        socket_path: Optional[str] = None,
+        cache: Optional[MovementsCache] = None,
+        memory_cache: Optional[MemoryCache[MovementSeries]] = None
+) -> asyncio.AbstractServer:
+    """
+    Connections are handled concurrently by the event loop, while records files are read
+    by a pool of threads. Identical requests received while the first one is still being
+    computed wait for its response, instead of reading the same records files again.
+    :param port: 0 to use any free port.
+    """
+    memory_cache = MemoryCache() if memory_cache is None else memory_cache
+    pending: Dict[str, "asyncio.Future[Response]"] = {}
+    get_response = partial(__get_response, pending, memory_cache, cache)
+    handle_connection = partial(__handle_connection, get_response)
+
+    if socket_path is not None:
+        return await asyncio.start_unix_server(handle_connection, path=socket_path)
+    return await asyncio.start_server(handle_connection, host, port)
+
+
+def handle_request(
+        target: str,
+        memory_cache: MemoryCache[MovementSeries],
+        cache: Optional[MovementsCache] = None
+) -> Response:
+    """
+    The endpoints are:
+        - /health: always responds {"status": "ok"}.
+        - /money-over-time: the parameters are the ones of the "plot" command, with
+          underscores, e.g. "?file=a.csv&file=b.csv&date_format=%Y-%m-%d&filter=amount>0".
+          Responds {"dates": [...], "amounts": [...]}, the total of each day.
+        - /diff-over-time: the parameters are the ones of the "diff" command, with
+          underscores, e.g. "?source_file=a.csv&reference_file=b.csv&tolerance=0.01".
+          Responds {"differences": [{"date", "source", "reference", "delta"}, ...]}, with
+          null for the missing amounts.
+    The movements parsed from each records file are stored in the memory cache, by the
+    arguments they were parsed with, until the file is modified, so that requests with
+    other periods, tolerances or combinations of the same files don't parse them again.
+    :param target: The path and the query string of the request.
+    """
+    url = urlsplit(target)
+    if url.path == "/health":
+        return 200, b'{"status": "ok"}'
+    if url.path not in ("/money-over-time", "/diff-over-time"):
+        return 404, __format_error(f"Unknown endpoint '{url.path}'.")
+
+    query = parse_qs(url.query, keep_blank_values=True)
+    try:
+        if url.path == "/money-over-time":
+            result = __get_money_over_time(query, memory_cache, cache)
+        else:
+            result = __get_diff_over_time(query, memory_cache, cache)
+    except FileNotFoundError as e:
+        # Errors raised while loading a records file already specify its path.
+        return 404, __format_error(str(e) if e.filename is None else f"File not found: {e.filename}")
+    except ValueError as e:
+        return 400, __format_error(str(e))
+    except OSError as e:
+        return 500, __format_error(f"Could not read the records file: {e}")
+    except Exception as e:
+        return 500, __format_error(f"Unexpected error: {e!r}")
+
+    return 200, json.dumps(result).encode("utf-8")
+
+
+async def __get_response(
+        pending: Dict[str, "asyncio.Future[Response]"],
+        memory_cache: MemoryCache[MovementSeries],
+        cache: Optional[MovementsCache],
+        target: str
+) -> Response:
+    future = pending.get(target)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(None, handle_request, target, memory_cache, cache)
+        pending[target] = future
+        future.add_done_callback(lambda _: pending.pop(target, None))
+
+    # A client disconnecting must not cancel the response awaited by the others.
+    return await asyncio.shield(future)
+
+
+async def __handle_connection(
+        get_response: Callable[[str], Awaitable[Response]],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter
+) -> None:
+    """
+    Connections are kept alive, so that clients polling the server don't need to
+    connect for each request.
+    """
+    try:
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                break
+
+            request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+            headers = {}
+            for header_line in header_lines:
+                name, _, value = header_line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            parts = request_line.split(" ")
+            content_length = headers.get("content-length", "0")
+            if len(parts) != 3 or not content_length.isdigit():
+                writer.write(__format_response((400, __format_error("Malformed request.")), False))
+                break
+
+            # Bodies are ignored, but must be consumed to read the next request.
+            if int(content_length) > 0:
+                await reader.readexactly(int(content_length))
+
+            method, target, version = parts
+            if method == "GET":
+                response = await get_response(target)
+            else:
+                response = 405, __format_error(f"Method {method} is not supported, use GET.")
+
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            writer.write(__format_response(response, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def __format_response(response: Response, keep_alive: bool) -> bytes:
+    status, body = response
+    head = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def __format_error(message: str) -> bytes:
+    return json.dumps({"error": message}).encode("utf-8")
+
+
+def __get_money_over_time(
+        query: Query,
+        memory_cache: MemoryCache[MovementSeries],
+        cache: Optional[MovementsCache]
+) -> Dict[str, Any]:
+    engine = cast(Engine, __get_choice(query, "engine", get_args(Engine), "python"))
+    amount_mode = cast(AmountMode, __get_choice(query, "amount_mode", get_args(AmountMode), "float"))
+    filters = __get_filters(query)
+    loaders = [
+        (
+            records_file.file_path,
+            partial(__load_movements, records_file, engine, amount_mode, filters, memory_cache, cache)
+        )
+        for records_file in __get_records_files(query)
+    ]
+
+    money_over_time = round_and_sum_total(merge_movements(load_concurrently("thread", *loaders)))
+    if amount_mode == "cents":
+        money_over_time = cents_to_amounts(money_over_time)
+    return __format_movement_series(money_over_time)
+
+
+def __get_diff_over_time(
+        query: Query,
+        memory_cache: MemoryCache[MovementSeries],
+        cache: Optional[MovementsCache]
+) -> Dict[str, Any]:
+    records_files = [
+        RecordsFile(
+            __get_required_value(query, f"{name}_file"),
+            __get_value(query, f"{name}_delimiter", None),
+            DateCell(
+                __get_value(query, f"{name}_date_label", DEFAULT_DATE_LABEL),
+                __get_value(query, f"{name}_date_format", DEFAULT_DATE_FORMAT)
+            ),
+            __get_value(query, f"{name}_amount_label", None)
+        )
+        for name in ["source", "reference"]
+    ]
+    engine = cast(Engine, __get_choice(query, "engine", get_args(Engine), "python"))
+    amount_mode = cast(AmountMode, __get_choice(query, "amount_mode", get_args(AmountMode), "float"))
+    period = cast(Period, __get_choice(query, "period", get_args(Period), "day"))
+
+    try:
+        tolerance = float(__get_value(query, "tolerance", "0"))
+    except ValueError:
+        raise ValueError("The 'tolerance' parameter must be a number.")
+
+    source_movements, reference_movements = load_concurrently(
+        "thread",
+        (
+            records_files[0].file_path,
+            partial(__load_movements, records_files[0], engine, amount_mode, __get_filters(query), memory_cache, cache)
+        ),
+        (
+            records_files[1].file_path,
+            partial(__load_movements, records_files[1], engine, amount_mode, [], memory_cache, cache)
+        )
+    )
+    differences_over_time = get_differences(source_movements, reference_movements, amount_mode, tolerance, period)
+    return {
+        "differences": [
+            {
+                "date": difference.date.date().isoformat(),
+                "source": difference.source,
+                "reference": difference.reference,
+                "delta": difference.delta,
+            }
+            for difference in differences_over_time.rows()
+        ]
+    }
+
+
+def __load_movements(
+        records_file: RecordsFile,
+        engine: Engine,
+        amount_mode: AmountMode,
+        filters: Sequence[FilterExpression],
+        memory_cache: MemoryCache[MovementSeries],
+        cache: Optional[MovementsCache]
+) -> MovementSeries:
+    """
+    :return: The amount of each day of the records file, which must not be modified,
+             since it's shared with the other requests.
+    """
+    parameters = get_parsing_parameters(
+        records_file.delimiter,
+        records_file.date_cell,
+        records_file.amount_label,
+        amount_mode=amount_mode,
+        filters=filters
+    )
+    key = (os.path.abspath(records_file.file_path), json.dumps(parameters, sort_keys=True))
+
+    movements = memory_cache.get(key, [records_file.file_path])
+    if movements is None:
+        signatures = get_file_signatures([records_file.file_path])
+        movements = get_movements(
+            records_file.file_path,
+            records_file.delimiter,
+            records_file.date_cell,
+            records_file.amount_label,
+            engine=engine,
+            cache=cache,
+            amount_mode=amount_mode,
+            filters=filters
+        )
+        memory_cache.store(key, signatures, movements)
+
+    return movements
+
+
+def __get_records_files(query: Query) -> List[RecordsFile]:
+    """
+    Like the arguments of the "plot" command, the delimiter, the date format, the date
+    label and the amount label can be specified once, for all the records files, or
+    once for each of them, in the same order.
+    """
+    file_paths = __get_values(query, "file", required=True)
+    arguments_of_files: List[Sequence[Optional[str]]] = []
+    for name in ["delimiter", "date_format", "date_label", "amount_label"]:
+        values: Sequence[Optional[str]] = query.get(name, [None])
+        if len(values) == 1:
+            values = list(values) * len(file_paths)
+        elif len(values) != len(file_paths):
+            raise ValueError(f"The '{name}' parameter must be specified once, or once for each records file.")
+        arguments_of_files.append(values)
+
+    return [
+        RecordsFile(
+            file_path,
+            delimiter,
+            DateCell(
+                DEFAULT_DATE_LABEL if date_label is None else date_label,
+                DEFAULT_DATE_FORMAT if date_format is None else date_format
+            ),
+            amount_label
+        )
+        for file_path, delimiter, date_format, date_label, amount_label in zip(file_paths, *arguments_of_files)
+    ]
+
+
+def __get_filters(query: Query) -> List[FilterExpression]:
+    return [parse_filter_expression(expression) for expression in query.get("filter", [])]
+
+
+def __get_values(query: Query, name: str, required: bool = False) -> List[str]:
+    values = query.get(name, [])
+    if required and len(values) == 0:
+        raise ValueError(f"The '{name}' parameter is required.")
+
+    return values
+
+
+def __get_value(query: Query, name: str, default: Any) -> Any:
+    values = query.get(name, [])
+    if len(values) > 1:
+        raise ValueError(f"The '{name}' parameter can be specified only once.")
+
+    return values[0] if len(values) == 1 else default
+
+
+def __get_required_value(query: Query, name: str) -> str:
+    value = __get_value(query, name, None)
+    if value is None:
+        raise ValueError(f"The '{name}' parameter is required.")
+
+    return value
+
+
+def __get_choice(query: Query, name: str, choices: Sequence[str], default: str) -> str:
+    value = __get_value(query, name, default)
+    if value not in choices:
+        raise ValueError(f"The '{name}' parameter must be one of: {', '.join(choices)}.")
+
+    return value
+
+
+def __format_movement_series(movements: MovementSeries) -> Dict[str, Any]:
+    return {
+        "dates": [day.date().isoformat() for day in movements],
+        "amounts": list(movements.values()),
+    }
@@ -0,0 +1,48 @@
+import os
+import unittest
+from datetime import datetime
+
+from mot.diff_over_time import get_diff_over_time
+from mot.money_over_time import get_money_over_time
+from mot.reader.movements_manager import get_movements
+from mot.reader.movements_parser import parse_cents
+from mot.types.date_cell import DateCell
+
+
+class AmountModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv')
+
+    def test_parse_cents(self):
+        self.assertEqual(29, parse_cents("0.29"))
+        self.assertEqual(-3500, parse_cents("-35"))
+        self.assertEqual(110, parse_cents("1.1"))
+        self.assertEqual(1050, parse_cents(10.5))
+
+    def test_movements_are_integer_cents(self):
+        for engine in ["python", "vectorized"]:
+            movements = get_movements(self.file_path, ",", DateCell(), "amount", engine=engine, amount_mode="cents")
+
+            self.assertEqual(6500, movements[datetime(2024, 6, 15)], engine)
+            self.assertTrue(all(type(amount) is int for amount in movements.values()), engine)
+
+    def test_same_result_as_floats(self):
+        for file_name in ['movements_default.csv', 'movements_default.xlsx']:
+            file_path = os.path.join(os.path.dirname(__file__), 'resources', file_name)
+            for engine in ["python", "vectorized"]:
+                self.assertEqual(
+                    list(get_money_over_time(file_path, engine=engine).items()),
+                    list(get_money_over_time(file_path, engine=engine, amount_mode="cents").items()),
+                    file_name
+                )
+
+        reference_file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_reference.csv')
+        self.assertEqual(
+            get_diff_over_time(self.file_path, reference_file_path),
+            get_diff_over_time(self.file_path, reference_file_path, amount_mode="cents")
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
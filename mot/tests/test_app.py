@@ -0,0 +1,71 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+class AppTest(unittest.TestCase):
+    """
+    The program is run in a new interpreter, like it's run from the command line.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        resources = os.path.join(os.path.dirname(__file__), 'resources')
+        self.file_paths = []
+        for account in ["checking", "savings"]:
+            os.makedirs(os.path.join(self.directory.name, account))
+            file_path = os.path.join(self.directory.name, account, "movements.csv")
+            shutil.copyfile(os.path.join(resources, 'movements_default.csv'), file_path)
+            self.file_paths.append(file_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_traces_of_files_with_the_same_name(self):
+        output = os.path.join(self.directory.name, "graph.json")
+        self.__run_plot(["--separate-traces", "--output", output], self.file_paths + self.file_paths[:1])
+
+        with open(output, encoding="utf-8") as file:
+            names = [trace.get("name") for trace in json.load(file)["data"]]
+        self.assertIn("checking/movements.csv", names)
+        self.assertIn("savings/movements.csv", names)
+        self.assertIn("checking/movements.csv (2)", names)
+
+    def test_batch_graphs_of_files_with_the_same_name(self):
+        output = os.path.join(self.directory.name, "charts", "{name}.json")
+        self.__run_plot(["--batch", "--output", output], self.file_paths)
+
+        self.assertEqual(
+            ["checking-movements.json", "savings-movements.json"],
+            sorted(os.listdir(os.path.join(self.directory.name, "charts")))
+        )
+
+    def test_invalid_max_memory(self):
+        for size in ["inf", "nan", "-1M", "0"]:
+            completed = subprocess.run(
+                [sys.executable, "-m", "mot", "query", "--file", self.file_paths[0], f"--max-memory={size}"],
+                capture_output=True,
+                text=True,
+                cwd=os.path.join(os.path.dirname(__file__), '..', '..')
+            )
+            self.assertEqual(2, completed.returncode, size)
+            self.assertIn(f"Invalid size '{size}'", completed.stderr)
+            self.assertNotIn("Traceback", completed.stderr)
+
+    def __run_plot(self, arguments, file_paths):
+        files = [argument for file_path in file_paths for argument in ["--file", file_path]]
+        subprocess.run(
+            [sys.executable, "-m", "mot", "plot", "--no-cache", *files, *arguments],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.join(os.path.dirname(__file__), '..', '..')
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
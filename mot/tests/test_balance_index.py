@@ -0,0 +1,107 @@
+import os
+import random
+import tempfile
+import unittest
+from array import array
+from datetime import datetime, timedelta
+from unittest import mock
+
+from mot import balance_over_time
+from mot.balance_over_time import get_balance_index
+from mot.money_over_time import get_money_over_time_of_files
+from mot.reader.movements_cache import MovementsCache, decode_balance_index, encode_balance_index
+from mot.types.balance_index import BalanceIndex
+from mot.types.movement_series import MovementSeries
+from mot.types.records_file import RecordsFile
+
+
+class BalanceIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(7)
+        days = sorted(generator.sample(range(738000, 738400), 150))
+        total = 0.0
+        balances = []
+        for _ in days:
+            total = round(total + generator.randint(-5000, 5000) / 100, 2)
+            balances.append(total)
+
+        self.money_over_time = MovementSeries(array("i", days), array("d", balances))
+        self.balance_index = BalanceIndex.from_money_over_time(self.money_over_time)
+
+    def test_queries_match_a_linear_scan(self):
+        generator = random.Random(11)
+        for _ in range(500):
+            start = datetime.fromordinal(generator.randint(737990, 738410))
+            end = start + timedelta(days=generator.randint(0, 200))
+            balances = [(start, self.__get_balance_at(start))] + [
+                (day, balance) for day, balance in self.money_over_time.items() if start < day <= end
+            ]
+
+            self.assertEqual(self.__get_balance_at(end), self.balance_index.balance_at(end))
+            self.assertAlmostEqual(
+                self.__get_balance_at(end) - self.__get_balance_at(start - timedelta(days=1)),
+                self.balance_index.net_flow(start, end)
+            )
+            self.assertEqual(min(balances, key=lambda x: x[1]), self.balance_index.lowest_balance(start, end))
+            self.assertEqual(
+                max(balances, key=lambda x: x[1]),
+                self.balance_index.highest_balance(start, end)
+            )
+
+    def test_empty_index(self):
+        balance_index = BalanceIndex.from_money_over_time(MovementSeries(array("i"), array("d")))
+        day = datetime(2024, 1, 1)
+
+        self.assertEqual(0, balance_index.balance_at(day))
+        self.assertEqual((day, 0), balance_index.lowest_balance(day, day))
+        self.assertIsNone(balance_index.first_day())
+
+    def test_invalid_range(self):
+        with self.assertRaises(ValueError):
+            self.balance_index.lowest_balance(datetime(2024, 2, 1), datetime(2024, 1, 1))
+
+    def test_encoding(self):
+        decoded = decode_balance_index(encode_balance_index(self.balance_index))
+
+        self.assertEqual(self.balance_index.days, decoded.days)
+        self.assertEqual(self.balance_index.balances, decoded.balances)
+        self.assertEqual(self.balance_index.lowest, decoded.lowest)
+        self.assertEqual(self.balance_index.highest, decoded.highest)
+        with self.assertRaises(ValueError):
+            decode_balance_index(encode_balance_index(self.balance_index)[:-1])
+
+    def test_index_of_several_files_is_cached(self):
+        resources = os.path.join(os.path.dirname(__file__), 'resources')
+        records_files = [
+            RecordsFile(os.path.join(resources, 'movements_default.csv')),
+            RecordsFile(os.path.join(resources, 'movements_reference.csv')),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = MovementsCache(directory)
+            balance_index = get_balance_index(records_files, cache=cache)
+            money_over_time, _ = get_money_over_time_of_files(records_files)
+
+            key = cache.get_balance_index_key(records_files)
+            cached_index = cache.load_balance_index(key)
+            self.assertIsNotNone(cached_index)
+            self.assertEqual(balance_index.lowest, cached_index.lowest)
+
+            # A warm query doesn't read the movements at all.
+            with mock.patch.object(
+                    balance_over_time,
+                    "get_money_over_time_of_files",
+                    wraps=get_money_over_time_of_files
+            ) as get_money_over_time:
+                self.assertEqual(money_over_time.amounts, get_balance_index(records_files, cache=cache).balances)
+                self.assertEqual(0, get_money_over_time.call_count)
+                get_balance_index(records_files, cache=cache, amount_mode="cents")
+                self.assertEqual(1, get_money_over_time.call_count)
+
+    def __get_balance_at(self, day: datetime) -> float:
+        balances = [balance for balance_day, balance in self.money_over_time.items() if balance_day <= day]
+        return balances[-1] if len(balances) > 0 else 0
+
+
+if __name__ == '__main__':
+    unittest.main()
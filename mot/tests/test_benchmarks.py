@@ -0,0 +1,59 @@
+import filecmp
+import os
+import tempfile
+import unittest
+
+from mot.benchmarks.ledger_generator import get_account_names, write_synthetic_ledger
+from mot.benchmarks.pipeline_benchmark import STAGES, read_results, run_benchmark, write_results
+from mot.money_over_time import get_money_over_time
+from mot.reader.movements_parser import read_rows_of_text_file, read_rows_of_xlsx
+from mot.types.date_cell import DateCell
+
+
+class BenchmarksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_synthetic_ledger_is_deterministic(self):
+        first = os.path.join(self.directory.name, "first.csv")
+        second = os.path.join(self.directory.name, "second.csv")
+        write_synthetic_ledger(first, 1000, days=30, delimiter=";", date_format="%Y-%m-%d", accounts=12)
+        write_synthetic_ledger(second, 1000, days=30, delimiter=";", date_format="%Y-%m-%d", accounts=12)
+
+        self.assertTrue(filecmp.cmp(first, second, shallow=False))
+        rows = list(read_rows_of_text_file(first, ";"))
+        self.assertEqual(["row_number", "date", "amount", "account"], rows[0])
+        self.assertEqual(1001, len(rows))
+        self.assertEqual(set(get_account_names(12)), {row[3] for row in rows[1:]})
+        self.assertEqual(30, len({row[1] for row in rows[1:]}))
+
+    def test_xlsx_ledger_has_the_same_movements(self):
+        csv_path = os.path.join(self.directory.name, "ledger.csv")
+        xlsx_path = os.path.join(self.directory.name, "ledger.xlsx")
+        write_synthetic_ledger(csv_path, 500, days=20)
+        write_synthetic_ledger(xlsx_path, 500, days=20)
+
+        self.assertEqual(list(read_rows_of_text_file(csv_path, ",")), list(read_rows_of_xlsx(xlsx_path)))
+        self.assertEqual(
+            list(get_money_over_time(csv_path, date_cell=DateCell()).items()),
+            list(get_money_over_time(xlsx_path, date_cell=DateCell()).items())
+        )
+
+    def test_results_can_be_compared(self):
+        results = run_benchmark(self.directory.name, STAGES, 2000, 200, 50, ",", "%d/%m/%Y", 4, 0, 1)
+        self.assertEqual(STAGES, list(results))
+        for result in results.values():
+            self.assertGreater(result.rows, 0)
+            self.assertGreater(result.rows_per_second, 0)
+
+        file_path = os.path.join(self.directory.name, "results.json")
+        write_results(file_path, results, {"rows": 2000})
+        self.assertEqual(results, read_results(file_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
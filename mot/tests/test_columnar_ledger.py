@@ -0,0 +1,137 @@
+import os
+import tempfile
+import unittest
+
+from mot.diff_over_time import get_row_diff_over_time
+from mot.money_over_time import get_money_over_time
+from mot.reader.columnar_ledger import convert_records_file
+from mot.reader.movement_filters import parse_filter_expression
+from mot.reader.movements_manager import get_movement_rows
+from mot.reader.movements_parser import is_columnar_ledger
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+
+
+class ColumnarLedgerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_same_result_as_records_file(self):
+        for file_name in [
+            'movements_default.csv',
+            'movements_trailing_comma.csv',
+            'movements_comma_in_column_value.csv',
+            'movements_multiline_cell.csv',
+            'movements_default.xlsx',
+        ]:
+            file_path = self.__get_resource(file_name)
+            ledger = self.__convert(file_path, ",", DateCell(), "amount")
+
+            for amount_mode in ["float", "cents"]:
+                expected = get_money_over_time(file_path, amount_mode=amount_mode)
+                money_by_date = get_money_over_time(ledger, amount_mode=amount_mode)
+                self.assertEqual(list(expected.items()), list(money_by_date.items()), file_name)
+
+    def test_custom_properties(self):
+        file_path = self.__get_resource('movements_custom_properties.csv')
+        arguments = {
+            "date_cell": DateCell("DATA", "%m/%d/%Y"),
+            "amount_label": "importo",
+        }
+        ledger = self.__convert(file_path, ";", **arguments)
+
+        expected = get_money_over_time(file_path, ";", **arguments)
+        self.assertEqual(list(expected.items()), list(get_money_over_time(ledger, **arguments).items()))
+
+    def test_filters(self):
+        file_path = self.__get_resource('movements_default.csv')
+        ledger = self.__convert(file_path, ",", DateCell(), "amount")
+
+        for filter_mode in ["in", "out"]:
+            arguments = {
+                "filtering_cell": Cell("account", "Cash"),
+                "filter_mode": filter_mode,
+            }
+            expected = get_money_over_time(file_path, **arguments)
+            self.assertEqual(list(expected.items()), list(get_money_over_time(ledger, **arguments).items()))
+
+        for expression in ["account=cash", "account!~^credit", "amount<0", "date>=17/06/2024", "row_number>3"]:
+            filters = [parse_filter_expression(expression)]
+            expected = get_money_over_time(file_path, filters=filters)
+            money_by_date = get_money_over_time(ledger, filters=filters)
+            self.assertEqual(list(expected.items()), list(money_by_date.items()), expression)
+
+    def test_only_selected_columns_are_stored(self):
+        file_path = self.__get_resource('movements_default.csv')
+        ledger = self.__convert(file_path, ",", DateCell(), "amount", ["account"])
+
+        self.assertEqual(5, len(os.listdir(ledger)) - 1)
+        with self.assertRaises(ValueError):
+            get_money_over_time(ledger, filters=[parse_filter_expression("row_number>3")])
+        with self.assertRaises(ValueError):
+            get_money_over_time(ledger, filters=[parse_filter_expression("amount~^-")])
+
+    def test_row_diff(self):
+        source = self.__get_resource('movements_default.csv')
+        reference = self.__get_resource('movements_reference_rows.csv')
+        ledger = self.__convert(source, ",", DateCell(), "amount")
+
+        expected = get_row_diff_over_time(source, reference)
+        row_differences = get_row_diff_over_time(ledger, reference)
+        self.assertEqual(list(expected.source.rows()), list(row_differences.source.rows()))
+        self.assertEqual(list(expected.reference.rows()), list(row_differences.reference.rows()))
+
+    def test_row_numbers_are_lines_of_the_records_file(self):
+        file_path = self.__get_resource('movements_multiline_cell.csv')
+        ledger = self.__convert(file_path, ",", DateCell(), "amount")
+
+        self.assertEqual([2, 4, 7], list(get_movement_rows(ledger, ",", DateCell(), "amount").numbers))
+
+    def test_converting_again_replaces_the_columns(self):
+        """
+        The files referenced by the previous metadata are never overwritten, so readers
+        never mix the columns of different conversions, and they're deleted afterwards.
+        """
+        file_path = self.__get_resource('movements_default.csv')
+        ledger = self.__convert(file_path, ",", DateCell(), "amount")
+        previous_files = set(os.listdir(ledger)) - {"ledger.json"}
+
+        reference = self.__get_resource('movements_reference.csv')
+        self.__convert_to(ledger, reference, ",", DateCell(), "amount")
+        files = set(os.listdir(ledger)) - {"ledger.json"}
+
+        self.assertEqual(set(), previous_files & files)
+        self.assertEqual(3, len(files))
+        expected = get_money_over_time(reference)
+        self.assertEqual(list(expected.items()), list(get_money_over_time(ledger).items()))
+
+    def test_existing_directory_is_not_replaced(self):
+        output = os.path.join(self.directory.name, "existing")
+        os.makedirs(output)
+        with open(os.path.join(output, "notes.txt"), "w", encoding="utf-8") as file:
+            file.write("notes")
+
+        with self.assertRaises(ValueError):
+            convert_records_file(self.__get_resource('movements_default.csv'), ",", output, DateCell(), "amount")
+        self.assertFalse(is_columnar_ledger(output))
+
+    def __convert(self, file_path, delimiter, date_cell, amount_label, labels=None):
+        output = os.path.join(self.directory.name, os.path.basename(file_path) + ".mot")
+        return self.__convert_to(output, file_path, delimiter, date_cell, amount_label, labels)
+
+    def __convert_to(self, output, file_path, delimiter, date_cell, amount_label, labels=None):
+        convert_records_file(file_path, delimiter, output, date_cell, amount_label, labels)
+        self.assertTrue(is_columnar_ledger(output))
+        return output
+
+    @staticmethod
+    def __get_resource(file_name):
+        return os.path.join(os.path.dirname(__file__), 'resources', file_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
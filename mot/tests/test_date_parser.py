@@ -0,0 +1,38 @@
+import unittest
+from datetime import datetime
+
+from mot.reader.date_parser import compile_fast_date_parser, get_date_parser
+
+
+class DateParserTest(unittest.TestCase):
+
+    def test_same_result_as_strptime(self):
+        cases = [
+            ("%d/%m/%Y", ["15/06/2024", "1/6/2024", "01/06/2024", "29/02/2024"]),
+            ("%Y-%m-%d", ["2024-06-15", "2024-6-1"]),
+            ("%Y/%m/%d", ["2024/06/15"]),
+            ("%m/%d/%Y", ["06/15/2024"]),
+            ("%d/%m/%Y %H:%M", ["15/06/2024 10:30"]),
+            ("%d %b %Y", ["15 Jun 2024"]),
+        ]
+        for date_format, dates in cases:
+            parse_date = get_date_parser(date_format)
+            for date_str in dates:
+                self.assertEqual(datetime.strptime(date_str, date_format), parse_date(date_str), date_str)
+
+    def test_invalid_dates(self):
+        parse_date = get_date_parser("%d/%m/%Y")
+        for date_str in ["31/06/2024", "15-06-2024", "15/06/24", "aa/06/2024", "", "15/06/2024 "]:
+            with self.assertRaises(ValueError, msg=date_str):
+                parse_date(date_str)
+
+    def test_fast_path_formats(self):
+        self.assertIsNotNone(compile_fast_date_parser("%d/%m/%Y"))
+        self.assertIsNotNone(compile_fast_date_parser("%Y%m%d"))
+        self.assertIsNone(compile_fast_date_parser("%d/%m/%y"))
+        self.assertIsNone(compile_fast_date_parser("%d/%m/%Y %H"))
+        self.assertIsNone(compile_fast_date_parser("%d/%d/%Y"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from mot.diff_over_time import get_diff_over_time, get_row_diff_over_time
+from mot.reader.movements_manager import get_movement_rows
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+from mot.types.movement_rows import MovementRow
+
+
+class DiffOverTimeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.source_file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv')
+        self.reference_file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_reference.csv')
+
+    def test_differences(self):
+        """
+        Differences are sorted from the most recent one.
+        """
+        differences = get_diff_over_time(self.source_file_path, self.reference_file_path)
+
+        date_format = "%d/%m/%Y"
+        expected = {
+            datetime.strptime("02/07/2024", date_format): {"reference": 2},
+            datetime.strptime("01/07/2024", date_format): {"source": 2},
+            datetime.strptime("17/06/2024", date_format): {"source": 1125, "reference": 1120},
+        }
+        self.assertEqual(list(expected.items()), list(differences.items()))
+
+    def test_period_differences(self):
+        """
+        The movement registered a day later by the reference file is in the same month.
+        """
+        differences = get_diff_over_time(self.source_file_path, self.reference_file_path, period="month")
+        self.assertEqual([(datetime(2024, 6, 1), 1175, 1170, -5)], list(differences.rows()))
+
+        differences = get_diff_over_time(
+            self.source_file_path,
+            self.reference_file_path,
+            amount_mode="cents",
+            tolerance=5,
+            period="year"
+        )
+        self.assertEqual(0, len(differences))
+
+    def test_columnar_differences(self):
+        differences = get_diff_over_time(self.source_file_path, self.reference_file_path)
+
+        self.assertEqual(
+            [
+                (datetime(2024, 7, 2), None, 2, None),
+                (datetime(2024, 7, 1), 2, None, None),
+                (datetime(2024, 6, 17), 1125, 1120, -5),
+            ],
+            list(differences.rows())
+        )
+        self.assertEqual({"source": 1125, "reference": 1120}, differences[datetime(2024, 6, 17)])
+        self.assertNotIn(datetime(2024, 6, 16), differences)
+
+    def test_tolerance(self):
+        """
+        Days whose amounts differ by up to the tolerance are not reported.
+        """
+        for amount_mode in ["float", "cents"]:
+            differences = get_diff_over_time(
+                self.source_file_path,
+                self.reference_file_path,
+                amount_mode=amount_mode,
+                tolerance=5
+            )
+            self.assertEqual([datetime(2024, 7, 2), datetime(2024, 7, 1)], list(differences), amount_mode)
+
+            differences = get_diff_over_time(
+                self.source_file_path,
+                self.reference_file_path,
+                amount_mode=amount_mode,
+                tolerance=4.99
+            )
+            self.assertIn(datetime(2024, 6, 17), differences, amount_mode)
+
+    def test_row_differences(self):
+        """
+        Movements are matched one by one, by date and amount.
+        """
+        reference_file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_reference_rows.csv')
+        differences = get_row_diff_over_time(self.source_file_path, reference_file_path)
+
+        self.assertEqual(
+            [
+                MovementRow(5, datetime(2024, 6, 17), 215),
+                MovementRow(7, datetime(2024, 6, 17), -360),
+                MovementRow(8, datetime(2024, 7, 1), -10),
+            ],
+            list(differences.source.rows())
+        )
+        self.assertEqual(
+            [
+                MovementRow(6, datetime(2024, 6, 18), 215),
+                MovementRow(7, datetime(2024, 6, 17), -350),
+                MovementRow(8, datetime(2024, 7, 3), -10),
+            ],
+            list(differences.reference.rows())
+        )
+
+    def test_row_differences_date_window(self):
+        """
+        Movements with the same amount are matched if they're at most some days apart.
+        """
+        reference_file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_reference_rows.csv')
+
+        differences = get_row_diff_over_time(self.source_file_path, reference_file_path, date_window=1)
+        self.assertEqual([7, 8], list(differences.source.numbers))
+        self.assertEqual([7, 8], list(differences.reference.numbers))
+
+        differences = get_row_diff_over_time(self.source_file_path, reference_file_path, date_window=2)
+        self.assertEqual([7], list(differences.source.numbers))
+        self.assertEqual([7], list(differences.reference.numbers))
+
+    def test_row_differences_date_window_nearest(self):
+        """
+        Movements are matched to the nearest one inside the window, not to the earliest.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            source_file_path = os.path.join(directory, "source.csv")
+            with open(source_file_path, "w", encoding="utf-8") as file:
+                file.write("date,amount\n05/06/2024,-10\n07/06/2024,-10\n")
+            reference_file_path = os.path.join(directory, "reference.csv")
+            with open(reference_file_path, "w", encoding="utf-8") as file:
+                file.write("date,amount\n08/06/2024,-10\n")
+
+            differences = get_row_diff_over_time(source_file_path, reference_file_path, date_window=3)
+
+        self.assertEqual([MovementRow(2, datetime(2024, 6, 5), -10)], list(differences.source.rows()))
+        self.assertEqual([], list(differences.reference.rows()))
+
+    def test_row_differences_filtered(self):
+        """
+        Filtered rows keep their number.
+        """
+        reference_file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_reference_rows.csv')
+        differences = get_row_diff_over_time(
+            self.source_file_path,
+            reference_file_path,
+            source_filtering_cell=Cell("account", "cash")
+        )
+
+        self.assertEqual([7], list(differences.source.numbers))
+        self.assertEqual([4, 5, 6, 7, 8], list(differences.reference.numbers))
+
+    def test_row_numbers_are_lines_of_the_file(self):
+        """
+        Rows are numbered by the line they start at, even after cells spanning multiple
+        lines and empty lines.
+        """
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_multiline_cell.csv')
+        movement_rows = get_movement_rows(file_path, ",", DateCell(), "amount")
+
+        self.assertEqual([2, 4, 7], list(movement_rows.numbers))
+
+    def test_concurrency(self):
+        expected = get_diff_over_time(self.source_file_path, self.reference_file_path, concurrency="none")
+        for concurrency in ["thread", "process"]:
+            differences = get_diff_over_time(
+                self.source_file_path,
+                self.reference_file_path,
+                concurrency=concurrency
+            )
+            self.assertEqual(list(expected.items()), list(differences.items()), concurrency)
+
+    def test_errors_specify_the_file(self):
+        missing_file_path = os.path.join(os.path.dirname(__file__), 'resources/missing.csv')
+        with self.assertRaisesRegex(FileNotFoundError, "missing.csv"):
+            get_diff_over_time(self.source_file_path, missing_file_path)
+
+        with self.assertRaisesRegex(ValueError, "movements_reference.csv"):
+            get_diff_over_time(self.source_file_path, self.reference_file_path, reference_amount_label="missing")
+
+
+if __name__ == '__main__':
+    unittest.main()
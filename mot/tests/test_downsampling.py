@@ -0,0 +1,70 @@
+import unittest
+from array import array
+from datetime import date
+
+import numpy as np
+import plotly.graph_objects as go
+
+from mot.graph.downsampling import downsample, resample
+from mot.money_over_time import create_graph
+from mot.types.movement_series import MovementSeries
+
+
+class DownsamplingTest(unittest.TestCase):
+
+    def setUp(self):
+        first_day = date(2000, 1, 1).toordinal()
+        self.movements = MovementSeries(
+            array("i", range(first_day, first_day + 20000)),
+            array("d", np.sin(np.arange(20000) / 500) * 1000)
+        )
+        self.days, self.values = self.movements.to_numpy()
+
+    def test_lttb(self):
+        indexes = downsample(self.days, self.values, "lttb", 1000)
+
+        self.assertEqual(1000, len(indexes))
+        self.assertEqual(0, indexes[0])
+        self.assertEqual(len(self.days) - 1, indexes[-1])
+        self.assertTrue(np.all(np.diff(indexes) > 0))
+
+    def test_min_max_keeps_peaks(self):
+        values = self.values.copy()
+        values[12345] = 1e6
+        values[5432] = -1e6
+        indexes = downsample(self.days, values, "minmax", 1000)
+
+        self.assertLessEqual(len(indexes), 1000)
+        self.assertIn(12345, indexes)
+        self.assertIn(5432, indexes)
+
+    def test_short_series_are_not_downsampled(self):
+        indexes = downsample(self.days[:100], self.values[:100], "lttb", 1000)
+        self.assertEqual(list(range(100)), list(indexes))
+
+    def test_resample(self):
+        days = np.array(["2024-01-30", "2024-01-31", "2024-02-05", "2024-02-11", "2024-02-12"], dtype="datetime64[D]")
+
+        self.assertEqual([1, 4], list(resample(days, "month")))
+        # Weeks start on Monday, 2024-02-05 and 2024-02-12 were Mondays.
+        self.assertEqual([1, 3, 4], list(resample(days, "week")))
+        self.assertEqual([0, 1, 2, 3, 4], list(resample(days, "day")))
+        self.assertEqual([4], list(resample(days, "quarter")))
+        self.assertEqual([4], list(resample(days, "year")))
+
+    def test_graph(self):
+        graph = create_graph(self.movements, max_points=1000)
+        self.assertEqual(1000, len(graph.data[0].x))
+        self.assertIsInstance(graph.data[0], go.Scatter)
+        self.assertEqual('lines', graph.data[0].mode)
+
+        graph = create_graph(self.movements, downsampling="none")
+        self.assertEqual(20000, len(graph.data[0].x))
+        self.assertIsInstance(graph.data[0], go.Scattergl)
+
+        graph = create_graph(self.movements, resampling="month")
+        self.assertEqual(len({(day.year, day.month) for day in self.movements}), len(graph.data[0].x))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import json
+import os
+import tempfile
+import unittest
+
+from mot.graph.export import write_graph
+from mot.money_over_time import create_graph, get_money_over_time
+
+
+class GraphExportTest(unittest.TestCase):
+
+    def setUp(self):
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv')
+        self.graph = create_graph(get_money_over_time(file_path))
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_html_files_share_the_plotly_bundle(self):
+        """
+        The plotly.js bundle is written once, and referenced by each HTML file.
+        """
+        for name in ["first", "second"]:
+            write_graph(self.graph, os.path.join(self.directory.name, "charts", f"{name}.html"))
+
+        self.assertEqual(
+            ["first.html", "plotly.min.js", "second.html"],
+            sorted(os.listdir(os.path.join(self.directory.name, "charts")))
+        )
+        with open(os.path.join(self.directory.name, "charts", "first.html"), encoding="utf-8") as file:
+            content = file.read()
+        self.assertIn('src="plotly.min.js"', content)
+        self.assertLess(len(content), 100_000)
+
+    def test_json(self):
+        file_path = os.path.join(self.directory.name, "graph.json")
+        write_graph(self.graph, file_path)
+
+        with open(file_path, encoding="utf-8") as file:
+            figure = json.load(file)
+        self.assertEqual([65, 50, 1175, 1177], figure["data"][0]["y"])
+
+    def test_unsupported_file(self):
+        with self.assertRaises(ValueError):
+            write_graph(self.graph, os.path.join(self.directory.name, "graph.png"))
+
+
+if __name__ == '__main__':
+    unittest.main()
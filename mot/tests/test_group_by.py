@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from mot.money_over_time import create_graph, get_money_over_time, get_money_over_time_by_group, \
+    get_money_over_time_of_files
+from mot.reader.columnar_ledger import convert_records_file
+from mot.reader.movement_filters import parse_filter_expression
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+from mot.types.records_file import RecordsFile
+
+
+class GroupByTest(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv')
+
+    def test_same_result_as_filtering_each_group(self):
+        for file_name in ['movements_default.csv', 'movements_default.xlsx']:
+            file_path = os.path.join(os.path.dirname(__file__), 'resources', file_name)
+            for amount_mode in ["float", "cents"]:
+                total, groups = get_money_over_time_by_group(
+                    [RecordsFile(file_path)],
+                    "account",
+                    amount_mode=amount_mode
+                )
+
+                self.assertEqual(["cash", "credit card"], list(groups))
+                self.assertEqual(list(get_money_over_time(file_path).items()), list(total.items()))
+                for group_value, money_over_time in groups.items():
+                    expected = get_money_over_time(file_path, filtering_cell=Cell("account", group_value))
+                    self.assertEqual(list(expected.items()), list(money_over_time.items()), group_value)
+
+    def test_filters(self):
+        filters = [parse_filter_expression("amount>0")]
+        total, groups = get_money_over_time_by_group([RecordsFile(self.file_path)], "account", filters=filters)
+
+        self.assertEqual(list(get_money_over_time(self.file_path, filters=filters).items()), list(total.items()))
+        self.assertEqual([(day.day, amount) for day, amount in groups["cash"].items()], [(15, 100), (1, 112)])
+
+    def test_groups_of_several_files_are_added_together(self):
+        records_files = [RecordsFile(self.file_path), RecordsFile(self.file_path)]
+        total, groups = get_money_over_time_by_group(records_files, "account")
+
+        expected, _ = get_money_over_time_of_files(records_files, Cell("account", "cash"))
+        self.assertEqual(list(expected.items()), list(groups["cash"].items()))
+        self.assertEqual(list(get_money_over_time_of_files(records_files)[0].items()), list(total.items()))
+
+    def test_columnar_ledger(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ledger = os.path.join(directory, "movements.mot")
+            convert_records_file(self.file_path, ",", ledger, DateCell(), "amount")
+
+            for amount_mode in ["float", "cents"]:
+                expected_total, expected_groups = get_money_over_time_by_group(
+                    [RecordsFile(self.file_path)],
+                    "account",
+                    filtering_cell=Cell("account", "cash"),
+                    filter_mode="out",
+                    amount_mode=amount_mode
+                )
+                total, groups = get_money_over_time_by_group(
+                    [RecordsFile(ledger)],
+                    "account",
+                    filtering_cell=Cell("account", "cash"),
+                    filter_mode="out",
+                    amount_mode=amount_mode
+                )
+                self.assertEqual(list(expected_total.items()), list(total.items()))
+                self.assertEqual(
+                    {group_value: list(movements.items()) for group_value, movements in expected_groups.items()},
+                    {group_value: list(movements.items()) for group_value, movements in groups.items()}
+                )
+
+    def test_stacked_graph(self):
+        total, groups = get_money_over_time_by_group([RecordsFile(self.file_path)], "account")
+        graph = create_graph(total, groups, stacked=True)
+
+        self.assertEqual(3, len(graph.data))
+        for trace in graph.data[1:]:
+            self.assertEqual("traces", trace.stackgroup)
+            self.assertEqual(list(graph.data[0].x), list(trace.x))
+        self.assertEqual(list(graph.data[0].y), [sum(values) for values in zip(*[trace.y for trace in graph.data[1:]])])
+
+
+if __name__ == '__main__':
+    unittest.main()
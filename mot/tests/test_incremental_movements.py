@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+
+from mot.money_over_time import get_money_over_time
+from mot.reader.movements_cache import MovementsCache
+from mot.types.date_cell import DateCell
+
+
+class IncrementalMovementsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = MovementsCache(os.path.join(self.directory, "cache"))
+        self.file_path = os.path.join(self.directory, "movements.csv")
+        shutil.copy(os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv'), self.file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_appended_rows(self):
+        get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+        self.__append("9,01/07/2024,0.1,cash\n10,02/07/2024,5,\"multi\nline\"\n")
+
+        self.assertEqual(
+            get_money_over_time(self.file_path),
+            get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+        )
+
+    def test_only_appended_rows_are_parsed(self):
+        """
+        This is verified by altering the stored sums, which must be kept.
+        """
+        get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+        key = self.cache.get_incremental_key(self.file_path, ",", DateCell(), "amount")
+        state = self.cache.load_incremental_state(key)
+        state.movements[datetime(2024, 1, 1)] = 1000
+        self.cache.store_incremental_state(key, state)
+
+        self.__append("9,02/07/2024,3,cash\n")
+        money_by_date = get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+
+        self.assertEqual(1000, money_by_date[datetime(2024, 1, 1)])
+        self.assertEqual(2180, money_by_date[datetime(2024, 7, 2)])
+
+    def test_edited_rows_are_detected(self):
+        get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+        with open(self.file_path, "r", encoding="utf-8") as file:
+            content = file.read()
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write(content.replace("01/07/2024,12,cash", "01/07/2024,13,cash"))
+
+        self.assertEqual(
+            get_money_over_time(self.file_path),
+            get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+        )
+
+    def test_edited_rows_far_from_the_end_are_detected(self):
+        """
+        The edit keeps the size of the file, and it's followed by many rows.
+        """
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write("id,date,amount,account\n")
+            for number in range(2000):
+                file.write(f"{number},{number % 28 + 1:02d}/01/2024,{number % 90 + 10},cash\n")
+        self.assertGreater(os.path.getsize(self.file_path), 16 * 1024)
+        get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+
+        with open(self.file_path, "r", encoding="utf-8") as file:
+            content = file.read()
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write(content.replace("\n9,10/01/2024,19,cash\n", "\n9,10/01/2024,91,cash\n"))
+
+        self.assertEqual(
+            get_money_over_time(self.file_path),
+            get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+        )
+
+    def test_cells_appended_to_last_row_are_detected(self):
+        with open(self.file_path, "r", encoding="utf-8") as file:
+            content = file.read()
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write(content.rstrip("\n").replace("01/07/2024,12,cash", "01/07/2024,12"))
+
+        get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+        self.__append("5,cash\n")
+
+        self.assertEqual(
+            get_money_over_time(self.file_path),
+            get_money_over_time(self.file_path, cache=self.cache, incremental=True)
+        )
+
+    def __append(self, content: str) -> None:
+        with open(self.file_path, "a", encoding="utf-8") as file:
+            file.write(content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -115,6 +115,54 @@ class MoneyOverTimeTest(unittest.TestCase):
         }
         self.assertEqual(expected, money_by_date)
 
+    def test_xlsx(self):
+        """
+        Cells of XLSX files are read with their type, so dates don't need to be
+        parsed using the date format.
+        """
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.xlsx')
+        money_by_date = get_money_over_time(file_path, filtering_cell=Cell("account", "cash"), filter_mode="out")
+
+        date_format = "%d/%m/%Y"
+        expected = {
+            datetime.strptime("16/06/2024", date_format): -15,
+            datetime.strptime("17/06/2024", date_format): 1470,
+            datetime.strptime("01/07/2024", date_format): 1460,
+        }
+        self.assertEqual(expected, money_by_date)
+
+    def test_multiline_column_value(self):
+        """
+        Quoted columns can span multiple lines, which requires the whole file to be
+        read by a single csv reader instead of splitting it into lines beforehand.
+        Empty lines are ignored.
+        """
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_multiline_cell.csv')
+        money_by_date = get_money_over_time(file_path)
+
+        date_format = "%d/%m/%Y"
+        expected = {
+            datetime.strptime("15/06/2024", date_format): 65,
+            datetime.strptime("16/06/2024", date_format): 50,
+        }
+        self.assertEqual(expected, money_by_date)
+
+    def test_keep_values(self):
+        """
+        Only the rows which given column value matches a discriminating word or
+        phrase can be considered.
+        """
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv')
+        money_by_date = get_money_over_time(file_path, filtering_cell=Cell("account", "CASH"), filter_mode="in")
+
+        date_format = "%d/%m/%Y"
+        expected = {
+            datetime.strptime("15/06/2024", date_format): 65,
+            datetime.strptime("17/06/2024", date_format): -295,
+            datetime.strptime("01/07/2024", date_format): -283,
+        }
+        self.assertEqual(expected, money_by_date)
+
 
 if __name__ == '__main__':
     unittest.main()
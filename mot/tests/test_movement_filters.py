@@ -0,0 +1,81 @@
+import os
+import unittest
+from datetime import datetime
+
+from mot.money_over_time import get_money_over_time
+from mot.reader.movement_filters import parse_filter_expression
+
+
+class MovementFiltersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv')
+
+    def test_parse_filter_expression(self):
+        expression = parse_filter_expression(" account != cash, debit card ")
+        self.assertEqual(("account", "!=", "cash, debit card"), (expression.label, expression.operator, expression.value))
+
+        expression = parse_filter_expression("amount<=-10.5")
+        self.assertEqual(("amount", "<=", "-10.5"), (expression.label, expression.operator, expression.value))
+
+        with self.assertRaises(ValueError):
+            parse_filter_expression("amount")
+
+    def test_amount_and_date_ranges(self):
+        filters = [parse_filter_expression("amount>0"), parse_filter_expression("date<=17/06/2024")]
+        expected = {
+            datetime(2024, 6, 15): 100,
+            datetime(2024, 6, 17): 1585,
+        }
+        self.__assert_all_engines(expected, filters)
+
+    def test_values_and_regular_expressions(self):
+        filters = [parse_filter_expression("account!=cash,debit card"), parse_filter_expression("amount<0")]
+        expected = {
+            datetime(2024, 6, 16): -15,
+            datetime(2024, 7, 1): -25,
+        }
+        self.__assert_all_engines(expected, filters)
+
+        filters = [parse_filter_expression("ACCOUNT~^Credit"), parse_filter_expression("amount!~^-")]
+        expected = {
+            datetime(2024, 6, 17): 1485,
+        }
+        self.__assert_all_engines(expected, filters)
+
+    def test_amount_text(self):
+        """
+        Amounts are matched as they're written in the records file.
+        """
+        filters = [parse_filter_expression("amount=100,12")]
+        expected = {
+            datetime(2024, 6, 15): 100,
+            datetime(2024, 7, 1): 112,
+        }
+        self.__assert_all_engines(expected, filters)
+
+        filters = [parse_filter_expression("amount~0$")]
+        expected = {
+            datetime(2024, 6, 15): 100,
+            datetime(2024, 6, 17): 1010,
+            datetime(2024, 7, 1): 1000,
+        }
+        self.__assert_all_engines(expected, filters)
+
+    def test_invalid_filters(self):
+        for expression in ["missing=cash", "amount>ten", "account~("]:
+            with self.assertRaises(ValueError, msg=expression):
+                get_money_over_time(self.file_path, filters=[parse_filter_expression(expression)])
+            with self.assertRaises(ValueError, msg=expression):
+                get_money_over_time(self.file_path, engine="vectorized", filters=[parse_filter_expression(expression)])
+
+    def __assert_all_engines(self, expected, filters):
+        xlsx_file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.xlsx')
+        for file_path in [self.file_path, xlsx_file_path]:
+            for engine in ["python", "vectorized"]:
+                money_by_date = get_money_over_time(file_path, engine=engine, filters=filters)
+                self.assertEqual(expected, money_by_date, f"{file_path} {engine}")
+
+
+if __name__ == '__main__':
+    unittest.main()
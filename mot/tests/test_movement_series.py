@@ -0,0 +1,78 @@
+import pickle
+import unittest
+from datetime import date, datetime
+
+import numpy as np
+
+from mot.types.movement_series import MovementSeries
+
+
+class MovementSeriesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.movements = {
+            datetime(2024, 6, 17): 1125.0,
+            datetime(2024, 6, 15): 65.0,
+            datetime(2024, 6, 16): -15.0,
+            datetime(2024, 7, 1): 2.0,
+        }
+
+    def test_dict_compatible(self):
+        series = MovementSeries.from_movements(self.movements)
+
+        self.assertEqual(self.movements, series)
+        self.assertEqual(4, len(series))
+        self.assertEqual(-15.0, series[datetime(2024, 6, 16)])
+        self.assertEqual(-15.0, series[date(2024, 6, 16)])
+        self.assertIn(datetime(2024, 7, 1), series)
+        self.assertNotIn(datetime(2024, 6, 18), series)
+        self.assertIsNone(series.get(datetime(2024, 6, 18)))
+        with self.assertRaises(KeyError):
+            _ = series[datetime(2024, 6, 18)]
+
+    def test_sorted_by_date(self):
+        series = MovementSeries.from_movements(self.movements)
+
+        self.assertEqual(sorted(self.movements), list(series))
+        self.assertEqual([65.0, -15.0, 1125.0, 2.0], list(series.values()))
+
+    def test_amounts_of_the_same_day_are_summed(self):
+        series = MovementSeries.from_movements({
+            datetime(2024, 6, 15, 10, 30): 500,
+            datetime(2024, 6, 15, 18): -435,
+        }, "cents")
+
+        self.assertEqual({datetime(2024, 6, 15): 65}, series)
+
+    def test_between(self):
+        series = MovementSeries.from_movements(self.movements)
+
+        self.assertEqual([65.0, -15.0, 1125.0], list(series.between(end=date(2024, 6, 30)).values()))
+        self.assertEqual([-15.0, 1125.0], list(series.between(date(2024, 6, 16), date(2024, 6, 17)).values()))
+        self.assertEqual(0, len(series.between(date(2024, 8, 1))))
+
+    def test_to_numpy(self):
+        cents = {movement_date: round(amount * 100) for movement_date, amount in self.movements.items()}
+        series = MovementSeries.from_movements(cents, "cents")
+        dates, amounts = series.to_numpy()
+
+        self.assertEqual(np.datetime64("2024-06-15"), dates[0])
+        self.assertEqual(np.int64, amounts.dtype)
+
+        # The amounts are not copied.
+        series.amounts[0] = 7000
+        self.assertEqual(7000, amounts[0])
+
+    def test_to_pandas(self):
+        data_frame = MovementSeries.from_movements(self.movements).to_pandas()
+
+        self.assertEqual(1125.0, data_frame[datetime(2024, 6, 17)])
+
+    def test_pickle(self):
+        series = MovementSeries.from_movements(self.movements)
+
+        self.assertEqual(series, pickle.loads(pickle.dumps(series)))
+
+
+if __name__ == '__main__':
+    unittest.main()
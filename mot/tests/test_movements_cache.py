@@ -0,0 +1,140 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from mot.money_over_time import get_money_over_time
+from mot.reader import movements_manager
+from mot.reader.movement_filters import parse_filter_expression
+from mot.reader.movements_cache import MovementsCache
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+
+
+class MovementsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = MovementsCache(os.path.join(self.directory, "cache"))
+        self.file_path = os.path.join(self.directory, "movements.csv")
+        shutil.copy(os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv'), self.file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_store_and_load(self):
+        key = self.cache.get_key(self.file_path, ",", DateCell(), "amount")
+        movements = {
+            datetime(2024, 6, 15): 65.25,
+            datetime(2024, 6, 16, 10, 30): -0.1,
+        }
+
+        self.assertIsNone(self.cache.load(key))
+        self.cache.store(key, movements)
+        self.assertEqual(list(movements.items()), list(self.cache.load(key).items()))
+
+    def test_cached_movements_are_reused(self):
+        """
+        A warm call must not parse the records file again, this is verified by
+        replacing the cached movements with different ones.
+        """
+        expected = get_money_over_time(self.file_path, cache=self.cache)
+        self.assertEqual(expected, get_money_over_time(self.file_path, cache=self.cache))
+
+        key = self.cache.get_key(self.file_path, ",", DateCell(), "amount")
+        self.cache.store(key, {datetime(2024, 1, 1): 1.0})
+        self.assertEqual({datetime(2024, 1, 1): 1.0}, get_money_over_time(self.file_path, cache=self.cache))
+
+    def test_any_filtering_value_is_answered_from_the_cache(self):
+        """
+        The movements are cached by each value of the filtering column, this is verified
+        by replacing the cached groups with different ones.
+        """
+        for amount_mode in ["float", "cents"]:
+            for value in ["cash", "CREDIT CARD", "savings"]:
+                for filter_mode in ["in", "out"]:
+                    arguments = {
+                        "filtering_cell": Cell("account", value),
+                        "filter_mode": filter_mode,
+                        "amount_mode": amount_mode,
+                        "filters": [parse_filter_expression("amount<200")],
+                    }
+                    self.assertEqual(
+                        get_money_over_time(self.file_path, **arguments),
+                        get_money_over_time(self.file_path, cache=self.cache, **arguments)
+                    )
+
+        key = self.cache.get_key(self.file_path, ",", DateCell(), "amount", group_label="account")
+        self.cache.store_groups(key, {"Cash": {datetime(2024, 1, 1): 1.0}, "other": {datetime(2024, 1, 2): 2.0}})
+        self.assertEqual(
+            {datetime(2024, 1, 1): 1.0},
+            get_money_over_time(self.file_path, cache=self.cache, filtering_cell=Cell("account", "cash"))
+        )
+        self.assertEqual(
+            {datetime(2024, 1, 2): 2.0},
+            get_money_over_time(
+                self.file_path,
+                cache=self.cache,
+                filtering_cell=Cell("account", "cash"),
+                filter_mode="out"
+            )
+        )
+
+    def test_columns_with_many_values_are_not_cached_by_value(self):
+        """
+        Past "MAX_FILTER_VALUES" distinct values, only the movements of the filtering
+        value are cached, and groups larger than the cache are never stored.
+        """
+        arguments = {"filtering_cell": Cell("row_number", "3"), "filter_mode": "out"}
+        with mock.patch.object(movements_manager, "MAX_FILTER_VALUES", 2):
+            self.assertEqual(
+                get_money_over_time(self.file_path, **arguments),
+                get_money_over_time(self.file_path, cache=self.cache, **arguments)
+            )
+
+        key = self.cache.get_key(self.file_path, ",", DateCell(), "amount", group_label="row_number")
+        self.assertIsNone(self.cache.load_groups(key))
+        key = self.cache.get_key(
+            self.file_path,
+            ",",
+            DateCell(),
+            "amount",
+            Cell("row_number", "3"),
+            movements_manager.include_all_except
+        )
+        self.assertIsNotNone(self.cache.load(key))
+
+        small_cache = MovementsCache(os.path.join(self.directory, "small_cache"), max_size=10)
+        small_cache.store_groups(key, {"cash": {datetime(2024, 1, 1): 1.0}})
+        self.assertIsNone(small_cache.load_groups(key))
+
+    def test_key_depends_on_content_and_arguments(self):
+        key = self.cache.get_key(self.file_path, ",", DateCell(), "amount")
+        self.assertEqual(key, self.cache.get_key(self.file_path, ",", DateCell("DATE"), "Amount"))
+        self.assertNotEqual(key, self.cache.get_key(self.file_path, ",", DateCell("date", "%m/%d/%Y"), "amount"))
+
+        with open(self.file_path, "a", encoding="utf-8") as file:
+            file.write("9,02/07/2024,1,cash\n")
+        self.assertNotEqual(key, self.cache.get_key(self.file_path, ",", DateCell(), "amount"))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        movements = {datetime(2024, 6, day): float(day) for day in range(1, 31)}
+        cache = MovementsCache(self.cache.directory, max_size=1200)
+        cache.store("first", movements)
+        cache.store("second", movements)
+
+        # Loading an entry makes it the most recently used one.
+        os.utime(os.path.join(cache.directory, "first.movements"), ns=(0, 0))
+        os.utime(os.path.join(cache.directory, "second.movements"), ns=(1, 1))
+        self.assertIsNotNone(cache.load("first"))
+        cache.store("third", movements)
+
+        self.assertIsNotNone(cache.load("first"))
+        self.assertIsNone(cache.load("second"))
+        self.assertIsNotNone(cache.load("third"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import unittest
+from datetime import datetime
+
+from mot.money_over_time import get_money_over_time_of_files
+from mot.types.date_cell import DateCell
+from mot.types.records_file import RecordsFile
+
+
+class MultipleRecordsFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        resources = os.path.join(os.path.dirname(__file__), 'resources')
+        self.records_files = [
+            RecordsFile(os.path.join(resources, 'movements_default.csv')),
+            RecordsFile(
+                os.path.join(resources, 'movements_custom_properties.csv'),
+                ";",
+                DateCell("data", "%m/%d/%Y"),
+                "importo"
+            ),
+            RecordsFile(os.path.join(resources, 'movements_reference.csv')),
+        ]
+
+    def test_total_of_all_files(self):
+        """
+        The movements of the same day are added together, across all the files.
+        """
+        for concurrency in ["none", "thread", "process"]:
+            money_by_date, money_by_date_of_files = get_money_over_time_of_files(
+                self.records_files,
+                concurrency=concurrency
+            )
+
+            expected = {
+                datetime(2024, 6, 15): 195,
+                datetime(2024, 6, 16): 150,
+                datetime(2024, 6, 17): 3520,
+                datetime(2024, 7, 1): 3524,
+                datetime(2024, 7, 2): 3526,
+            }
+            self.assertEqual(list(expected.items()), list(money_by_date.items()), concurrency)
+            self.assertEqual(3, len(money_by_date_of_files))
+
+    def test_each_file(self):
+        money_by_date, money_by_date_of_files = get_money_over_time_of_files(self.records_files, amount_mode="cents")
+
+        expected = {
+            datetime(2024, 6, 15): 65,
+            datetime(2024, 6, 16): 50,
+            datetime(2024, 6, 17): 1175,
+            datetime(2024, 7, 1): 1177,
+        }
+        self.assertEqual(expected, money_by_date_of_files[0])
+        self.assertEqual(expected, money_by_date_of_files[1])
+        self.assertEqual(1120 + 65 - 15 + 2, money_by_date_of_files[2][datetime(2024, 7, 2)])
+        self.assertEqual(3526, money_by_date[datetime(2024, 7, 2)])
+
+    def test_errors_specify_the_file(self):
+        records_files = self.records_files + [RecordsFile(os.path.join(os.path.dirname(__file__), 'resources/missing.csv'))]
+        with self.assertRaisesRegex(FileNotFoundError, "missing.csv"):
+            get_money_over_time_of_files(records_files)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+from datetime import date, timedelta
+from unittest import mock
+
+from mot.money_over_time import get_money_over_time
+from mot.reader import vectorized_movements_parser
+from mot.reader.vectorized_movements_parser import PARSER_MEMORY
+from mot.reader.movement_filters import parse_filter_expression
+from mot.types.cell import Cell
+
+
+class OutOfCoreTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.file_path = os.path.join(cls.directory.name, "movements.csv")
+        generator = random.Random(5)
+        with open(cls.file_path, "w", encoding="utf-8") as file:
+            file.write("date,amount,account,description\n")
+            for number in range(150000):
+                day = date(2020, 1, 1) + timedelta(days=generator.randint(0, 1500))
+                file.write(
+                    f"{day:%d/%m/%Y},{generator.randint(-100000, 100000) / 100},"
+                    f"{generator.choice(['cash', 'debit card', 'savings'])},movement {number}\n"
+                )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_file_larger_than_the_budget(self):
+        """
+        The file is read in chunks, so the memory allocated while parsing it stays within
+        the budget, which includes the overhead of the parser, and the result is the same
+        of loading it whole.
+        """
+        max_memory = 2 * PARSER_MEMORY
+        file_size = os.path.getsize(self.file_path)
+        self.assertGreater(file_size, 2 * max_memory)
+
+        # Pandas is imported before measuring the memory.
+        expected = get_money_over_time(self.file_path, engine="vectorized")
+        tracemalloc.start()
+        try:
+            money_over_time = get_money_over_time(self.file_path, engine="vectorized", max_memory=max_memory)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertLess(peak, max_memory)
+        self.assertEqual(list(expected.items()), list(money_over_time.items()))
+        self.assertEqual(
+            list(get_money_over_time(self.file_path, engine="python").items()),
+            list(money_over_time.items())
+        )
+
+    def test_filters_and_cents(self):
+        arguments = {
+            "filtering_cell": Cell("account", "cash"),
+            "filter_mode": "out",
+            "amount_mode": "cents",
+            "filters": [parse_filter_expression("amount>0")],
+        }
+
+        expected = get_money_over_time(self.file_path, engine="vectorized", **arguments)
+        money_over_time = get_money_over_time(
+            self.file_path,
+            engine="vectorized",
+            max_memory=2 * PARSER_MEMORY,
+            **arguments
+        )
+        self.assertEqual(list(expected.items()), list(money_over_time.items()))
+
+    def test_budget_too_small(self):
+        with self.assertRaises(ValueError):
+            get_money_over_time(self.file_path, engine="vectorized", max_memory=PARSER_MEMORY)
+
+    @mock.patch.object(vectorized_movements_parser, "MIN_CHUNK_ROWS", 1)
+    def test_xlsx(self):
+        """
+        The tiny budget reads a few rows at a time.
+        """
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.xlsx')
+
+        expected = get_money_over_time(file_path, engine="vectorized")
+        self.assertEqual(
+            list(expected.items()),
+            list(get_money_over_time(file_path, engine="vectorized", max_memory=PARSER_MEMORY + 1000).items())
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
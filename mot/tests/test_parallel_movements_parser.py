@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from mot.benchmarks.ledger_generator import write_synthetic_ledger
+from mot.money_over_time import get_money_over_time
+from mot.reader import parallel_movements_parser
+from mot.reader.movements_parser import read_rows_of_text_file
+from mot.types.cell import Cell
+
+
+class ParallelMovementsParserTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_row_boundaries_with_quoted_new_lines(self):
+        """
+        New lines inside quoted cells must never be used as boundaries.
+        """
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_multiline_cell.csv')
+        size = os.stat(file_path).st_size
+        expected = list(read_rows_of_text_file(file_path, ","))
+
+        for chunks in range(1, 20):
+            boundaries = parallel_movements_parser.find_row_boundaries(file_path, 0, size, chunks)
+            rows = []
+            for start, end in zip(boundaries, boundaries[1:]):
+                rows.extend(read_rows_of_text_file(file_path, ",", start, end))
+
+            self.assertEqual(expected, rows, chunks)
+
+    @mock.patch.object(parallel_movements_parser, "MIN_CHUNK_SIZE", 1024)
+    def test_same_result_as_serial_parsing(self):
+        file_path = os.path.join(self.directory, "movements.csv")
+        write_synthetic_ledger(file_path, 5000, days=100)
+
+        for filtering_cell in [None, Cell("account", "cash")]:
+            self.assertEqual(
+                list(get_money_over_time(file_path, filtering_cell=filtering_cell).items()),
+                list(get_money_over_time(file_path, filtering_cell=filtering_cell, workers=3).items())
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import random
+import unittest
+from array import array
+from datetime import date, timedelta
+
+from mot.reader.movements_manager import round_and_sum_total
+from mot.types.movement_series import MovementSeries
+from mot.types.period_series import PeriodSeries, get_period_end
+
+
+class PeriodSeriesTest(unittest.TestCase):
+
+    def setUp(self):
+        generator = random.Random(3)
+        days = sorted(generator.sample(range(date(2022, 11, 1).toordinal(), date(2024, 3, 1).toordinal()), 300))
+        self.movements = MovementSeries(
+            array("i", days),
+            array("d", [generator.randint(-5000, 5000) / 100 for _ in days])
+        )
+
+    def test_same_result_as_grouping_days(self):
+        for period, get_start in [
+            ("day", lambda day: day),
+            ("week", lambda day: day - timedelta(days=day.weekday())),
+            ("month", lambda day: day.replace(day=1)),
+            ("quarter", lambda day: date(day.year, (day.month - 1) // 3 * 3 + 1, 1)),
+            ("year", lambda day: date(day.year, 1, 1)),
+        ]:
+            expected = {}
+            for day, amount in self.movements.items():
+                positive_net, negative_net = expected.get(get_start(day.date()), (0, 0))
+                expected[get_start(day.date())] = (positive_net + max(amount, 0), negative_net + min(amount, 0))
+
+            totals = round_and_sum_total(MovementSeries(self.movements.days, self.movements.amounts[:]))
+            periods = PeriodSeries.from_movements(self.movements, period)
+            self.assertEqual(len(expected), len(periods), period)
+            for (start, (positive_net, negative_net)), row in zip(expected.items(), periods.rows()):
+                self.assertEqual(start, row.start.date(), period)
+                self.assertAlmostEqual(positive_net, row.positive_net)
+                self.assertAlmostEqual(negative_net, row.negative_net)
+                self.assertAlmostEqual(positive_net + negative_net, row.net)
+                self.assertAlmostEqual(totals.between(end=get_period_end(row.start, period)).amounts[-1], row.balance)
+
+    def test_cents(self):
+        movements = MovementSeries(
+            array("i", [date(2024, 1, 31).toordinal(), date(2024, 2, 1).toordinal()]),
+            array("q", [-250, 100])
+        )
+        periods = PeriodSeries.from_movements(movements, "month")
+
+        self.assertEqual(array("q", [-250, -150]), periods.balances)
+        self.assertEqual(array("q", [0, 100]), periods.positive_nets)
+        self.assertEqual(array("q", [-250, 0]), periods.negative_nets)
+        self.assertEqual(0, len(PeriodSeries.from_movements(MovementSeries(array("i"), array("q")), "week")))
+
+    def test_period_end(self):
+        self.assertEqual(date(2024, 2, 29), get_period_end(date(2024, 2, 1), "month"))
+        self.assertEqual(date(2024, 12, 31), get_period_end(date(2024, 10, 1), "quarter"))
+        self.assertEqual(date(2024, 12, 31), get_period_end(date(2024, 1, 1), "year"))
+        self.assertEqual(date(2024, 6, 16), get_period_end(date(2024, 6, 10), "week"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from urllib.parse import quote
+
+from mot import server
+from mot.diff_over_time import get_diff_over_time
+from mot.money_over_time import get_money_over_time
+from mot.reader.memory_cache import MemoryCache
+from mot.server import handle_request, start_server
+from mot.types.movement_series import MovementSeries
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        resources = os.path.join(os.path.dirname(__file__), 'resources')
+        self.file_path = os.path.join(self.directory.name, 'movements_default.csv')
+        self.reference_file_path = os.path.join(resources, 'movements_reference.csv')
+        shutil.copyfile(os.path.join(resources, 'movements_default.csv'), self.file_path)
+        self.memory_cache: MemoryCache[MovementSeries] = MemoryCache()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_money_over_time(self):
+        status, body = handle_request(f"/money-over-time?file={quote(self.file_path)}", self.memory_cache)
+
+        money_by_date = get_money_over_time(self.file_path)
+        self.assertEqual(200, status)
+        self.assertEqual(
+            {
+                "dates": [day.date().isoformat() for day in money_by_date],
+                "amounts": list(money_by_date.values()),
+            },
+            json.loads(body)
+        )
+
+    def test_diff_over_time(self):
+        status, body = handle_request(
+            f"/diff-over-time?source_file={quote(self.file_path)}"
+            f"&reference_file={quote(self.reference_file_path)}",
+            self.memory_cache
+        )
+
+        differences = json.loads(body)["differences"]
+        expected_differences = list(get_diff_over_time(self.file_path, self.reference_file_path).rows())
+        self.assertEqual(200, status)
+        self.assertEqual(len(expected_differences), len(differences))
+        for expected, difference in zip(expected_differences, differences):
+            self.assertEqual(expected.date.date().isoformat(), difference["date"])
+            self.assertEqual(expected.source, difference["source"])
+            self.assertEqual(expected.reference, difference["reference"])
+
+    def test_parsed_movements_are_reused(self):
+        """
+        Other periods, tolerances and endpoints don't parse the records files again.
+        """
+        targets = [
+            f"/money-over-time?file={quote(self.file_path)}",
+            f"/diff-over-time?source_file={quote(self.file_path)}&reference_file={quote(self.reference_file_path)}",
+            f"/diff-over-time?source_file={quote(self.file_path)}&reference_file={quote(self.reference_file_path)}"
+            "&period=month&tolerance=1",
+            f"/money-over-time?file={quote(self.reference_file_path)}&file={quote(self.file_path)}",
+        ]
+        with mock.patch.object(server, "get_movements", wraps=server.get_movements) as get_movements:
+            for target in targets:
+                self.assertEqual(200, handle_request(target, self.memory_cache)[0])
+
+        self.assertEqual(2, get_movements.call_count)
+        self.assertEqual(2, len(self.memory_cache))
+
+    def test_responses_are_invalidated_when_the_file_changes(self):
+        target = f"/money-over-time?file={quote(self.file_path)}&filter=account%3Dcash"
+        _, body = handle_request(target, self.memory_cache)
+        self.assertEqual(body, handle_request(target, self.memory_cache)[1])
+
+        with open(self.file_path, "a", encoding="utf-8") as file:
+            file.write("99,01/01/2030,1000,cash\n")
+        stat = os.stat(self.file_path)
+        os.utime(self.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        _, updated_body = handle_request(target, self.memory_cache)
+        self.assertEqual("2030-01-01", json.loads(updated_body)["dates"][-1])
+        self.assertNotEqual(body, updated_body)
+
+    def test_least_recently_used_responses_are_evicted(self):
+        memory_cache: MemoryCache[MovementSeries] = MemoryCache(max_entries=2)
+        for amount in [0, 10, 20]:
+            handle_request(f"/money-over-time?file={quote(self.file_path)}&filter=amount%3E{amount}", memory_cache)
+
+        self.assertEqual(2, len(memory_cache))
+
+    def test_errors(self):
+        self.assertEqual(404, handle_request("/unknown", self.memory_cache)[0])
+        self.assertEqual(400, handle_request("/money-over-time", self.memory_cache)[0])
+        self.assertEqual(404, handle_request("/money-over-time?file=missing.csv", self.memory_cache)[0])
+        self.assertEqual(
+            400,
+            handle_request(f"/money-over-time?file={quote(self.file_path)}&engine=unknown", self.memory_cache)[0]
+        )
+
+        status, body = handle_request(f"/money-over-time?file={quote(self.directory.name)}", self.memory_cache)
+        self.assertEqual(500, status)
+        self.assertIn("error", json.loads(body))
+
+    async def test_concurrent_requests_over_http(self):
+        server = await start_server(port=0, memory_cache=self.memory_cache)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            targets = [f"/money-over-time?file={quote(self.file_path)}", "/health"] * 4
+            responses = await asyncio.gather(*(self.__get(port, target) for target in targets))
+
+        expected_body = handle_request(targets[0], self.memory_cache)[1]
+        for target, (status, body) in zip(targets, responses):
+            self.assertEqual(200, status)
+            if target == "/health":
+                self.assertEqual({"status": "ok"}, json.loads(body))
+            else:
+                self.assertEqual(expected_body, body)
+
+    async def test_connections_are_kept_alive(self):
+        server = await start_server(port=0, memory_cache=self.memory_cache)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for _ in range(3):
+                writer.write(b"GET /health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                status, body = await self.__read_response(reader)
+                self.assertEqual(200, status)
+            writer.close()
+            await writer.wait_closed()
+
+    async def __get(self, port: int, target: str):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode("latin-1"))
+        response = await self.__read_response(reader)
+        writer.close()
+        await writer.wait_closed()
+        return response
+
+    @staticmethod
+    async def __read_response(reader: asyncio.StreamReader):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        status = int(head.split(" ")[1])
+        content_length = next(
+            int(line.split(":")[1]) for line in head.split("\r\n") if line.lower().startswith("content-length")
+        )
+        return status, await reader.readexactly(content_length)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from mot.benchmarks.startup_benchmark import HEAVY_MODULES
+
+
+class StartupTest(unittest.TestCase):
+    """
+    Each check runs in a new interpreter, since other tests import the heavy modules.
+    """
+
+    def test_heavy_modules_are_not_imported_at_startup(self):
+        self.assertEqual([], self.__get_imported_heavy_modules("import mot.app"))
+
+    def test_heavy_modules_are_not_imported_reading_csv_files(self):
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv')
+        reference_file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_reference.csv')
+        code = (
+            "from mot.diff_over_time import get_diff_over_time\n"
+            "from mot.money_over_time import get_money_over_time\n"
+            f"get_money_over_time({file_path!r})\n"
+            f"get_diff_over_time({file_path!r}, {reference_file_path!r})\n"
+        )
+
+        self.assertEqual([], self.__get_imported_heavy_modules(code))
+
+    def test_xlsx_files_import_only_openpyxl(self):
+        """
+        Openpyxl imports numpy by itself, when installed.
+        """
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.xlsx')
+        code = f"from mot.money_over_time import get_money_over_time\nget_money_over_time({file_path!r})\n"
+
+        imported_modules = self.__get_imported_heavy_modules(code)
+        self.assertIn("openpyxl", imported_modules)
+        self.assertNotIn("pandas", imported_modules)
+        self.assertNotIn("plotly", imported_modules)
+
+    @staticmethod
+    def __get_imported_heavy_modules(code: str):
+        completed = subprocess.run(
+            [sys.executable, "-c", f"{code}\nimport sys\nprint(' '.join(sorted(sys.modules)))"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.join(os.path.dirname(__file__), '..', '..')
+        )
+        imported_modules = completed.stdout.split()
+        return [module for module in HEAVY_MODULES if module in imported_modules]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import unittest
+
+from mot.money_over_time import get_money_over_time
+from mot.types.cell import Cell
+from mot.types.date_cell import DateCell
+
+
+class VectorizedEngineTest(unittest.TestCase):
+
+    def test_same_result_as_python_engine(self):
+        """
+        Both engines must return the same movements, in the same order.
+        """
+        for file_name in [
+            'movements_default.csv',
+            'movements_trailing_comma.csv',
+            'movements_comma_in_column_value.csv',
+            'movements_multiline_cell.csv',
+            'movements_default.xlsx',
+        ]:
+            file_path = os.path.join(os.path.dirname(__file__), 'resources', file_name)
+            expected = get_money_over_time(file_path, engine="python")
+            money_by_date = get_money_over_time(file_path, engine="vectorized")
+
+            self.assertEqual(list(expected.items()), list(money_by_date.items()), file_name)
+
+    def test_custom_properties(self):
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_custom_properties.csv')
+        arguments = {
+            "delimiter": ";",
+            "date_cell": DateCell("DATA", "%m/%d/%Y"),
+            "amount_label": "importo",
+        }
+
+        expected = get_money_over_time(file_path, engine="python", **arguments)
+        money_by_date = get_money_over_time(file_path, engine="vectorized", **arguments)
+        self.assertEqual(list(expected.items()), list(money_by_date.items()))
+
+    def test_filter_modes(self):
+        file_path = os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv')
+        for filter_mode in ["in", "out"]:
+            arguments = {
+                "filtering_cell": Cell("account", "Cash"),
+                "filter_mode": filter_mode,
+            }
+
+            expected = get_money_over_time(file_path, engine="python", **arguments)
+            money_by_date = get_money_over_time(file_path, engine="vectorized", **arguments)
+            self.assertEqual(list(expected.items()), list(money_by_date.items()), filter_mode)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from array import array
+
+from mot.graph.live_graph import update_live_graph, write_live_graph_page
+from mot.money_over_time import create_graph, get_money_over_time, watch_money_over_time_of_files
+from mot.reader.file_watcher import get_optional_file_signatures, wait_for_changes
+from mot.reader.movements_cache import MovementsCache
+from mot.reader.movements_manager import round_amounts, round_and_sum_total, sum_total, update_total
+from mot.types.movement_series import MovementSeries
+from mot.types.records_file import RecordsFile
+
+
+class WatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, 'movements_default.csv')
+        shutil.copyfile(
+            os.path.join(os.path.dirname(__file__), 'resources/movements_default.csv'),
+            self.file_path
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_update_total(self):
+        """
+        The result is the same of summing the whole series, whether days are appended
+        or changed anywhere.
+        """
+        previous_movements = MovementSeries(array("i", [1, 2, 3, 4]), array("d", [10, -2.5, 3, 4]))
+        previous_total = sum_total(MovementSeries(previous_movements.days, previous_movements.amounts[:]))
+
+        for days, amounts in [
+            ([1, 2, 3, 4], [10, -2.5, 3, 4]),
+            ([1, 2, 3, 4, 5, 6], [10, -2.5, 3, 4, 1, 7]),
+            ([1, 2, 3, 4, 5], [10, -2.5, 3, 9, 1]),
+            ([1, 2, 5], [10, 1, 3]),
+            ([], []),
+        ]:
+            movements = MovementSeries(array("i", days), array("d", amounts))
+            expected = round_and_sum_total(MovementSeries(movements.days, movements.amounts[:]))
+
+            total = round_amounts(update_total(previous_movements, previous_total, movements))
+            self.assertEqual(dict(expected.items()), dict(total.items()))
+            self.assertEqual([10, -2.5, 3, 4], list(previous_movements.amounts))
+
+    def test_update_total_without_rounding_errors(self):
+        """
+        Totals are updated from the previous ones before rounding, the rounded total of
+        the first day would be 0.12.
+        """
+        previous_movements = MovementSeries(array("i", [1]), array("d", [0.125]))
+        total = sum_total(MovementSeries(previous_movements.days, previous_movements.amounts[:]))
+        for day in range(2, 5):
+            movements = MovementSeries(array("i", range(1, day + 1)), array("d", [0.125] + [0.005] * (day - 1)))
+            total = update_total(previous_movements, total, movements)
+            previous_movements = movements
+
+        expected = round_and_sum_total(MovementSeries(movements.days, movements.amounts[:]))
+        self.assertEqual(list(expected.amounts), list(round_amounts(total).amounts))
+
+    def test_wait_for_changes(self):
+        signatures = get_optional_file_signatures([self.file_path])
+        timer = threading.Timer(0.05, self.__append_row, ["99,30/06/2024,5,cash"])
+        timer.start()
+
+        new_signatures = wait_for_changes([self.file_path], signatures, 0.02)
+        timer.join()
+        self.assertNotEqual(signatures, new_signatures)
+        self.assertEqual(get_optional_file_signatures([self.file_path]), new_signatures)
+
+    def test_wait_for_changes_stops(self):
+        stop = threading.Event()
+        stop.set()
+
+        self.assertIsNone(wait_for_changes([self.file_path], get_optional_file_signatures([self.file_path]), 0.01, stop))
+
+    def test_watch_updates_after_appending_rows(self):
+        updates = self.__watch(lambda: self.__append_row("99,30/06/2024,5,cash"))
+
+        self.assertEqual(2, len(updates))
+        self.assertEqual(dict(get_money_over_time(self.file_path).items()), updates[1])
+        self.assertEqual(len(updates[0]) + 1, len(updates[1]))
+
+    def test_watch_updates_after_editing_a_middle_row(self):
+        """
+        The edit keeps the size of the file, and it's followed by many rows.
+        """
+        with open(self.file_path, "w", encoding="utf-8") as file:
+            file.write("id,date,amount,account\n")
+            for number in range(2000):
+                file.write(f"{number},{number % 28 + 1:02d}/01/2024,{number % 90 + 10},cash\n")
+
+        def edit_row():
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                content = file.read()
+            with open(self.file_path, "w", encoding="utf-8") as file:
+                file.write(content.replace("\n9,10/01/2024,19,cash\n", "\n9,10/01/2024,91,cash\n"))
+            self.__touch()
+
+        updates = self.__watch(edit_row)
+
+        self.assertEqual(2, len(updates))
+        self.assertEqual(dict(get_money_over_time(self.file_path).items()), updates[1])
+        self.assertNotEqual(updates[0], updates[1])
+
+    def test_live_graph(self):
+        graph_directory = os.path.join(self.directory.name, "graph")
+        page = write_live_graph_page(graph_directory)
+        update_live_graph(create_graph(get_money_over_time(self.file_path)), graph_directory, 3)
+
+        self.assertTrue(os.path.exists(page))
+        self.assertTrue(os.path.exists(os.path.join(graph_directory, "plotly.min.js")))
+        with open(os.path.join(graph_directory, "version.js"), encoding="utf-8") as file:
+            self.assertEqual("window.checkGraphVersion(3);", file.read())
+        with open(os.path.join(graph_directory, "figure.js"), encoding="utf-8") as file:
+            self.assertTrue(file.read().startswith("window.updateGraph(3, {"))
+
+    def __watch(self, change) -> list:
+        """
+        :param change: Changes the records file once it has been loaded.
+        :return: The money over time passed to each update.
+        """
+        updates = []
+        updated = threading.Semaphore(0)
+        stop = threading.Event()
+
+        def on_change(movements, movements_of_files):
+            updates.append(dict(movements.items()))
+            updated.release()
+
+        watcher = threading.Thread(
+            target=watch_money_over_time_of_files,
+            args=([RecordsFile(self.file_path)], on_change),
+            kwargs={
+                "cache": MovementsCache(os.path.join(self.directory.name, "cache")),
+                "interval": 0.02,
+                "stop": stop,
+            }
+        )
+        watcher.start()
+        try:
+            self.assertTrue(updated.acquire(timeout=5))
+            change()
+            self.assertTrue(updated.acquire(timeout=5))
+        finally:
+            stop.set()
+            watcher.join()
+
+        return updates
+
+    def __append_row(self, row: str) -> None:
+        with open(self.file_path, "a", encoding="utf-8") as file:
+            file.write(row + "\n")
+        self.__touch()
+
+    def __touch(self) -> None:
+        """
+        The modification time is moved forward, so that the change is noticed even on
+        file systems with a coarse resolution.
+        """
+        stat = os.stat(self.file_path)
+        os.utime(self.file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+if __name__ == '__main__':
+    unittest.main()
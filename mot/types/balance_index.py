@@ -0,0 +1,126 @@
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, List, Optional, Tuple
+
+from mot.types.movement_series import MovementSeries
+
+
+class BalanceIndex:
+    """
+    Answers queries on the balance over time in O(log n), without reading the records
+    files again.
+    The balance of each day is the running total of the movements, which is a prefix sum:
+    the balance at any date is found with a binary search, and the net flow between two
+    dates is the difference of two balances.
+    The lowest and highest balances of a range are found with two sparse tables, whose
+    level k stores, for each day, the position of the lowest (highest) balance among the
+    2^k days starting from it, so that any range is covered by two blocks of a level.
+    """
+    __slots__ = ("days", "balances", "lowest", "highest")
+
+    def __init__(
+            self,
+            days: "array[int]",
+            balances: "array[Any]",
+            lowest: List["array[int]"],
+            highest: List["array[int]"]
+    ):
+        """
+        :param days: The sorted ordinals of the days with movements.
+        :param balances: The balance at the end of each day.
+        :param lowest: The levels of the sparse table of the lowest balances, from 0.
+        :param highest: The levels of the sparse table of the highest balances, from 0.
+        """
+        self.days = days
+        self.balances = balances
+        self.lowest = lowest
+        self.highest = highest
+
+    @classmethod
+    def from_money_over_time(cls, money_over_time: MovementSeries) -> "BalanceIndex":
+        """
+        :param money_over_time: The total amount of each day, e.g. by "round_and_sum_total".
+        """
+        balances = money_over_time.amounts
+        lowest = [array("i", range(len(balances)))]
+        highest = [array("i", range(len(balances)))]
+        half = 1
+        while half * 2 <= len(balances):
+            lowest.append(array("i", [
+                left if balances[left] <= balances[right] else right
+                for left, right in zip(lowest[-1], lowest[-1][half:])
+            ]))
+            highest.append(array("i", [
+                left if balances[left] >= balances[right] else right
+                for left, right in zip(highest[-1], highest[-1][half:])
+            ]))
+            half *= 2
+
+        return cls(money_over_time.days, balances, lowest, highest)
+
+    def balance_at(self, day: date) -> float:
+        """
+        :return: The balance at the end of the day, 0 before the first movement.
+        """
+        position = bisect_right(self.days, day.toordinal()) - 1
+        return 0 if position < 0 else self.balances[position]
+
+    def net_flow(self, start: date, end: date) -> float:
+        """
+        :return: The sum of the movements between the two days, both included.
+        """
+        return round(self.balance_at(end) - self.balance_at(start - timedelta(days=1)), 2)
+
+    def lowest_balance(self, start: date, end: date) -> Tuple[datetime, float]:
+        """
+        :return: The first day with the lowest balance between the two days, both
+                 included, and its balance.
+        """
+        return self.__find_extreme(start, end, self.lowest, lambda balance, other: balance <= other)
+
+    def highest_balance(self, start: date, end: date) -> Tuple[datetime, float]:
+        """
+        :return: The first day with the highest balance between the two days, both
+                 included, and its balance.
+        """
+        return self.__find_extreme(start, end, self.highest, lambda balance, other: balance >= other)
+
+    def first_day(self) -> Optional[datetime]:
+        return datetime.fromordinal(self.days[0]) if len(self.days) > 0 else None
+
+    def last_day(self) -> Optional[datetime]:
+        return datetime.fromordinal(self.days[-1]) if len(self.days) > 0 else None
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __find_extreme(
+            self,
+            start: date,
+            end: date,
+            table: List["array[int]"],
+            is_before: Callable[[float, float], bool]
+    ) -> Tuple[datetime, float]:
+        """
+        The balance at the start of the range is the one of the last day with movements
+        before it, or 0, so it's compared with the balances of the days in the range.
+        """
+        if end < start:
+            raise ValueError("The end of the range must not be before its start.")
+
+        first = bisect_right(self.days, start.toordinal()) - 1
+        last = bisect_right(self.days, end.toordinal()) - 1
+        start_balance = 0 if first < 0 else self.balances[first]
+        if last <= first:
+            return datetime(start.year, start.month, start.day), start_balance
+
+        first += 1
+        level = (last - first + 1).bit_length() - 1
+        left = table[level][first]
+        right = table[level][last - (1 << level) + 1]
+        position = left if is_before(self.balances[left], self.balances[right]) else right
+
+        if is_before(start_balance, self.balances[position]):
+            return datetime(start.year, start.month, start.day), start_balance
+        return datetime.fromordinal(self.days[position]), self.balances[position]
@@ -0,0 +1,98 @@
+import math
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime
+from typing import Dict, ItemsView, Iterator, Mapping, NamedTuple, Optional, Tuple
+
+
+class Difference(NamedTuple):
+    """
+    A missing source or reference amount is None, and so is the delta.
+    """
+    date: datetime
+    source: Optional[float]
+    reference: Optional[float]
+    delta: Optional[float]
+
+
+class DifferenceSeries(Mapping[date, Dict[str, float]]):
+    """
+    The differences between the source and the reference movements, sorted from the most
+    recent one, stored as parallel arrays: the days as int32 ordinals, and the source
+    amount, the reference amount and their delta (reference - source) as float64.
+    Missing amounts are stored as NaN.
+    It can be used as a read-only dict, with the days as datetime keys and the available
+    amounts, with the "source" and "reference" keys, as values.
+    """
+    __slots__ = ("days", "sources", "references", "deltas")
+
+    def __init__(self) -> None:
+        self.days = array("i")
+        self.sources = array("d")
+        self.references = array("d")
+        self.deltas = array("d")
+
+    def append(self, day: int, source: float, reference: float, delta: float) -> None:
+        """
+        Differences must be appended from the most recent one.
+        :param day: The ordinal of the day.
+        :param source: The source amount, NaN if missing.
+        :param reference: The reference amount, NaN if missing.
+        :param delta: The reference amount minus the source one, NaN if any is missing.
+        """
+        self.days.append(day)
+        self.sources.append(source)
+        self.references.append(reference)
+        self.deltas.append(delta)
+
+    def rows(self) -> Iterator[Difference]:
+        for day, source, reference, delta in zip(self.days, self.sources, self.references, self.deltas):
+            yield Difference(
+                datetime.fromordinal(day),
+                None if math.isnan(source) else source,
+                None if math.isnan(reference) else reference,
+                None if math.isnan(delta) else delta
+            )
+
+    def __getitem__(self, key: date) -> Dict[str, float]:
+        ordinal = key.toordinal()
+        index = bisect_left(self.days, -ordinal, key=lambda day: -day)
+        if index == len(self.days) or self.days[index] != ordinal:
+            raise KeyError(key)
+
+        return self.get_values(index)
+
+    def __iter__(self) -> Iterator[datetime]:
+        return map(datetime.fromordinal, self.days)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __repr__(self) -> str:
+        return f"DifferenceSeries({list(self.rows())!r})"
+
+    def items(self) -> ItemsView[date, Dict[str, float]]:
+        return DifferenceSeriesItems(self)
+
+    def get_values(self, index: int) -> Dict[str, float]:
+        """
+        :return: The available amounts of the difference at the given position.
+        """
+        values = {}
+        if not math.isnan(self.sources[index]):
+            values["source"] = self.sources[index]
+        if not math.isnan(self.references[index]):
+            values["reference"] = self.references[index]
+
+        return values
+
+
+class DifferenceSeriesItems(ItemsView[date, Dict[str, float]]):
+    """
+    Iterates the arrays by position, instead of looking up each day.
+    """
+    _mapping: DifferenceSeries
+
+    def __iter__(self) -> Iterator[Tuple[date, Dict[str, float]]]:
+        for index, day in enumerate(self._mapping.days):
+            yield datetime.fromordinal(day), self._mapping.get_values(index)
@@ -0,0 +1,21 @@
+from typing import Literal
+
+FilterOperator = Literal["=", "!=", "<", "<=", ">", ">=", "~", "!~"]
+"""
+    - =: the cell matches one of the comma separated values, case-insensitive.
+    - !=: the cell doesn't match any of the comma separated values, case-insensitive.
+    - <, <=, >, >=: the cell is compared to the value as a number, or as a date if the
+      cell contains the date of the movements, using the date format of the records file.
+    - ~: the cell matches the regular expression, case-insensitive.
+    - !~: the cell doesn't match the regular expression, case-insensitive.
+"""
+
+
+class FilterExpression:
+    def __init__(self, label: str, operator: FilterOperator, value: str):
+        self.label = label
+        self.operator = operator
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"{self.label}{self.operator}{self.value}"
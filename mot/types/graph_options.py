@@ -0,0 +1,14 @@
+from typing import Literal
+
+Downsampling = Literal["none", "lttb", "minmax"]
+"""
+How long series are reduced to a maximum number of points before being plotted:
+    - none: all the points are plotted.
+    - lttb: "Largest Triangle Three Buckets", points are split into buckets and the one
+      forming the largest triangle with the points chosen for the nearby buckets is kept,
+      which preserves the visual shape of the series.
+    - minmax: the lowest and the highest point of each bucket are kept, so that no peak
+      is lost.
+"""
+
+DEFAULT_MAX_POINTS = 2000
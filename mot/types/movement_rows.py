@@ -0,0 +1,60 @@
+from array import array
+from datetime import datetime
+from typing import Iterator, List, NamedTuple
+
+
+class MovementRow(NamedTuple):
+    """
+    :param number: The line the row starts at in the records file, the header being the first one.
+    """
+    number: int
+    date: datetime
+    amount: float
+
+
+class MovementRows:
+    """
+    The movements of a records file, one for each row, stored as parallel arrays: the row
+    numbers, the days as int32 ordinals and the amounts as int64 cents, so that rows can be
+    matched by their exact amount.
+    """
+    __slots__ = ("numbers", "days", "amounts")
+
+    def __init__(self) -> None:
+        self.numbers = array("q")
+        self.days = array("i")
+        self.amounts = array("q")
+
+    def append(self, number: int, day: int, cents: int) -> None:
+        self.numbers.append(number)
+        self.days.append(day)
+        self.amounts.append(cents)
+
+    def take(self, positions: List[int]) -> "MovementRows":
+        """
+        :return: The rows at the given positions, in the same order.
+        """
+        movement_rows = MovementRows()
+        movement_rows.numbers = array("q", [self.numbers[position] for position in positions])
+        movement_rows.days = array("i", [self.days[position] for position in positions])
+        movement_rows.amounts = array("q", [self.amounts[position] for position in positions])
+        return movement_rows
+
+    def rows(self) -> Iterator[MovementRow]:
+        for number, day, cents in zip(self.numbers, self.days, self.amounts):
+            yield MovementRow(number, datetime.fromordinal(day), cents / 100)
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __repr__(self) -> str:
+        return f"MovementRows({list(self.rows())!r})"
+
+
+class RowDifferences(NamedTuple):
+    """
+    The rows of the source and reference records files which weren't matched by any row of
+    the other file.
+    """
+    source: MovementRows
+    reference: MovementRows
@@ -0,0 +1,131 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any, ItemsView, Iterator, Mapping, Optional, Tuple, ValuesView
+
+from mot.types.movements import AmountMode
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class MovementSeries(Mapping[date, float]):
+    """
+    The amounts of the movements for each day, sorted by date.
+    Days are stored as int32 ordinals and amounts as int64 cents or float64, in two
+    parallel arrays, which take 12 bytes per day instead of the 100+ bytes of a dict entry.
+    It can be used as a read-only dict, with the days as datetime keys.
+    """
+    __slots__ = ("days", "amounts")
+
+    def __init__(self, days: "array[int]", amounts: "array[Any]"):
+        """
+        :param days: The sorted ordinals of the days, with the "i" type code.
+        :param amounts: The amount of each day, with the "q" (cents) or "d" (floats) type code.
+        """
+        if len(days) != len(amounts):
+            raise ValueError("Days and amounts must have the same length.")
+
+        self.days = days
+        self.amounts = amounts
+
+    @classmethod
+    def from_movements(cls, movements: Mapping[date, float], amount_mode: AmountMode = "float") -> "MovementSeries":
+        """
+        The movements are sorted by date, and the amounts of different times of the
+        same day are summed.
+        """
+        days = array("i")
+        amounts: "array[Any]" = array("q" if amount_mode == "cents" else "d")
+        for movement_date, amount in sorted(movements.items(), key=lambda x: x[0]):
+            day = movement_date.toordinal()
+            if len(days) > 0 and days[-1] == day:
+                amounts[-1] += amount
+            else:
+                days.append(day)
+                amounts.append(amount)
+
+        return cls(days, amounts)
+
+    def __getitem__(self, key: date) -> float:
+        index = self.__find(key)
+        if index is None:
+            raise KeyError(key)
+
+        return self.amounts[index]
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, date) and self.__find(key) is not None
+
+    def __iter__(self) -> Iterator[datetime]:
+        return map(datetime.fromordinal, self.days)
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __repr__(self) -> str:
+        return f"MovementSeries({dict(self.items())!r})"
+
+    def items(self) -> ItemsView[date, float]:
+        return MovementSeriesItems(self)
+
+    def values(self) -> ValuesView[float]:
+        return MovementSeriesValues(self)
+
+    def between(self, start: Optional[date] = None, end: Optional[date] = None) -> "MovementSeries":
+        """
+        :param start: The first day to include, all the days from the beginning if not specified.
+        :param end: The last day to include, all the days until the end if not specified.
+        :return: The movements between the two days, both included.
+        """
+        start_index = 0 if start is None else bisect_left(self.days, start.toordinal())
+        end_index = len(self.days) if end is None else bisect_right(self.days, end.toordinal())
+        return MovementSeries(self.days[start_index:end_index], self.amounts[start_index:end_index])
+
+    def to_numpy(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        The amounts share the memory of the series, without being copied.
+        :return: The days, as "datetime64[D]", and the amounts.
+        """
+        import numpy as np
+
+        days = np.frombuffer(self.days, dtype=np.int32).astype(np.int64) - EPOCH_ORDINAL
+        amounts = np.frombuffer(self.amounts, dtype=np.int64 if self.amounts.typecode == "q" else np.float64)
+        return days.astype("datetime64[D]"), amounts
+
+    def to_pandas(self) -> "pd.Series":
+        """
+        :return: The amounts indexed by date, sharing the memory of the series.
+        """
+        import pandas as pd
+
+        days, amounts = self.to_numpy()
+        return pd.Series(amounts, index=pd.DatetimeIndex(days.astype("datetime64[ns]"), name="date"), copy=False)
+
+    def __find(self, key: date) -> Optional[int]:
+        ordinal = key.toordinal()
+        index = bisect_left(self.days, ordinal)
+        if index < len(self.days) and self.days[index] == ordinal:
+            return index
+
+        return None
+
+
+class MovementSeriesItems(ItemsView[date, float]):
+    """
+    Iterates both arrays together, instead of looking up each day.
+    """
+    _mapping: MovementSeries
+
+    def __iter__(self) -> Iterator[Tuple[date, float]]:
+        return zip(map(datetime.fromordinal, self._mapping.days), self._mapping.amounts)
+
+
+class MovementSeriesValues(ValuesView[float]):
+    _mapping: MovementSeries
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._mapping.amounts)
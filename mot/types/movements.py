@@ -1,4 +1,12 @@
 from datetime import date
-from typing import Dict
+from typing import Dict, Literal
 
 Movements = Dict[date, float]
+
+AmountMode = Literal["float", "cents"]
+"""
+    - float: amounts are parsed as floats, and their sums are rounded to 2 decimals.
+    - cents: amounts are parsed as integer cents, so their sums are exact and they can
+      be compared without float rounding errors. Amounts are converted back to floats
+      only when they're returned to the caller.
+"""
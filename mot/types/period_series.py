@@ -0,0 +1,170 @@
+from array import array
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Any, Iterator, Literal, NamedTuple
+
+from mot.types.movement_series import EPOCH_ORDINAL, MovementSeries
+
+if TYPE_CHECKING:
+    import numpy as np
+
+Period = Literal["day", "week", "month", "quarter", "year"]
+"""
+The calendar period movements are grouped by. Weeks start on Monday, quarters on
+January, April, July and October.
+"""
+
+
+class PeriodTotal(NamedTuple):
+    """
+    :param start: The first day of the period.
+    :param balance: The balance at the end of the period.
+    :param positive_net: The sum of the net amounts of the days of the period whose net
+           amount is positive. Movements of the same day offset each other, so this is
+           not the gross inflow of the period.
+    :param negative_net: The sum of the net amounts of the days of the period whose net
+           amount is negative, as a negative number.
+    :param net: The sum of all the amounts of the period.
+    """
+    start: datetime
+    balance: float
+    positive_net: float
+    negative_net: float
+    net: float
+
+
+class PeriodSeries:
+    """
+    The movements grouped by calendar period, sorted by date, stored as parallel arrays:
+    the first day of each period with movements as int32 ordinals, and its balance, the
+    sums of its net-positive and net-negative days and its net amount, as int64 cents or
+    float64 like the movements. See "PeriodTotal".
+    The gross inflow and outflow of each period aren't available: the parsers, the cache,
+    the incremental state and the columnar ledgers only keep the sum of each day, so the
+    sums of the net-positive and net-negative days are computed instead.
+    """
+    __slots__ = ("starts", "balances", "positive_nets", "negative_nets", "nets")
+
+    def __init__(
+            self,
+            starts: "array[int]",
+            balances: "array[Any]",
+            positive_nets: "array[Any]",
+            negative_nets: "array[Any]",
+            nets: "array[Any]"
+    ):
+        self.starts = starts
+        self.balances = balances
+        self.positive_nets = positive_nets
+        self.negative_nets = negative_nets
+        self.nets = nets
+
+    @classmethod
+    def from_movements(cls, movements: MovementSeries, period: Period) -> "PeriodSeries":
+        """
+        Days are already sorted, so the days of each period are contiguous, and all the
+        sums are computed with array operations in a single pass over the boundaries of
+        the periods. Float sums are rounded to 2 decimals.
+        :param movements: The sum of the amounts of the movements of each day, not the
+               cumulative total.
+        """
+        import numpy as np
+
+        typecode = movements.amounts.typecode
+        if len(movements) == 0:
+            return cls(array("i"), array(typecode), array(typecode), array(typecode), array(typecode))
+
+        days, amounts = movements.to_numpy()
+        periods = get_periods(days, period)
+        boundaries = np.concatenate(([0], np.flatnonzero(periods[1:] != periods[:-1]) + 1))
+        zero = np.zeros(1, dtype=amounts.dtype)
+
+        nets = np.add.reduceat(amounts, boundaries)
+        positive_nets = np.add.reduceat(np.maximum(amounts, zero), boundaries)
+        negative_nets = np.add.reduceat(np.minimum(amounts, zero), boundaries)
+        balances = np.cumsum(nets)
+        if typecode == "d":
+            nets, positive_nets, negative_nets, balances = (
+                np.round(values, 2) for values in (nets, positive_nets, negative_nets, balances)
+            )
+
+        starts = get_period_starts(periods[boundaries], period).astype(np.int64) + EPOCH_ORDINAL
+        return cls(
+            array("i", starts.astype(np.int32).tobytes()),
+            array(typecode, balances.tobytes()),
+            array(typecode, positive_nets.tobytes()),
+            array(typecode, negative_nets.tobytes()),
+            array(typecode, nets.tobytes())
+        )
+
+    def net_movements(self) -> MovementSeries:
+        """
+        :return: The net amount of each period, by its first day, which can be compared
+                 with the ones of other records files.
+        """
+        return MovementSeries(self.starts, self.nets)
+
+    def rows(self) -> Iterator[PeriodTotal]:
+        for start, balance, positive_net, negative_net, net in zip(
+                self.starts,
+                self.balances,
+                self.positive_nets,
+                self.negative_nets,
+                self.nets
+        ):
+            yield PeriodTotal(datetime.fromordinal(start), balance, positive_net, negative_net, net)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __repr__(self) -> str:
+        return f"PeriodSeries({list(self.rows())!r})"
+
+
+def get_periods(days: "np.ndarray", period: Period) -> "np.ndarray":
+    """
+    :param days: The days, as "datetime64[D]".
+    :return: A number for each day, which is the same for the days of the same period,
+             and increases with the periods.
+    """
+    import numpy as np
+
+    if period == "day":
+        return days.astype(np.int64)
+    if period == "week":
+        # 1970-01-01 was a Thursday, 3 days are added so that weeks start on Monday.
+        return (days.astype(np.int64) + 3) // 7
+
+    months = days.astype("datetime64[M]").astype(np.int64)
+    if period == "month":
+        return months
+    if period == "quarter":
+        return months // 3
+    return months // 12
+
+
+def get_period_starts(periods: "np.ndarray", period: Period) -> "np.ndarray":
+    """
+    The inverse of "get_periods".
+    :return: The first day of each period, as "datetime64[D]".
+    """
+    if period == "day":
+        return periods.astype("datetime64[D]")
+    if period == "week":
+        return (periods * 7 - 3).astype("datetime64[D]")
+
+    months = {"month": 1, "quarter": 3, "year": 12}[period]
+    return (periods * months).astype("datetime64[M]").astype("datetime64[D]")
+
+
+def get_period_end(start: date, period: Period) -> date:
+    """
+    :param start: The first day of the period.
+    :return: The last day of the period.
+    """
+    if period == "day":
+        return start
+    if period == "week":
+        return start + timedelta(days=6)
+
+    months = start.year * 12 + start.month - 1 + {"month": 1, "quarter": 3, "year": 12}[period]
+    return type(start)(months // 12, months % 12 + 1, 1) - timedelta(days=1)
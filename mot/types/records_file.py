@@ -0,0 +1,20 @@
+from typing import Optional
+
+from mot.types.date_cell import DateCell
+
+
+class RecordsFile:
+    """
+    A records file with the arguments needed to read its movements.
+    """
+    def __init__(
+            self,
+            file_path: str,
+            delimiter: Optional[str] = None,
+            date_cell: Optional[DateCell] = None,
+            amount_label: Optional[str] = None
+    ):
+        self.file_path = file_path
+        self.delimiter = "," if delimiter is None else delimiter
+        self.date_cell = DateCell() if date_cell is None else date_cell
+        self.amount_label = "amount" if amount_label is None else amount_label